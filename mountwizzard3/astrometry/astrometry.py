@@ -30,7 +30,6 @@ if platform.system() == 'Windows':
     from astrometry import sgpro_astrometry
     from astrometry import pinpoint_astrometry
 from astrometry import none_astrometry
-from astrometry import transform
 
 
 class Astrometry(PyQt5.QtCore.QObject):
@@ -60,7 +59,7 @@ class Astrometry(PyQt5.QtCore.QObject):
         self.mutexIsRunning = PyQt5.QtCore.QMutex()
         self.astrometryCommandQueue = queue.Queue()
         self.mutexChooser = PyQt5.QtCore.QMutex()
-        self.transform = transform.Transform(self.app)
+        self.transform = self.app.transform
         self.statusTimer = None
         self.cycleTimer = None
 
@@ -55,6 +55,8 @@ class AstrometryClient:
         self.application = dict()
         self.cancel = False
         self.mutexCancel = PyQt5.QtCore.QMutex()
+        # number of images solved at the moment, modeling solves several in parallel
+        self.solvesRunning = 0
 
         self.checkIP = checkIP.CheckIP()
 
@@ -89,6 +91,8 @@ class AstrometryClient:
                 self.app.ui.astrometryDownsampling.setValue(self.app.config['AstrometryDownsample'])
             if 'AstrometryRadius' in self.app.config:
                 self.app.ui.astrometryRadius.setValue(self.app.config['AstrometryRadius'])
+            if 'AstrometryWorkers' in self.app.config:
+                self.app.ui.astrometryWorkers.setValue(self.app.config['AstrometryWorkers'])
         except Exception as e:
             self.logger.error('Item in config.cfg for astrometry client could not be initialized, error:{0}'.format(e))
         finally:
@@ -102,6 +106,7 @@ class AstrometryClient:
         self.app.config['AstrometryTimeout'] = self.app.ui.le_astrometryTimeout.text()
         self.app.config['AstrometryDownsample'] = self.app.ui.astrometryDownsampling.value()
         self.app.config['AstrometryRadius'] = self.app.ui.astrometryRadius.value()
+        self.app.config['AstrometryWorkers'] = self.app.ui.astrometryWorkers.value()
 
     def start(self):
         pass
@@ -146,9 +151,20 @@ class AstrometryClient:
         self.main.astrometrySolvingTime.emit('{0:3d}%'.format(int(monitor.bytes_read / monitor.len * 100)))
 
     def solveImage(self, imageParams):
+        # the cancel flag is only reset by the first of parallel solves, so a cancel reaches all of them
         self.mutexCancel.lock()
-        self.cancel = False
+        if self.solvesRunning == 0:
+            self.cancel = False
+        self.solvesRunning += 1
         self.mutexCancel.unlock()
+        try:
+            self.runSolve(imageParams)
+        finally:
+            self.mutexCancel.lock()
+            self.solvesRunning -= 1
+            self.mutexCancel.unlock()
+
+    def runSolve(self, imageParams):
 
         downsampleFactor = self.app.ui.astrometryDownsampling.value()
         radius = self.app.ui.astrometryRadius.value()
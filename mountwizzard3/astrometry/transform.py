@@ -20,57 +20,97 @@
 import logging
 import math
 import datetime
-import PyQt5
+import time
+import numpy
 from astropy import _erfa
 
 
 class Transform:
     logger = logging.getLogger(__name__)
 
+    # time in seconds a star independent astrometry context is used before it is recalculated
+    CONTEXT_VALIDITY = 60
+
     def __init__(self, app):
         self.app = app
         self.ERFA = _erfa
-        self.mutexERFA = PyQt5.QtCore.QMutex()
-        self.mutexTopocentric = PyQt5.QtCore.QMutex()
-        # if nothing is present, use the coordinates of greenwich
-        self.siteLat = 51.476852
-        self.siteLon = 0
-        self.siteHeight = 46
+        # there is only one transform instance in the app, which is shared by all threads. all state is replaced
+        # as a whole by simple reference assignment, so readers take a local copy and calculate without locking.
+        # if nothing is present, use the coordinates of greenwich (lat, lon, height)
+        self.site = (51.476852, 0, 46)
         # date of 01.05.2018
         self.julianDate = 2458240
+        # cached star independent parameters for the quick transformations
+        self.astrometryContext = None
         # connect data transfer
         self.app.signalMountSiteData.connect(self.setSiteData)
         self.app.signalJulianDate.connect(self.setJulianDate)
 
     def setSiteData(self, lat, lon, height):
-        self.siteLat = self.degStringToDecimal(lat)
-        self.siteLon = self.degStringToDecimal(lon)
-        self.siteHeight = float(height)
+        self.site = (self.degStringToDecimal(lat), self.degStringToDecimal(lon), float(height))
+        # new site means the observer dependent parameters are stale
+        self.astrometryContext = None
 
     def setJulianDate(self, jd):
         self.julianDate = jd
+        context = self.astrometryContext
+        if context is not None and context['Bucket'] != self.julianDateBucket(jd):
+            self.astrometryContext = None
+
+    def julianDateBucket(self, jd):
+        return int(jd * 86400 / self.CONTEXT_VALIDITY)
+
+    def getAstrometryContext(self, site, julianDate):
+        context = self.astrometryContext
+        if context is not None and context['Bucket'] == self.julianDateBucket(julianDate) and context['Site'] == site:
+            return context
+        siteLat, siteLon, siteHeight = site
+        ts = datetime.datetime.utcnow()
+        dut1_prev = self.ERFA.dat(ts.year, ts.month, ts.day, 0)
+        dut1 = 37 + 4023.0 / 125.0 - dut1_prev
+        tai1, tai2 = self.ERFA.utctai(julianDate, 0)
+        tt1, tt2 = self.ERFA.taitt(tai1, tai2)
+        context = dict()
+        context['Bucket'] = self.julianDateBucket(julianDate)
+        context['Site'] = site
+        context['DUT1'] = dut1
+        context['EO06a'] = self.ERFA.eo06a(tt1 + tt2, 0.0)
+        # geocentric parameters for CIRS <-> ICRS as used by atci13 / atic13
+        context['AstromCIRS'], context['EoCIRS'] = self.ERFA.apci13(julianDate, 0)
+        # observer dependent parameters for ICRS -> observed as used by atco13, earth rotation is refreshed per call
+        context['AstromObserved'], context['EoObserved'] = self.ERFA.apco13(julianDate,
+                                                                            0.0,
+                                                                            dut1,
+                                                                            siteLon * self.ERFA.DD2R,
+                                                                            siteLat * self.ERFA.DD2R,
+                                                                            siteHeight,
+                                                                            0.0,
+                                                                            0.0,
+                                                                            0.0,
+                                                                            0.0,
+                                                                            0.0,
+                                                                            0.0)
+        # a context is never changed after publishing, concurrent threads might calculate the same one twice
+        self.astrometryContext = context
+        return context
 
     def topocentricToAzAlt(self, ra, dec):
-        self.mutexTopocentric.lock()
-        ra = (ra * 360 / 24 + 360.0) % 360.0
-        dec = math.radians(dec)
-        ra = math.radians(ra)
-        lat = math.radians(self.siteLat)
-        alt = math.asin(math.sin(dec) * math.sin(lat) + math.cos(dec) * math.cos(lat) * math.cos(ra))
-        value = (math.sin(dec) - math.sin(alt) * math.sin(lat)) / (math.cos(alt) * math.cos(lat))
+        az, alt = self.topocentricToAzAltBatch(ra, dec)
+        return float(az), float(alt)
+
+    def topocentricToAzAltBatch(self, ra, dec):
+        # ra (hour angle) in hours and dec in degrees as scalar or array, all points are done in one go
+        lat = math.radians(self.site[0])
+        ra = (numpy.asarray(ra, dtype=float) * 360 / 24 + 360.0) % 360.0
+        dec = numpy.radians(numpy.asarray(dec, dtype=float))
+        ra = numpy.radians(ra)
+        alt = numpy.arcsin(numpy.sin(dec) * math.sin(lat) + numpy.cos(dec) * math.cos(lat) * numpy.cos(ra))
+        value = (numpy.sin(dec) - numpy.sin(alt) * math.sin(lat)) / (numpy.cos(alt) * math.cos(lat))
         # we have to check for rounding error, which could happen
-        if value > 1:
-            value = 1
-        elif value < -1:
-            value = -1
-        A = math.acos(value)
-        A = math.degrees(A)
-        alt = math.degrees(alt)
-        if math.sin(ra) >= 0.0:
-            az = 360.0 - A
-        else:
-            az = A
-        self.mutexTopocentric.unlock()
+        value = numpy.clip(value, -1, 1)
+        A = numpy.degrees(numpy.arccos(value))
+        alt = numpy.degrees(alt)
+        az = numpy.where(numpy.sin(ra) >= 0.0, 360.0 - A, A)
         return az, alt
 
     def degStringToDecimal(self, value, splitter=':'):
@@ -142,16 +182,71 @@ class Transform:
         return returnValue
 
     def transformERFA(self, ra, dec, transform=1):
-        self.mutexERFA.lock()
+        val1, val2 = self.transformERFABatch(ra, dec, transform)
+        return float(val1), float(val2)
+
+    def transformERFABatch(self, ra, dec, transform=1):
+        # ra in hours and dec in degrees as scalar or array, the ERFA functions are numpy ufuncs, so one call
+        # transforms all points. star independent parameters are taken from the cached astrometry context
+        ra = numpy.asarray(ra, dtype=float)
+        dec = numpy.asarray(dec, dtype=float)
+        site = self.site
+        julianDate = self.julianDate
+        context = self.getAstrometryContext(site, julianDate)
+
+        if transform == 1:  # J2000 to Topo Az /Alt
+            ra = ra % 24
+            # only the earth rotation angle has to follow the actual time
+            ut11, ut12 = self.ERFA.utcut1(julianDate, 0.0, context['DUT1'])
+            astrom = self.ERFA.aper13(ut11, ut12, context['AstromObserved'])
+            ri, di = self.ERFA.atciq(ra * self.ERFA.D2PI / 24,
+                                     dec * self.ERFA.D2PI / 360,
+                                     0.0,
+                                     0.0,
+                                     0.0,
+                                     0.0,
+                                     astrom)
+            aob, zob, hob, dob, rob = self.ERFA.atioq(ri, di, astrom)
+            val1 = aob * 360 / self.ERFA.D2PI
+            val2 = 90.0 - zob * 360 / self.ERFA.D2PI
+
+        elif transform == 2:                                                                                                # Topo to J2000
+            rc, dc = self.ERFA.aticq(self.ERFA.anp(ra * self.ERFA.D2PI / 24 + context['EO06a']),
+                                     dec * self.ERFA.D2PI / 360,
+                                     context['AstromCIRS'])
+            val1 = rc * 24.0 / self.ERFA.D2PI
+            val2 = dc * self.ERFA.DR2D
+
+        elif transform == 3:                                                                                                # J2000 to Topo
+            ri, di = self.ERFA.atciq(ra * self.ERFA.D2PI / 24,
+                                     dec * self.ERFA.D2PI / 360,
+                                     0,
+                                     0,
+                                     0,
+                                     0,
+                                     context['AstromCIRS'])
+            val1 = self.ERFA.anp(ri - context['EoCIRS']) * 24 / self.ERFA.D2PI
+            val2 = di * 360 / self.ERFA.D2PI
+        else:
+            val1 = ra
+            val2 = dec
+        return val1, val2
+
+    def transformERFABatchUncached(self, ra, dec, transform=1):
+        # reference path, which calculates all parameters on every call
+        ra = numpy.asarray(ra, dtype=float)
+        dec = numpy.asarray(dec, dtype=float)
+        siteLat, siteLon, siteHeight = self.site
+        julianDate = self.julianDate
         ts = datetime.datetime.utcnow()
         dut1_prev = self.ERFA.dat(ts.year, ts.month, ts.day, 0)
         dut1 = 37 + 4023.0 / 125.0 - dut1_prev
         # suc, tai1, tai2 = self.ERFA.eraUtctai(self.julianDate, 0)
-        tai1, tai2 = self.ERFA.utctai(self.julianDate, 0)
+        tai1, tai2 = self.ERFA.utctai(julianDate, 0)
         # tt1, tt2 = self.ERFA.eraTaitt(tai1, tai2)
         tt1, tt2 = self.ERFA.taitt(tai1, tai2)
         jdtt = tt1 + tt2
-        date1 = self.julianDate
+        date1 = julianDate
         date2 = 0
 
         if transform == 1:  # J2000 to Topo Az /Alt
@@ -165,9 +260,9 @@ class Transform:
                                                            date1 + date2,
                                                            0.0,
                                                            dut1,
-                                                           self.siteLon * self.ERFA.DD2R,
-                                                           self.siteLat * self.ERFA.DD2R,
-                                                           self.siteHeight,
+                                                           siteLon * self.ERFA.DD2R,
+                                                           siteLat * self.ERFA.DD2R,
+                                                           siteHeight,
                                                            0.0,
                                                            0.0,
                                                            0.0,
@@ -199,5 +294,52 @@ class Transform:
         else:
             val1 = ra
             val2 = dec
-        self.mutexERFA.unlock()
         return val1, val2
+
+    def benchmarkERFA(self, numberPoints=100, repeat=20):
+        # compares the cached quick transformations with the full calculation
+        ra = numpy.linspace(0, 24, numberPoints, endpoint=False)
+        dec = numpy.linspace(-30, 85, numberPoints)
+        result = dict()
+        for transform in [1, 2, 3]:
+            self.astrometryContext = None
+            timeStart = time.perf_counter()
+            for i in range(0, repeat):
+                val1Uncached, val2Uncached = self.transformERFABatchUncached(ra, dec, transform)
+            timeUncached = (time.perf_counter() - timeStart) / repeat
+            timeStart = time.perf_counter()
+            for i in range(0, repeat):
+                val1Cached, val2Cached = self.transformERFABatch(ra, dec, transform)
+            timeCached = (time.perf_counter() - timeStart) / repeat
+            timeStart = time.perf_counter()
+            for i in range(0, numberPoints):
+                self.transformERFA(ra[i], dec[i], transform)
+            timeScalar = time.perf_counter() - timeStart
+            # deviation in arcsec, ra values are converted from hours where necessary
+            factor = 1 if transform == 1 else 15
+            delta1 = numpy.abs((val1Cached - val1Uncached + 180 / factor) % (360 / factor) - 180 / factor) * factor * 3600
+            delta2 = numpy.abs(val2Cached - val2Uncached) * 3600
+            result[transform] = {'Uncached': timeUncached,
+                                 'Cached': timeCached,
+                                 'ScalarCached': timeScalar,
+                                 'MaxDeviation': float(max(numpy.max(delta1), numpy.max(delta2)))}
+            self.logger.info('ERFA benchmark transform {0} with {1} points: uncached {2:6.2f} ms, cached {3:6.2f} ms, '
+                             'scalar {4:6.2f} ms, max deviation {5:4.3f} arcsec'
+                             .format(transform, numberPoints, timeUncached * 1000, timeCached * 1000,
+                                     timeScalar * 1000, result[transform]['MaxDeviation']))
+        return result
+
+
+if __name__ == "__main__":
+    import PyQt5.QtCore
+
+    class BenchmarkApp(PyQt5.QtCore.QObject):
+        signalMountSiteData = PyQt5.QtCore.pyqtSignal([str, str, str])
+        signalJulianDate = PyQt5.QtCore.pyqtSignal(float)
+
+    logging.basicConfig(level=logging.INFO)
+    t = Transform(BenchmarkApp())
+    t.setSiteData('+48:00:00', '+11:00:00', '500')
+    t.setJulianDate(2458240.75)
+    for number in [1, 10, 100, 1000]:
+        t.benchmarkERFA(number)
@@ -0,0 +1,52 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+import logging
+import PyQt5
+
+
+class WorkerSignals(PyQt5.QtCore.QObject):
+
+    finished = PyQt5.QtCore.pyqtSignal()
+    error = PyQt5.QtCore.pyqtSignal(object)
+    result = PyQt5.QtCore.pyqtSignal(object)
+
+
+class Worker(PyQt5.QtCore.QRunnable):
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, fn, *args, **kwargs):
+        super(Worker, self).__init__()
+        # Store constructor arguments (re-used for processing)
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+
+    @PyQt5.QtCore.pyqtSlot()
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.error.emit(e)
+            self.logger.error('Worker {0} failed, error: {1}'.format(self.fn, e))
+        else:
+            self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
@@ -49,11 +49,11 @@ class INDIDome:
                 self.app.messageQueue.put('Timeout connect environment device\n')
                 break
             if self.app.workerINDI.domeDevice:
-                if 'CONNECTION' in self.app.workerINDI.data['Device'][self.app.workerINDI.domeDevice]:
+                if self.app.workerINDI.propertyStore.hasVector(self.app.workerINDI.domeDevice, 'CONNECTION'):
                     break
             time.sleep(0.1)
         if self.app.workerINDI.domeDevice != '':
-            if self.app.workerINDI.data['Device'][self.app.workerINDI.domeDevice]['CONNECTION']['CONNECT'] == 'Off':
+            if self.app.workerINDI.propertyStore.getValue(self.app.workerINDI.domeDevice, 'CONNECTION', 'CONNECT') == 'Off':
                 self.app.INDICommandQueue.put(indiXML.newSwitchVector([indiXML.oneSwitch('On', indi_attr={'name': 'CONNECT'})], indi_attr={'name': 'CONNECTION', 'device': self.app.workerINDI.domeDevice}))
 
     def slewToAzimuth(self, azimuth):
@@ -67,9 +67,9 @@ class INDIDome:
         else:
             self.application['Available'] = False
         self.app.sharedDomeDataLock.lockForWrite()
-        if self.app.workerINDI.domeDevice in self.app.workerINDI.data['Device']:
+        if self.app.workerINDI.propertyStore.hasDevice(self.app.workerINDI.domeDevice):
             self.application['Status'] = 'OK'
-            self.data['Connected'] = self.app.workerINDI.data['Device'][self.app.workerINDI.domeDevice]['CONNECTION']['CONNECT'] == 'On'
+            self.data['Connected'] = self.app.workerINDI.propertyStore.isConnected(self.app.workerINDI.domeDevice)
         else:
             self.data['Connected'] = False
             self.application['Status'] = 'ERROR'
@@ -79,14 +79,11 @@ class INDIDome:
         # check if client has device found
         if self.app.workerINDI.domeDevice != '':
             # and device is connected
-            if self.app.workerINDI.data['Device'][self.app.workerINDI.domeDevice]['CONNECTION']['CONNECT'] == 'On':
+            if self.app.workerINDI.propertyStore.isConnected(self.app.workerINDI.domeDevice):
                 # than get the data
                 self.app.sharedDomeDataLock.lockForWrite()
-                if 'DOME_ABSOLUTE_POSITION' in self.app.workerINDI.data['Device'][self.app.workerINDI.domeDevice]['ABS_DOME_POSITION']:
-                    self.data['Azimuth'] = float(self.app.workerINDI.data['Device'][self.app.workerINDI.domeDevice]['ABS_DOME_POSITION']['DOME_ABSOLUTE_POSITION'])
-                else:
-                    self.data['Azimuth'] = 0.0
-                if self.app.workerINDI.data['Device'][self.app.workerINDI.domeDevice]['DOME_MOTION']['state'] == 'Busy':
+                self.data['Azimuth'] = self.app.workerINDI.propertyStore.getValue(self.app.workerINDI.domeDevice, 'ABS_DOME_POSITION', 'DOME_ABSOLUTE_POSITION', 0.0)
+                if self.app.workerINDI.propertyStore.getState(self.app.workerINDI.domeDevice, 'DOME_MOTION') == 'Busy':
                     self.data['Slewing'] = True
                 else:
                     if self.data['Slewing']:
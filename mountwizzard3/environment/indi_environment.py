@@ -35,6 +35,9 @@ class INDIEnvironment:
         self.application['Available'] = False
         self.application['Name'] = 'INDI Environment'
         self.application['Status'] = ''
+        # versions of the last read vectors in property store
+        self.versionWeather = None
+        self.versionSkyQuality = None
 
     def start(self):
         self.connect()
@@ -49,11 +52,11 @@ class INDIEnvironment:
                 self.app.messageQueue.put('Timeout connect environment device\n')
                 break
             if self.app.workerINDI.environmentDevice:
-                if 'CONNECTION' in self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]:
+                if self.app.workerINDI.propertyStore.hasVector(self.app.workerINDI.environmentDevice, 'CONNECTION'):
                     break
             time.sleep(0.1)
         if self.app.workerINDI.environmentDevice != '':
-            if self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]['CONNECTION']['CONNECT'] == 'Off':
+            if self.app.workerINDI.propertyStore.getValue(self.app.workerINDI.environmentDevice, 'CONNECTION', 'CONNECT') == 'Off':
                 self.app.INDICommandQueue.put(indiXML.newSwitchVector([indiXML.oneSwitch('On', indi_attr={'name': 'CONNECT'})], indi_attr={'name': 'CONNECTION', 'device': self.app.workerINDI.environmentDevice}))
 
     def getStatus(self):
@@ -62,9 +65,9 @@ class INDIEnvironment:
         else:
             self.application['Available'] = False
         self.app.sharedEnvironmentDataLock.lockForWrite()
-        if self.app.workerINDI.environmentDevice in self.app.workerINDI.data['Device']:
+        if self.app.workerINDI.propertyStore.hasDevice(self.app.workerINDI.environmentDevice):
             self.application['Status'] = 'OK'
-            self.data['Connected'] = self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]['CONNECTION']['CONNECT'] == 'On'
+            self.data['Connected'] = self.app.workerINDI.propertyStore.isConnected(self.app.workerINDI.environmentDevice)
         else:
             self.data['Connected'] = False
             self.application['Status'] = 'ERROR'
@@ -74,34 +77,28 @@ class INDIEnvironment:
         # check if client has device found
         if self.app.workerINDI.environmentDevice != '':
             # and device is connected
-            if self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]['CONNECTION']['CONNECT'] == 'On':
-                # than get the data
-                self.app.sharedEnvironmentDataLock.lockForWrite()
-                if 'WEATHER_DEWPOINT' in self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]['WEATHER_PARAMETERS']:
-                    self.data['DewPoint'] = float(self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]['WEATHER_PARAMETERS']['WEATHER_DEWPOINT'])
-                else:
-                    self.data['DewPoint'] = 0
-                if 'WEATHER_TEMPERATURE' in self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]['WEATHER_PARAMETERS']:
-                    self.data['Temperature'] = float(self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]['WEATHER_PARAMETERS']['WEATHER_TEMPERATURE'])
-                else:
-                    self.data['Temperature'] = 0
-                if 'WEATHER_HUMIDITY' in self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]['WEATHER_PARAMETERS']:
-                    self.data['Humidity'] = float(self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]['WEATHER_PARAMETERS']['WEATHER_HUMIDITY'])
-                else:
-                    self.data['Humidity'] = 0
-                if 'WEATHER_BAROMETER' in self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]['WEATHER_PARAMETERS']:
-                    self.data['Pressure'] = float(self.app.workerINDI.data['Device'][self.app.workerINDI.environmentDevice]['WEATHER_PARAMETERS']['WEATHER_BAROMETER'])
-                else:
-                    self.data['Pressure'] = 0
-                self.app.sharedEnvironmentDataLock.unlock()
+            if self.app.workerINDI.propertyStore.isConnected(self.app.workerINDI.environmentDevice):
+                # than get the data, but only if something has changed
+                version = (self.app.workerINDI.environmentDevice,
+                           self.app.workerINDI.propertyStore.getVersion(self.app.workerINDI.environmentDevice, 'WEATHER_PARAMETERS'))
+                if version != self.versionWeather:
+                    self.versionWeather = version
+                    weather = self.app.workerINDI.propertyStore.getValues(self.app.workerINDI.environmentDevice, 'WEATHER_PARAMETERS')
+                    self.app.sharedEnvironmentDataLock.lockForWrite()
+                    self.data['DewPoint'] = weather.get('WEATHER_DEWPOINT', 0)
+                    self.data['Temperature'] = weather.get('WEATHER_TEMPERATURE', 0)
+                    self.data['Humidity'] = weather.get('WEATHER_HUMIDITY', 0)
+                    self.data['Pressure'] = weather.get('WEATHER_BAROMETER', 0)
+                    self.app.sharedEnvironmentDataLock.unlock()
 
         # check if client has device SQM found
         if self.app.workerINDI.auxDevice != '':
-            if self.app.workerINDI.data['Device'][self.app.workerINDI.auxDevice]['CONNECTION']['CONNECT'] == 'On':
-                # than get the data
-                self.app.sharedEnvironmentDataLock.lockForWrite()
-                if 'SKY_BRIGHTNESS' in self.app.workerINDI.data['Device'][self.app.workerINDI.auxDevice]['SKY_QUALITY']:
-                    self.data['SQR'] = float(self.app.workerINDI.data['Device'][self.app.workerINDI.auxDevice]['SKY_QUALITY']['SKY_BRIGHTNESS'])
-                else:
-                    self.data['SQR'] = 0
-                self.app.sharedEnvironmentDataLock.unlock()
+            if self.app.workerINDI.propertyStore.isConnected(self.app.workerINDI.auxDevice):
+                version = (self.app.workerINDI.auxDevice,
+                           self.app.workerINDI.propertyStore.getVersion(self.app.workerINDI.auxDevice, 'SKY_QUALITY'))
+                if version != self.versionSkyQuality:
+                    self.versionSkyQuality = version
+                    # than get the data
+                    self.app.sharedEnvironmentDataLock.lockForWrite()
+                    self.data['SQR'] = self.app.workerINDI.propertyStore.getValue(self.app.workerINDI.auxDevice, 'SKY_QUALITY', 'SKY_BRIGHTNESS', 0)
+                    self.app.sharedEnvironmentDataLock.unlock()
@@ -1505,6 +1505,12 @@ class Ui_MainWindow(object):
         font.setPointSize(10)
         self.checkSortPoints.setFont(font)
         self.checkSortPoints.setObjectName("checkSortPoints")
+        self.checkOptimizeSlewPath = QtWidgets.QCheckBox(self.tab)
+        self.checkOptimizeSlewPath.setGeometry(QtCore.QRect(420, 285, 211, 20))
+        font = QtGui.QFont()
+        font.setPointSize(10)
+        self.checkOptimizeSlewPath.setFont(font)
+        self.checkOptimizeSlewPath.setObjectName("checkOptimizeSlewPath")
         self.checkDeletePointsHorizonMask = QtWidgets.QCheckBox(self.tab)
         self.checkDeletePointsHorizonMask.setGeometry(QtCore.QRect(420, 230, 211, 20))
         font = QtGui.QFont()
@@ -1918,6 +1924,26 @@ class Ui_MainWindow(object):
         self.checkUseBlindSolving.setLayoutDirection(QtCore.Qt.LeftToRight)
         self.checkUseBlindSolving.setChecked(False)
         self.checkUseBlindSolving.setObjectName("checkUseBlindSolving")
+        self.label_266 = QtWidgets.QLabel(self.tab)
+        self.label_266.setGeometry(QtCore.QRect(20, 438, 201, 21))
+        font = QtGui.QFont()
+        font.setPointSize(10)
+        self.label_266.setFont(font)
+        self.label_266.setObjectName("label_266")
+        self.astrometryWorkers = QtWidgets.QDoubleSpinBox(self.tab)
+        self.astrometryWorkers.setGeometry(QtCore.QRect(255, 438, 71, 21))
+        font = QtGui.QFont()
+        font.setFamily("Arial")
+        font.setBold(False)
+        font.setWeight(50)
+        self.astrometryWorkers.setFont(font)
+        self.astrometryWorkers.setAlignment(QtCore.Qt.AlignRight|QtCore.Qt.AlignTrailing|QtCore.Qt.AlignVCenter)
+        self.astrometryWorkers.setDecimals(0)
+        self.astrometryWorkers.setMinimum(1.0)
+        self.astrometryWorkers.setMaximum(3.0)
+        self.astrometryWorkers.setSingleStep(1.0)
+        self.astrometryWorkers.setProperty("value", 2.0)
+        self.astrometryWorkers.setObjectName("astrometryWorkers")
         self.mainTabWidget.addTab(self.tab, "")
         self.tab_15 = QtWidgets.QWidget()
         self.tab_15.setObjectName("tab_15")
@@ -5639,7 +5665,8 @@ class Ui_MainWindow(object):
         MainWindow.setTabOrder(self.checkUseMinimumHorizonLine, self.altitudeMinimumHorizon)
         MainWindow.setTabOrder(self.altitudeMinimumHorizon, self.checkDeletePointsHorizonMask)
         MainWindow.setTabOrder(self.checkDeletePointsHorizonMask, self.checkSortPoints)
-        MainWindow.setTabOrder(self.checkSortPoints, self.btn_loadAnalyseData)
+        MainWindow.setTabOrder(self.checkSortPoints, self.checkOptimizeSlewPath)
+        MainWindow.setTabOrder(self.checkOptimizeSlewPath, self.btn_loadAnalyseData)
         MainWindow.setTabOrder(self.btn_loadAnalyseData, self.btn_showInitialModelPoints)
         MainWindow.setTabOrder(self.btn_showInitialModelPoints, self.btn_loadInitialModelPoints)
         MainWindow.setTabOrder(self.btn_loadInitialModelPoints, self.btn_saveInitialModelPoints)
@@ -5971,6 +5998,8 @@ class Ui_MainWindow(object):
         self.mainTabWidget.setTabText(self.mainTabWidget.indexOf(self.tab_4), _translate("MainWindow", "Site Data"))
         self.checkSortPoints.setToolTip(_translate("MainWindow", "<html><head/><body><p>Sorts the modeling points EAST / WEST side of pier.</p></body></html>"))
         self.checkSortPoints.setText(_translate("MainWindow", "Auto sort points East / West"))
+        self.checkOptimizeSlewPath.setToolTip(_translate("MainWindow", "<html><head/><body><p>Sorts the modeling points for minimum slew time of mount and dome instead of EAST / WEST.</p></body></html>"))
+        self.checkOptimizeSlewPath.setText(_translate("MainWindow", "Optimize slew path"))
         self.checkDeletePointsHorizonMask.setToolTip(_translate("MainWindow", "<html><head/><body><p>Removes modeling points, which are below the horizon mask.</p></body></html>"))
         self.checkDeletePointsHorizonMask.setText(_translate("MainWindow", "Auto delete points below horizon"))
         self.label_122.setText(_translate("MainWindow", "deg"))
@@ -6025,6 +6054,8 @@ class Ui_MainWindow(object):
         self.label_222.setText(_translate("MainWindow", "deg"))
         self.checkUseBlindSolving.setToolTip(_translate("MainWindow", "<html><head/><body><p>Checked if you would like to enable blind solver function in SGPro</p></body></html>"))
         self.checkUseBlindSolving.setText(_translate("MainWindow", "Use blind solving (SGPro)"))
+        self.label_266.setText(_translate("MainWindow", "Parallel solves (astrometry.net)"))
+        self.astrometryWorkers.setToolTip(_translate("MainWindow", "<html><head/><body><p>Number of images solved at the same time during modeling. Only used for astrometry.net, other solvers handle one image at a time.</p></body></html>"))
         self.mainTabWidget.setTabText(self.mainTabWidget.indexOf(self.tab), _translate("MainWindow", "Config Model Build"))
         self.label_116.setText(_translate("MainWindow", "Generate Initial Points"))
         self.label_171.setText(_translate("MainWindow", "Azimuth"))
@@ -0,0 +1,119 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+import logging
+import math
+import numpy
+
+
+class ImageStatistics:
+    logger = logging.getLogger(__name__)
+
+    # maximum number of histogram bins. integer images with a smaller range of values get one bin per value,
+    # so their percentiles are exact
+    MAX_BINS = 65536
+    # tile borders in sixteenths of the image size, the zoom crops of the image window are unions of tiles
+    TILE_BORDERS = [0, 4, 6, 7, 9, 10, 12, 16]
+
+    def __init__(self, image):
+        # histograms of all tiles are calculated in one pass over the image
+        self.image = image
+        self.shape = image.shape
+        self.isInteger = numpy.issubdtype(image.dtype, numpy.integer)
+        finite = image if self.isInteger else image[numpy.isfinite(image)]
+        if finite.size > 0:
+            self.minimum = float(finite.min())
+            self.maximum = float(finite.max())
+        else:
+            self.minimum = 0.0
+            self.maximum = 0.0
+        self.exact = self.isInteger and self.maximum - self.minimum < self.MAX_BINS
+        if self.exact:
+            self.bins = int(self.maximum - self.minimum) + 1
+            self.width = 1.0
+        else:
+            self.bins = self.MAX_BINS
+            self.width = (self.maximum - self.minimum) / self.bins
+        self.rows = [int(self.shape[0] * i / 16) for i in self.TILE_BORDERS]
+        self.columns = [int(self.shape[1] * i / 16) for i in self.TILE_BORDERS]
+        # counts of a tile fit into 32 bit, this halves the memory of the histograms
+        self.tiles = numpy.zeros((len(self.rows) - 1, len(self.columns) - 1, self.bins), dtype=numpy.uint32)
+        for i in range(0, len(self.rows) - 1):
+            for j in range(0, len(self.columns) - 1):
+                self.tiles[i, j] = self.histogram(self.rows[i], self.rows[i + 1], self.columns[j], self.columns[j + 1])
+
+    def histogram(self, minx, maxx, miny, maxy):
+        # histogram of a region directly from the pixels
+        data = self.image[minx:maxx, miny:maxy].ravel()
+        if not self.isInteger:
+            data = data[numpy.isfinite(data)]
+        if data.size == 0:
+            return numpy.zeros(self.bins, dtype=numpy.int64)
+        if self.exact:
+            index = data.astype(numpy.int64) - int(self.minimum)
+        elif self.width > 0:
+            index = numpy.minimum(((data - self.minimum) / self.width).astype(numpy.int64), self.bins - 1)
+        else:
+            index = numpy.zeros(data.size, dtype=numpy.int64)
+        return numpy.bincount(index, minlength=self.bins)
+
+    def regionHistogram(self, minx, maxx, miny, maxy):
+        # all tiles inside the region are summed up, only the pixels at the border are binned again
+        inRows = [i for i in range(0, len(self.rows) - 1) if self.rows[i] >= minx and self.rows[i + 1] <= maxx]
+        inColumns = [j for j in range(0, len(self.columns) - 1) if self.columns[j] >= miny and self.columns[j + 1] <= maxy]
+        if not inRows or not inColumns:
+            return self.histogram(minx, maxx, miny, maxy)
+        tileMinx = self.rows[inRows[0]]
+        tileMaxx = self.rows[inRows[-1] + 1]
+        tileMiny = self.columns[inColumns[0]]
+        tileMaxy = self.columns[inColumns[-1] + 1]
+        histogram = self.tiles[inRows[0]:inRows[-1] + 1, inColumns[0]:inColumns[-1] + 1].sum(axis=(0, 1), dtype=numpy.int64)
+        histogram += self.histogram(minx, tileMinx, miny, maxy)
+        histogram += self.histogram(tileMaxx, maxx, miny, maxy)
+        histogram += self.histogram(tileMinx, tileMaxx, miny, tileMiny)
+        histogram += self.histogram(tileMinx, tileMaxx, tileMaxy, maxy)
+        return histogram
+
+    def orderValue(self, cumulative, histogram, rank):
+        # value of the element with the given rank in the sorted pixels
+        index = int(numpy.searchsorted(cumulative, rank, side='right'))
+        if self.exact:
+            return self.minimum + index
+        # inside a bin the values are taken as evenly distributed
+        position = (rank - (cumulative[index] - histogram[index]) + 0.5) / histogram[index]
+        return self.minimum + (index + position) * self.width
+
+    def limits(self, lowerPercentile, upperPercentile, region=None):
+        # same percentiles like numpy.percentile with linear interpolation, answered from the histogram
+        if region is None:
+            region = (0, self.shape[0], 0, self.shape[1])
+        histogram = self.regionHistogram(*region)
+        cumulative = numpy.cumsum(histogram)
+        number = int(cumulative[-1]) if len(cumulative) > 0 else 0
+        if number == 0:
+            return self.minimum, self.maximum
+        values = list()
+        for percentile in [lowerPercentile, upperPercentile]:
+            rank = percentile / 100 * (number - 1)
+            lower = int(math.floor(rank))
+            value = self.orderValue(cumulative, histogram, lower)
+            if rank > lower:
+                value += (rank - lower) * (self.orderValue(cumulative, histogram, lower + 1) - value)
+            values.append(value)
+        return values[0], values[1]
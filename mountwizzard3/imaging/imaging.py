@@ -25,7 +25,6 @@ import PyQt5
 import queue
 import copy
 import astropy.io.fits as pyfits
-from astrometry import transform
 from imaging import none_camera
 from imaging import indi_camera
 if platform.system() == 'Windows':
@@ -73,7 +72,7 @@ class Imaging(PyQt5.QtCore.QObject):
         self.data['CONNECTION'] = {'CONNECT': 'Off'}
 
         # external classes
-        self.transform = transform.Transform(self.app)
+        self.transform = self.app.transform
         if platform.system() == 'Windows':
             self.SGPro = sgpro_camera.SGPro(self, self.app, self.data)
             self.MaximDL = maximdl_camera.MaximDL(self, self.app, self.data)
@@ -121,6 +120,8 @@ class Imaging(PyQt5.QtCore.QObject):
         self.cameraHandler.mutexCancel.lock()
         self.cameraHandler.cancel = True
         self.cameraHandler.mutexCancel.unlock()
+        # INDI camera waits for events, so it has to be woken up
+        self.INDICamera.wakeUp()
 
     def chooseImaging(self):
         self.mutexChooser.lock()
@@ -223,18 +224,19 @@ class Imaging(PyQt5.QtCore.QObject):
             imageParams['Speed'] = 'HiSpeed'
         else:
             imageParams['Speed'] = 'Normal'
-        # setting mount conditions for the taken image
-        if 'RaJ2000' not in self.app.workerMountDispatcher.data:
+        # setting mount conditions for the taken image, all values from the same state of the mount
+        mountData = self.app.workerMountDispatcher.getSnapshot()
+        if 'RaJ2000' not in mountData:
             return
-        imageParams['LocalSiderealTime'] = copy.copy(self.app.workerMountDispatcher.data['LocalSiderealTime'])
-        imageParams['LocalSiderealTimeFloat'] = self.transform.degStringToDecimal(self.app.workerMountDispatcher.data['LocalSiderealTime'][0:9])
-        imageParams['RaJ2000'] = copy.copy(self.app.workerMountDispatcher.data['RaJ2000'])
-        imageParams['DecJ2000'] = copy.copy(self.app.workerMountDispatcher.data['DecJ2000'])
-        imageParams['RaJNow'] = copy.copy(self.app.workerMountDispatcher.data['RaJNow'])
-        imageParams['DecJNow'] = copy.copy(self.app.workerMountDispatcher.data['DecJNow'])
-        imageParams['Pierside'] = copy.copy(self.app.workerMountDispatcher.data['Pierside'])
-        imageParams['RefractionTemperature'] = copy.copy(self.app.workerMountDispatcher.data['RefractionTemperature'])
-        imageParams['RefractionPressure'] = copy.copy(self.app.workerMountDispatcher.data['RefractionPressure'])
+        imageParams['LocalSiderealTime'] = copy.copy(mountData['LocalSiderealTime'])
+        imageParams['LocalSiderealTimeFloat'] = self.transform.degStringToDecimal(mountData['LocalSiderealTime'][0:9])
+        imageParams['RaJ2000'] = copy.copy(mountData['RaJ2000'])
+        imageParams['DecJ2000'] = copy.copy(mountData['DecJ2000'])
+        imageParams['RaJNow'] = copy.copy(mountData['RaJNow'])
+        imageParams['DecJNow'] = copy.copy(mountData['DecJNow'])
+        imageParams['Pierside'] = copy.copy(mountData['Pierside'])
+        imageParams['RefractionTemperature'] = copy.copy(mountData['RefractionTemperature'])
+        imageParams['RefractionPressure'] = copy.copy(mountData['RefractionPressure'])
         self.logger.info('Params before imaging: {0}'.format(imageParams))
         # now we take the picture
         self.cameraHandler.getImage(imageParams)
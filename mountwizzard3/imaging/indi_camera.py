@@ -26,7 +26,7 @@ import indi.indi_xml as indiXML
 class INDICamera:
     logger = logging.getLogger(__name__)
 
-    # timeout for getting an download is 30 seconds
+    # timeout for getting an download is 30 seconds, integration may last exposure time + start timeout
     MAX_DOWNLOAD_TIMEOUT = 30
     START_CAMERA_TIMEOUT = 3
 
@@ -37,7 +37,12 @@ class INDICamera:
         self.data = data
         self.cancel = False
         self.mutexCancel = PyQt5.QtCore.QMutex()
-        self.mutexReceived = PyQt5.QtCore.QMutex()
+        # state machine for imaging: IDLE, START, INTEGRATE, DOWNLOAD, SAVING
+        self.state = 'IDLE'
+        self.stateChanged = 0
+        self.exposureTime = 0
+        self.mutexState = PyQt5.QtCore.QMutex()
+        self.waitState = PyQt5.QtCore.QWaitCondition()
 
         self.application = dict()
         self.application['Available'] = False
@@ -48,6 +53,7 @@ class INDICamera:
 
         self.counter = 0
         self.receivedImage = True
+        self.imageFailed = False
 
         self.application['Status'] = ''
         self.application['CONNECTION'] = {'CONNECT': 'Off'}
@@ -55,7 +61,8 @@ class INDICamera:
         self.application['Name'] = 'INDICamera'
         self.application['InstallPath'] = ''
 
-        self.app.workerINDI.receivedImage.connect(self.setReceivedImage)
+        self.app.workerINDI.receivedImage.connect(self.setReceivedImage, type=PyQt5.QtCore.Qt.DirectConnection)
+        self.app.workerINDI.propertyChanged.connect(self.handlePropertyChanged, type=PyQt5.QtCore.Qt.DirectConnection)
 
     def start(self):
         # connect the camera if not present
@@ -65,7 +72,7 @@ class INDICamera:
                 self.app.messageQueue.put('Timeout connect camera\n')
                 break
             if self.app.workerINDI.cameraDevice:
-                if 'CONNECTION' in self.app.workerINDI.data['Device'][self.app.workerINDI.cameraDevice]:
+                if self.app.workerINDI.propertyStore.hasVector(self.app.workerINDI.cameraDevice, 'CONNECTION'):
                     # Enable BLOB mode it also enables listen to send images
                     self.app.INDICommandQueue.put(indiXML.enableBLOB('Also', indi_attr={'device': self.app.workerINDI.cameraDevice}))
                     break
@@ -76,12 +83,17 @@ class INDICamera:
         pass
 
     def setReceivedImage(self, status):
-        self.mutexReceived.lock()
+        self.mutexState.lock()
         if status:
             self.receivedImage = True
+            if self.state == 'SAVING':
+                self.state = 'IDLE'
+                self.waitState.wakeAll()
         else:
             self.receivedImage = False
-        self.mutexReceived.unlock()
+            if self.state in ['DOWNLOAD', 'SAVING']:
+                self.failImage('Image could not be received from INDI server')
+        self.mutexState.unlock()
 
     def getStatus(self):
         # check if INDIClient is running and camera device is there
@@ -91,8 +103,8 @@ class INDICamera:
                 self.application['Status'] = 'OK'
                 self.application['Name'] = self.app.workerINDI.cameraDevice
                 # check if data from INDI server already received
-                if 'CONNECTION' in self.app.workerINDI.data['Device'][self.app.workerINDI.cameraDevice]:
-                    self.data['CONNECTION']['CONNECT'] = self.app.workerINDI.data['Device'][self.app.workerINDI.cameraDevice]['CONNECTION']['CONNECT']
+                if self.app.workerINDI.propertyStore.hasVector(self.app.workerINDI.cameraDevice, 'CONNECTION'):
+                    self.data['CONNECTION']['CONNECT'] = self.app.workerINDI.propertyStore.getValue(self.app.workerINDI.cameraDevice, 'CONNECTION', 'CONNECT')
                 else:
                     self.logger.error('Unknown camera status')
             else:
@@ -104,8 +116,8 @@ class INDICamera:
         self.data['Gain'] = 'High'
         self.data['Speed'] = 'High'
         self.data['CCD_INFO'] = {}
-        self.data['CCD_INFO']['CCD_MAX_X'] = self.app.workerINDI.data['Device'][self.app.workerINDI.cameraDevice]['CCD_INFO']['CCD_MAX_X']
-        self.data['CCD_INFO']['CCD_MAX_Y'] = self.app.workerINDI.data['Device'][self.app.workerINDI.cameraDevice]['CCD_INFO']['CCD_MAX_Y']
+        self.data['CCD_INFO']['CCD_MAX_X'] = self.app.workerINDI.propertyStore.getValue(self.app.workerINDI.cameraDevice, 'CCD_INFO', 'CCD_MAX_X')
+        self.data['CCD_INFO']['CCD_MAX_Y'] = self.app.workerINDI.propertyStore.getValue(self.app.workerINDI.cameraDevice, 'CCD_INFO', 'CCD_MAX_Y')
 
     def getImage(self, imageParams):
         if self.application['Status'] != 'OK':
@@ -123,8 +135,15 @@ class INDICamera:
         # setting image path in INDI client to know where to store the image
         self.app.workerINDI.imagePath = imagePath
 
-        cam = self.app.workerINDI.data['Device'][self.app.workerINDI.cameraDevice]
-        if self.app.workerINDI.cameraDevice != '' and cam['CONNECTION']['CONNECT'] == 'On':
+        # arm the state machine before the exposure is requested, so no event is missed
+        self.mutexState.lock()
+        self.receivedImage = False
+        self.imageFailed = False
+        self.exposureTime = exposure
+        self.changeState('START')
+        self.mutexState.unlock()
+
+        if self.app.workerINDI.propertyStore.isConnected(self.app.workerINDI.cameraDevice):
             # Enable BLOB mode.
             self.app.INDICommandQueue.put(indiXML.enableBLOB('Also', indi_attr={'device': self.app.workerINDI.cameraDevice}))
             # set to raw - no compression mode
@@ -156,81 +175,106 @@ class INDICamera:
             self.cancel = True
             self.mutexCancel.unlock()
 
-        self.mutexReceived.lock()
-        self.receivedImage = False
-        self.mutexReceived.unlock()
-
-        # waiting for start integrating
-        self.main.cameraStatusText.emit('START')
-        while not self.cancel:
-            if 'CONNECTION' and 'CCD_EXPOSURE' in cam:
-                if cam['CONNECTION']['CONNECT'] == 'On':
-                    if cam['CCD_EXPOSURE']['state'] in ['Busy']:
-                        break
-                else:
-                    self.main.cameraStatusText.emit('DISCONN')
-            else:
-                self.main.cameraStatusText.emit('ERROR')
-            time.sleep(0.1)
-
-        # loop for integrating
-        self.main.cameraStatusText.emit('INTEGRATE')
-        while not self.cancel:
-            if 'CONNECTION' and 'CCD_EXPOSURE' in cam:
-                if cam['CONNECTION']['CONNECT'] == 'On':
-                    if not float(cam['CCD_EXPOSURE']['CCD_EXPOSURE_VALUE']):
-                        break
-                else:
-                    self.main.cameraStatusText.emit('DISCONN')
-            else:
-                self.main.cameraStatusText.emit('ERROR')
-            if 'CCD_EXPOSURE' in cam:
-                self.main.cameraExposureTime.emit('{0:02.0f}'.format(float(cam['CCD_EXPOSURE']['CCD_EXPOSURE_VALUE'])))
-            else:
-                self.main.cameraExposureTime.emit('')
-            time.sleep(0.1)
-
-        # loop for download
-        self.main.imageIntegrated.emit()
-        self.main.cameraStatusText.emit('DOWNLOAD')
-        while not self.cancel:
-            if 'CCD_EXPOSURE' in cam:
-                if cam['CONNECTION']['CONNECT'] == 'On':
-                    if cam['CCD_EXPOSURE']['state'] in ['Ok', 'Idle']:
-                        break
-                    elif cam['CCD_EXPOSURE']['state'] == 'Error':
-                        self.main.cameraStatusText.emit('ERROR')
-                else:
-                    self.main.cameraStatusText.emit('DISCONN')
-            else:
-                self.main.cameraStatusText.emit('ERROR')
-            if 'CCD_EXPOSURE' in cam:
-                self.main.cameraExposureTime.emit('{0:02.0f}'.format(float(cam['CCD_EXPOSURE']['CCD_EXPOSURE_VALUE'])))
-            else:
-                self.main.cameraExposureTime.emit('')
-            time.sleep(0.1)
-
-        # loop for saving
-        self.main.imageDownloaded.emit()
-        self.main.cameraStatusText.emit('SAVING')
-        while not self.cancel:
-            if self.receivedImage:
+        self.mutexState.lock()
+        # the state machine is driven by property events of the INDI client, here we only wait for them
+        while not self.cancel and self.state != 'IDLE':
+            timeout = self.stateTimeout() - (time.time() - self.stateChanged)
+            if timeout <= 0 or not self.waitState.wait(self.mutexState, int(timeout * 1000)):
+                if self.cancel or self.state == 'IDLE':
+                    break
+                self.logger.warning('Timeout in state {0}'.format(self.state))
+                self.app.messageQueue.put('#BRTimeout INDI camera in state {0}\n'.format(self.state))
                 break
-            time.sleep(0.1)
+        self.state = 'IDLE'
+        self.mutexState.unlock()
 
         # finally idle
         self.main.cameraStatusText.emit('IDLE')
         self.main.cameraExposureTime.emit('')
-        imageParams['Imagepath'] = self.app.workerINDI.imagePath
+        if self.imageFailed:
+            imageParams['Imagepath'] = ''
+        else:
+            imageParams['Imagepath'] = self.app.workerINDI.imagePath
         self.app.workerINDI.imagePath = ''
 
+    def stateTimeout(self):
+        if self.state == 'START':
+            return self.START_CAMERA_TIMEOUT
+        elif self.state == 'INTEGRATE':
+            return self.exposureTime + self.START_CAMERA_TIMEOUT
+        else:
+            return self.MAX_DOWNLOAD_TIMEOUT
+
+    def changeState(self, state):
+        # has to be called with mutexState locked
+        self.state = state
+        self.stateChanged = time.time()
+        if state == 'INTEGRATE':
+            self.main.cameraStatusText.emit('INTEGRATE')
+        elif state == 'DOWNLOAD':
+            self.main.imageIntegrated.emit()
+            self.main.cameraStatusText.emit('DOWNLOAD')
+        elif state == 'SAVING':
+            self.main.imageDownloaded.emit()
+            self.main.cameraStatusText.emit('SAVING')
+            # image might already be stored before the exposure vector reports ok
+            if self.receivedImage:
+                self.state = 'IDLE'
+        else:
+            self.main.cameraStatusText.emit(state)
+        self.waitState.wakeAll()
+
+    def failImage(self, message):
+        # has to be called with mutexState locked, the waiting imaging thread returns immediately
+        self.logger.error(message)
+        self.app.messageQueue.put('#BR{0}\n'.format(message))
+        self.main.cameraStatusText.emit('ERROR')
+        self.imageFailed = True
+        self.state = 'IDLE'
+        self.waitState.wakeAll()
+
+    def wakeUp(self):
+        # used for cancel to stop waiting immediately
+        self.mutexState.lock()
+        self.waitState.wakeAll()
+        self.mutexState.unlock()
+
+    def handlePropertyChanged(self, device, vector, values):
+        # called from INDI client thread for each vector update
+        if device != self.app.workerINDI.cameraDevice:
+            return
+        self.mutexState.lock()
+        if self.state in ['IDLE', 'SAVING']:
+            pass
+        elif vector == 'CONNECTION':
+            if values.get('CONNECT') != 'On':
+                self.main.cameraStatusText.emit('DISCONN')
+        elif vector == 'CCD_EXPOSURE':
+            exposureState = values.get('state', '')
+            try:
+                exposureValue = float(values.get('CCD_EXPOSURE_VALUE', 0))
+            except ValueError:
+                exposureValue = 0
+            if exposureState == 'Error':
+                self.failImage('INDI camera reported error in state {0}'.format(self.state))
+            if self.state == 'START' and exposureState == 'Busy':
+                self.changeState('INTEGRATE')
+            if self.state == 'INTEGRATE':
+                self.main.cameraExposureTime.emit('{0:02.0f}'.format(exposureValue))
+                if not exposureValue:
+                    self.changeState('DOWNLOAD')
+            if self.state == 'DOWNLOAD':
+                if exposureState in ['Ok', 'Idle']:
+                    self.changeState('SAVING')
+        self.mutexState.unlock()
+
     def connect(self):
         # connect the camera
         if self.app.workerINDI.cameraDevice != '':
-            if self.app.workerINDI.data['Device'][self.app.workerINDI.cameraDevice]['CONNECTION']['CONNECT'] == 'Off':
+            if self.app.workerINDI.propertyStore.getValue(self.app.workerINDI.cameraDevice, 'CONNECTION', 'CONNECT') == 'Off':
                 self.app.INDICommandQueue.put(indiXML.newSwitchVector([indiXML.oneSwitch('On', indi_attr={'name': 'CONNECT'})], indi_attr={'name': 'CONNECTION', 'device': self.app.workerINDI.cameraDevice}))
 
     def disconnect(self):
         if self.app.workerINDI.cameraDevice != '':
-            if self.app.workerINDI.data['Device'][self.app.workerINDI.cameraDevice]['CONNECTION']['CONNECT'] == 'On':
+            if self.app.workerINDI.propertyStore.isConnected(self.app.workerINDI.cameraDevice):
                 self.app.INDICommandQueue.put(indiXML.newSwitchVector([indiXML.oneSwitch('Off', indi_attr={'name': 'CONNECT'})], indi_attr={'name': 'CONNECTION', 'device': self.app.workerINDI.cameraDevice}))
@@ -22,11 +22,14 @@ import time
 import zlib
 import queue
 import os
-from xml.etree import ElementTree
+import shutil
+from collections import deque
 import PyQt5
 import indi.indi_xml as indiXML
+import indi.indi_properties as indiProperties
 import astropy.io.fits as pyfits
 from baseclasses import checkIP
+from baseclasses import worker
 
 
 class INDIClient(PyQt5.QtCore.QObject):
@@ -37,6 +40,8 @@ class INDIClient(PyQt5.QtCore.QObject):
     statusDome = PyQt5.QtCore.pyqtSignal(bool)
     receivedImage = PyQt5.QtCore.pyqtSignal(bool)
     processMessage = PyQt5.QtCore.pyqtSignal(object)
+    # device, vector name and a copy of the vector content after each update
+    propertyChanged = PyQt5.QtCore.pyqtSignal(str, str, object)
 
     signalDestruct = PyQt5.QtCore.pyqtSignal()
 
@@ -58,11 +63,13 @@ class INDIClient(PyQt5.QtCore.QObject):
 
     CYCLE = 200
     CONNECTION_TIMEOUT = 2000
+    # number of parallel BLOB workers and maximum number of BLOBs waiting or in work
+    BLOB_WORKERS = 2
+    BLOB_QUEUE_SIZE = 4
 
     data = {
         'ServerIP': '',
         'ServerPort': 7624,
-        'Device': {}
     }
 
     def __init__(self, app, thread):
@@ -72,8 +79,17 @@ class INDIClient(PyQt5.QtCore.QObject):
         self.thread = thread
         self.isRunning = False
         self.connectCounter = 0
-        self.tagFrame = ''
-        self.messageString = ''
+        # BLOB content is streamed to files in the images directory while receiving
+        self.streamParser = indiXML.INDIStreamParser(os.getcwd() + '/images')
+        # typed device properties, guarded by the shared INDI lock
+        self.propertyStore = indiProperties.INDIPropertyStore(self.app.sharedINDIDataLock)
+        self.propertyStore.subscribe('', '', self.propertyChanged.emit)
+        self.threadpoolBLOB = PyQt5.QtCore.QThreadPool()
+        self.threadpoolBLOB.setMaxThreadCount(self.BLOB_WORKERS)
+        # BLOBs waiting for a free slot are already spooled to disk, so holding them back costs no memory
+        self.mutexBLOB = PyQt5.QtCore.QMutex()
+        self.blobsRunning = 0
+        self.blobsWaiting = deque()
         self.mutexIPChange = PyQt5.QtCore.QMutex()
         self.mutexIsRunning = PyQt5.QtCore.QMutex()
         self.checkIP = checkIP.CheckIP()
@@ -232,6 +248,8 @@ class INDIClient(PyQt5.QtCore.QObject):
         self.app.sharedINDIDataLock.lockForRead()
         self.logger.info('INDI Server connected at {0}:{1}'.format(self.data['ServerIP'], self.data['ServerPort']))
         self.app.sharedINDIDataLock.unlock()
+        # new connection starts a new XML stream
+        self.streamParser.reset()
         # get all informations about existing devices on the choosen indi server
         self.app.INDICommandQueue.put(indiXML.clientGetProperties(indi_attr={'version': '1.7'}))
 
@@ -241,32 +259,31 @@ class INDIClient(PyQt5.QtCore.QObject):
             # now place the information about accessible devices in the gui and set the connection status
             # and configure the new devices adequately
             # todo: handling of multiple devices of one type and doing the selection
-            self.app.sharedINDIDataLock.lockForRead()
-            if device in self.data['Device']:
-                if 'DRIVER_INFO' in self.data['Device'][device]:
-                    if int(self.data['Device'][device]['DRIVER_INFO']['DRIVER_INTERFACE']) & self.CCD_INTERFACE:
+            if self.propertyStore.hasDevice(device):
+                interface = self.propertyStore.getInterface(device)
+                if interface is not None:
+                    if interface & self.CCD_INTERFACE:
                         # make a shortcut for later use and knowing which is a Camera
                         self.cameraDevice = device
                         self.app.INDICommandQueue.put(
                             indiXML.newSwitchVector([indiXML.oneSwitch('On', indi_attr={'name': 'ABORT'})],
                                                     indi_attr={'name': 'CCD_ABORT_EXPOSURE', 'device': self.app.workerINDI.cameraDevice}))
-                    elif int(self.data['Device'][device]['DRIVER_INFO']['DRIVER_INTERFACE']) & self.WEATHER_INTERFACE:
+                    elif interface & self.WEATHER_INTERFACE:
                         # make a shortcut for later use
                         self.environmentDevice = device
-                    elif int(self.data['Device'][device]['DRIVER_INFO']['DRIVER_INTERFACE']) & self.TELESCOPE_INTERFACE:
+                    elif interface & self.TELESCOPE_INTERFACE:
                         # make a shortcut for later use
                         self.telescopeDevice = device
-                    elif int(self.data['Device'][device]['DRIVER_INFO']['DRIVER_INTERFACE']) & self.DOME_INTERFACE:
+                    elif interface & self.DOME_INTERFACE:
                         # make a shortcut for later use
                         self.domeDevice = device
                     elif device == 'SQM':
                         self.auxDevice = device
-                    # elif int(self.data['Device'][device]['DRIVER_INFO']['DRIVER_INTERFACE']) == 0:
+                    # elif interface == 0:
                         # make a shortcut for later use
                 else:
                     # if not ready, put it on the stack again !
                     self.newDeviceQueue.put(device)
-            self.app.sharedINDIDataLock.unlock()
 
     @PyQt5.QtCore.pyqtSlot(PyQt5.QtNetwork.QAbstractSocket.SocketError)
     def handleError(self, socketError):
@@ -281,9 +298,7 @@ class INDIClient(PyQt5.QtCore.QObject):
     @PyQt5.QtCore.pyqtSlot()
     def handleDisconnect(self):
         self.logger.info('INDI client connection is disconnected from host')
-        self.app.sharedINDIDataLock.lockForWrite()
-        self.data['Device'] = {}
-        self.app.sharedINDIDataLock.unlock()
+        self.propertyStore.clear()
         self.cameraDevice = ''
         self.environmentDevice = ''
         self.domeDevice = ''
@@ -301,73 +316,34 @@ class INDIClient(PyQt5.QtCore.QObject):
         if 'device' not in message.attr:
             return
         device = message.attr['device']
-        # receiving all definitions for vectors in indi and building them up in self.data['Device']
+        # receiving all definitions for vectors in indi and building them up in the property store
         if isinstance(message, indiXML.DefBLOBVector):
-            self.app.sharedINDIDataLock.lockForWrite()
-            if device not in self.data['Device']:
-                self.data['Device'][device] = {}
-            if device in self.data['Device']:
-                if 'name' in message.attr:
-                    defVector = message.attr['name']
-                    if defVector not in self.data['Device'][device]:
-                        self.data['Device'][device][defVector] = {}
-                    for elt in message.elt_list:
-                        self.data['Device'][device][defVector][elt.attr['name']] = ''
-            self.app.sharedINDIDataLock.unlock()
+            if 'name' in message.attr:
+                elements = [(elt.attr['name'], '') for elt in message.elt_list]
+                self.propertyStore.setVector(device, message.attr['name'], message.attr, elements, define=True)
 
         elif isinstance(message, indiXML.SetBLOBVector):
-            self.app.sharedINDIDataLock.lockForRead()
-            if device in self.data['Device']:
-                if int(self.data['Device'][device]['DRIVER_INFO']['DRIVER_INTERFACE']) & self.CCD_INTERFACE:
+            # decoding and saving runs in the BLOB worker pool, so the property dispatcher stays responsive
+            submitted = False
+            interface = self.propertyStore.getInterface(device)
+            if interface is not None:
+                if interface & self.CCD_INTERFACE:
                     name = message.attr['name']
                     # ccd1 is the main camera in INDI
                     if name == 'CCD1':
                         # format tells me raw or compressed format
                         if 'format' in message.getElt(0).attr:
-                            try:
-                                if self.imagePath != '':
-                                    if message.getElt(0).attr['format'] == '.fits':
-                                        HDU = pyfits.HDUList.fromstring(message.getElt(0).getValue())
-                                        imageHDU = HDU[0]
-                                        pyfits.writeto(self.imagePath, imageHDU.data, imageHDU.header, overwrite=True)
-                                        self.logger.debug('Image BLOB is in raw fits format')
-                                    elif message.getElt(0).attr['format'] == '.fits.fz':
-                                        HDU = pyfits.HDUList.fromstring(message.getElt(0).getValue())
-                                        imageHDU = HDU[1]
-                                        pyfits.writeto(self.imagePath, imageHDU.data, imageHDU.header, overwrite=True)
-                                        self.logger.debug('Image BLOB is in fpack compressed fits format')
-                                    elif message.getElt(0).attr['format'] == '.fits.z':
-                                        HDU = pyfits.HDUList.fromstring(zlib.decompress(message.getElt(0).getValue()))
-                                        imageHDU = HDU[0]
-                                        pyfits.writeto(self.imagePath, imageHDU.data, imageHDU.header, overwrite=True)
-                                        self.logger.debug('Image BLOB is compressed fits format')
-                                    else:
-                                        self.logger.debug('Image BLOB is not supported')
-                                    self.receivedImage.emit(True)
-                                else:
-                                    # here are some functions to listen to image transfer on ethernet
-                                    if self.app.ui.checkEnableINDIListening.isChecked():
-                                        # received an image without asking for it. just listening
-                                        path = os.getcwd() + '/images/listen.fit'
-                                        if message.getElt(0).attr['format'] == '.fits':
-                                            imageHDU = pyfits.HDUList.fromstring(message.getElt(0).getValue())
-                                            imageHDU.writeto(path, overwrite=True)
-                                            self.logger.debug('Image while listening is received in raw fits format')
-                                        else:
-                                            imageHDU = pyfits.HDUList.fromstring(zlib.decompress(message.getElt(0).getValue()))
-                                            imageHDU.writeto(path, overwrite=True)
-                                            self.logger.debug('Image while listening is received in compressed fits format')
-                                        self.app.imageWindow.signalShowFitsImage.emit(path)
-                                        # if there is a hint, we could solve it as well automatically
-                                        if self.app.ui.checkEnableINDISolving.isChecked():
-                                            self.app.imageWindow.signalSolveFitsImage.emit(path)
-                                    else:
-                                        # do nothing
-                                        pass
-                            except Exception as e:
-                                self.receivedImage.emit(False)
-                                self.logger.debug('Could not receive Image, error:{0}'.format(e))
-                            finally:
+                            if self.imagePath != '':
+                                submitted = self.submitBLOB(message.getElt(0), self.imagePath, False, False)
+                            # here are some functions to listen to image transfer on ethernet
+                            elif self.app.ui.checkEnableINDIListening.isChecked():
+                                # received an image without asking for it. just listening
+                                submitted = self.submitBLOB(message.getElt(0),
+                                                            os.getcwd() + '/images/listen.fit',
+                                                            True,
+                                                            self.app.ui.checkEnableINDISolving.isChecked())
+                            else:
+                                # do nothing
                                 pass
                         else:
                             self.logger.debug('Could not find format in message from device: {0}'.format(device))
@@ -377,154 +353,163 @@ class INDIClient(PyQt5.QtCore.QObject):
                     self.logger.debug('Got unexpected BLOB from device: {0}'.format(device))
             else:
                 self.logger.debug('Did not find device: {0} in device list'.format(device))
-            self.app.sharedINDIDataLock.unlock()
+            # remove all streamed BLOB files, which are not used
+            for elt in message.elt_list:
+                if isinstance(elt, indiXML.OneBLOB) and elt.blobFile is not None:
+                    if not (submitted and elt is message.getElt(0)):
+                        elt.blobFile.discard()
 
         # deleting properties from devices
         elif isinstance(message, indiXML.DelProperty):
-            self.app.sharedINDIDataLock.lockForWrite()
-            if device in self.data['Device']:
-                if 'name' in message.attr:
-                    delVector = message.attr['name']
-                    if delVector in self.data['Device'][device]:
-                        del self.data['Device'][device][delVector]
-            self.app.sharedINDIDataLock.unlock()
-
-        # receiving changes from vectors and updating them ins self.data['Device]
+            if 'name' in message.attr:
+                self.propertyStore.deleteVector(device, message.attr['name'])
+            else:
+                self.propertyStore.deleteVector(device)
+
+        # receiving changes from vectors and updating them in the property store
         elif isinstance(message, indiXML.SetSwitchVector) or \
                 isinstance(message, indiXML.SetTextVector) or \
                 isinstance(message, indiXML.SetLightVector) or \
                 isinstance(message, indiXML.SetNumberVector):
-            self.app.sharedINDIDataLock.lockForWrite()
-            if device in self.data['Device']:
-                if 'name' in message.attr:
-                    setVector = message.attr['name']
-                    if setVector not in self.data['Device'][device]:
-                        self.data['Device'][device][setVector] = {}
-                        self.logger.warning('SetVector before DefVector in INDI protocol, device: {0}, vector: {1}'.format(device, setVector))
-                    if 'state' in message.attr:
-                        self.data['Device'][device][setVector]['state'] = message.attr['state']
-                    if 'timeout' in message.attr:
-                        self.data['Device'][device][setVector]['timeout'] = message.attr['timeout']
-                    for elt in message.elt_list:
-                        self.data['Device'][device][setVector][elt.attr['name']] = elt.getValue()
-            self.app.sharedINDIDataLock.unlock()
-
-        # receiving all definitions for vectors in indi and building them up in self.data['Device']
+            if 'name' in message.attr and self.propertyStore.hasDevice(device):
+                elements = [(elt.attr['name'], elt.getValue()) for elt in message.elt_list]
+                self.propertyStore.setVector(device, message.attr['name'], message.attr, elements,
+                                             numeric=isinstance(message, indiXML.SetNumberVector))
+
+        # receiving all definitions for vectors in indi and building them up in the property store
         elif isinstance(message, indiXML.DefSwitchVector) or \
                 isinstance(message, indiXML.DefTextVector) or \
                 isinstance(message, indiXML.DefLightVector) or \
                 isinstance(message, indiXML.DefNumberVector):
-            self.app.sharedINDIDataLock.lockForWrite()
-            if device not in self.data['Device']:
-                # new device !
-                self.data['Device'][device] = {}
-                self.newDeviceQueue.put(device)
-            if device in self.data['Device']:
-                if 'name' in message.attr:
-                    defVector = message.attr['name']
-                    if defVector not in self.data['Device'][device]:
-                        self.data['Device'][device][defVector] = {}
-                    if 'state' in message.attr:
-                        self.data['Device'][device][defVector]['state'] = message.attr['state']
-                    if 'perm' in message.attr:
-                        self.data['Device'][device][defVector]['perm'] = message.attr['perm']
-                    if 'timeout' in message.attr:
-                        self.data['Device'][device][defVector]['timeout'] = message.attr['timeout']
-                    for elt in message.elt_list:
-                        self.data['Device'][device][defVector][elt.attr['name']] = elt.getValue()
-            self.app.sharedINDIDataLock.unlock()
+            if 'name' in message.attr:
+                elements = [(elt.attr['name'], elt.getValue()) for elt in message.elt_list]
+                if self.propertyStore.setVector(device, message.attr['name'], message.attr, elements,
+                                                numeric=isinstance(message, indiXML.DefNumberVector),
+                                                define=True):
+                    # new device !
+                    self.newDeviceQueue.put(device)
 
-        self.app.sharedINDIDataLock.lockForRead()
-        if device in self.data['Device']:
-            if 'DRIVER_INFO' in self.data['Device'][device]:
-                if int(self.data['Device'][device]['DRIVER_INFO']['DRIVER_INTERFACE']) & self.CCD_INTERFACE:
-                    self.app.INDIStatusQueue.put({'Name': 'CCD', 'value': device})
-                elif int(self.data['Device'][device]['DRIVER_INFO']['DRIVER_INTERFACE']) & self.WEATHER_INTERFACE:
-                    self.app.INDIStatusQueue.put({'Name': 'Environment', 'value': device})
-                elif int(self.data['Device'][device]['DRIVER_INFO']['DRIVER_INTERFACE']) & self.DOME_INTERFACE:
-                    self.app.INDIStatusQueue.put({'Name': 'Dome', 'value': device})
-                elif int(self.data['Device'][device]['DRIVER_INFO']['DRIVER_INTERFACE']) & self.TELESCOPE_INTERFACE:
-                    self.app.INDIStatusQueue.put({'Name': 'Telescope', 'value': device})
-                elif int(self.data['Device'][device]['DRIVER_INFO']['DRIVER_INTERFACE']) & self.AUX_INTERFACE:
-                    self.app.INDIStatusQueue.put({'Name': 'Aux', 'value': device})
-        self.app.sharedINDIDataLock.unlock()
+        interface = self.propertyStore.getInterface(device)
+        if interface is not None:
+            if interface & self.CCD_INTERFACE:
+                self.app.INDIStatusQueue.put({'Name': 'CCD', 'value': device})
+            elif interface & self.WEATHER_INTERFACE:
+                self.app.INDIStatusQueue.put({'Name': 'Environment', 'value': device})
+            elif interface & self.DOME_INTERFACE:
+                self.app.INDIStatusQueue.put({'Name': 'Dome', 'value': device})
+            elif interface & self.TELESCOPE_INTERFACE:
+                self.app.INDIStatusQueue.put({'Name': 'Telescope', 'value': device})
+            elif interface & self.AUX_INTERFACE:
+                self.app.INDIStatusQueue.put({'Name': 'Aux', 'value': device})
 
     @PyQt5.QtCore.pyqtSlot()
     def handleReadyRead(self):
-        # Add starting tag if this is new message.
-        # we have to check and keep the first XML tag
-        if len(self.messageString) == 0:
-            self.messageString = "<data>"
-        # Get message from socket.
+        # the stream parser keeps its state, so every chunk is parsed only once
         while self.socket.bytesAvailable() and self.isRunning:
-            # print(self.socket.bytesAvailable(), len(self.messageString))
-            try:
-                self.messageString += self.socket.read(100000).decode()
-            except Exception as e:
-                self.logger.error('Cannot decode, error:{0}'.format(e))
-            finally:
-                pass
-        # Add closing tag.
-        self.messageString += "</data>"
-        # Try and parse the message !
-        try:
-            messages = ElementTree.fromstring(self.messageString)
-            self.messageString = ""
-            for message in messages:
-                xmlMessage = indiXML.parseETree(message)
+            for xmlMessage in self.streamParser.feed(self.socket.read(100000)):
                 self.processMessage.emit(xmlMessage)
-        # Message is incomplete, remove </data> and try again with more data
-        except ElementTree.ParseError:
-            self.messageString = self.messageString[:-7]
-        finally:
-            pass
 
-    @PyQt5.QtCore.pyqtSlot()
-    def handleReadyReadNew(self):
-        # Get message from socket.
-        while self.socket.bytesAvailable() and self.isRunning:
-            # decode message and catch error
-            try:
-                self.messageString += self.socket.read(10000).decode()
-            except Exception as e:
-                self.logger.error('INDI message raw decode, error:{0}'.format(e))
-            finally:
-                pass
-        # get first tag frame
-        if self.tagFrame == '':
-            self.tagFrame = self.messageString[1:50].split(' ')[0]
-            print('start: ', self.tagFrame, len(self.messageString))
-        # checking if closing first tag is there
-        if self.messageString.endswith('</' + self.tagFrame + '>') or self.messageString.endswith('</' + self.tagFrame + '>\n'):
-            # last part of message, process now
-            messageComplete = True
-            print('finished: ' + self.tagFrame)
+    def submitBLOB(self, elt, path, listening, solving):
+        # bounded queue: the dispatcher never waits for a free slot, the BLOB is started when one is released
+        self.mutexBLOB.lock()
+        if self.blobsRunning < self.BLOB_QUEUE_SIZE:
+            self.blobsRunning += 1
+            self.threadpoolBLOB.start(worker.Worker(self.processBLOB, elt, path, listening, solving))
+            submitted = True
+        elif len(self.blobsWaiting) < self.BLOB_QUEUE_SIZE:
+            self.logger.warning('BLOB queue full, waiting for free slot')
+            self.blobsWaiting.append((elt, path, listening, solving))
+            submitted = True
+        else:
+            self.logger.error('BLOB queue overflow, image {0} dropped'.format(path))
+            submitted = False
+        self.mutexBLOB.unlock()
+        if not submitted and not listening:
+            self.receivedImage.emit(False)
+        return submitted
+
+    def releaseBLOB(self):
+        # the slot of a finished BLOB is handed over to the next waiting one
+        self.mutexBLOB.lock()
+        if self.blobsWaiting:
+            self.threadpoolBLOB.start(worker.Worker(self.processBLOB, *self.blobsWaiting.popleft()))
         else:
-            # otherwise continue
-            messageComplete = False
-            print(len(self.messageString), self.messageString[len(self.messageString)-30:], ord(self.messageString[-2]), ord(self.messageString[-1]))
+            self.blobsRunning -= 1
+        self.mutexBLOB.unlock()
 
-        if messageComplete:
-            # adding frame tags for INDI
-            self.messageString = "<data>" + self.messageString + "</data>"
+    def processBLOB(self, elt, path, listening, solving):
+        # runs in the BLOB worker pool
+        try:
+            self.saveBLOB(elt, path)
+            if listening:
+                self.app.imageWindow.signalShowFitsImage.emit(path)
+                # if there is a hint, we could solve it as well automatically
+                if solving:
+                    self.app.imageWindow.signalSolveFitsImage.emit(path)
+            else:
+                # file is durable on disk now
+                self.receivedImage.emit(True)
+        except Exception as e:
+            if elt.blobFile is not None:
+                elt.blobFile.discard()
+            if not listening:
+                self.receivedImage.emit(False)
+            self.logger.debug('Could not receive Image, error:{0}'.format(e))
+        finally:
+            self.releaseBLOB()
+
+    def saveBLOB(self, elt, path):
+        # stores the content of a oneBLOB element as plain fits file
+        blobFile = elt.blobFile
+        if blobFile is None:
+            # content was kept in memory
+            if elt.attr['format'] == '.fits':
+                with open(path, 'wb') as outFile:
+                    outFile.write(elt.getValue())
+                    outFile.flush()
+                    os.fsync(outFile.fileno())
+                self.logger.debug('Image BLOB is in raw fits format')
+            elif elt.attr['format'] == '.fits.z':
+                with open(path, 'wb') as outFile:
+                    outFile.write(zlib.decompress(elt.getValue()))
+                    outFile.flush()
+                    os.fsync(outFile.fileno())
+                self.logger.debug('Image BLOB is compressed fits format')
+            elif elt.attr['format'] == '.fits.fz':
+                HDU = pyfits.HDUList.fromstring(elt.getValue())
+                imageHDU = HDU[1]
+                self.writeFits(path, imageHDU)
+                self.logger.debug('Image BLOB is in fpack compressed fits format')
+            else:
+                self.logger.debug('Image BLOB is not supported')
+            return
+        if blobFile.failed:
+            raise ValueError('BLOB content could not be decoded')
+        if blobFile.format == '.fits':
+            # raw and zlib compressed BLOBs are plain fits on disk already, so the file is just moved to its place
             try:
-                # decode INDI XML elements
-                messages = ElementTree.fromstring(self.messageString)
-                # clear message
-                for message in messages:
-                    # print('message: ', message)
-                    xmlMessage = indiXML.parseETree(message)
-                    self.processMessage.emit(xmlMessage)
-            except ElementTree.ParseError:
-                print('error parse')
-                self.logger.error('INDI XML message parse error')
-            finally:
-                print('reset to next round')
-                self.messageString = ''
-                self.tagFrame = ''
+                os.replace(blobFile.path, path)
+            except OSError:
+                shutil.move(blobFile.path, path)
+            self.logger.debug('Image BLOB with format {0} stored with {1} bytes'.format(elt.attr['format'], blobFile.length))
+        elif blobFile.format == '.fits.fz':
+            # fpack tile compression has to be expanded by astropy, which reads the tiles from the file
+            HDU = pyfits.open(blobFile.path)
+            imageHDU = HDU[1]
+            self.writeFits(path, imageHDU)
+            HDU.close()
+            blobFile.discard()
+            self.logger.debug('Image BLOB is in fpack compressed fits format')
         else:
-            # move on
-            pass
+            blobFile.discard()
+            self.logger.debug('Image BLOB is not supported')
+
+    @staticmethod
+    def writeFits(path, imageHDU):
+        with open(path, 'wb') as outFile:
+            pyfits.PrimaryHDU(imageHDU.data, imageHDU.header).writeto(outFile)
+            outFile.flush()
+            os.fsync(outFile.fileno())
 
     def sendMessage(self, indiCommand):
         if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
@@ -0,0 +1,194 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+import logging
+
+
+class INDIProperty(object):
+    # one vector of a device, numbers are already parsed to float
+
+    def __init__(self, device, name):
+        self.device = device
+        self.name = name
+        self.state = ''
+        self.perm = ''
+        self.timeout = 0.0
+        self.values = {}
+        self.version = 0
+
+
+class INDIPropertyStore(object):
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, lock):
+        # lock is the shared INDI data lock of the application, all access is guarded inside the store
+        self.lock = lock
+        self.devices = {}
+        self.interfaces = {}
+        self.subscribers = {}
+
+    @staticmethod
+    def parseNumber(value):
+        # INDI numbers could be plain floats or sexagesimal strings like -12:30:00
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        try:
+            parts = [abs(float(x)) for x in value.replace(' ', ':').split(':') if x != '']
+            if not parts:
+                return value
+            number = 0.0
+            for i, part in enumerate(parts):
+                number += part / 60 ** i
+            if value.strip().startswith('-'):
+                number = -number
+            return number
+        except ValueError:
+            return value
+
+    def clear(self):
+        self.lock.lockForWrite()
+        self.devices = {}
+        self.interfaces = {}
+        self.lock.unlock()
+
+    def setVector(self, device, name, attr, elements, numeric=False, define=False):
+        # stores content of a def or set vector, elements is a list of (name, value) pairs
+        # returns True if the device was not known before
+        self.lock.lockForWrite()
+        newDevice = device not in self.devices
+        if newDevice:
+            self.devices[device] = {}
+        if name not in self.devices[device]:
+            if not define:
+                self.logger.warning('SetVector before DefVector in INDI protocol, device: {0}, vector: {1}'.format(device, name))
+            self.devices[device][name] = INDIProperty(device, name)
+        vector = self.devices[device][name]
+        if 'state' in attr:
+            vector.state = attr['state']
+        if 'perm' in attr:
+            vector.perm = attr['perm']
+        if 'timeout' in attr:
+            vector.timeout = self.parseNumber(attr['timeout'])
+        for elementName, value in elements:
+            if numeric and value is not None:
+                value = self.parseNumber(value)
+            vector.values[elementName] = value
+        vector.version += 1
+        if name == 'DRIVER_INFO' and 'DRIVER_INTERFACE' in vector.values:
+            try:
+                self.interfaces[device] = int(vector.values['DRIVER_INTERFACE'])
+            except ValueError:
+                self.logger.warning('Device: {0} has invalid interface: {1}'.format(device, vector.values['DRIVER_INTERFACE']))
+        values = dict(vector.values)
+        values['state'] = vector.state
+        callbacks = self.subscribers.get((device, name), []) + self.subscribers.get(('', ''), [])
+        self.lock.unlock()
+        # callbacks are called without lock, so they could read the store again
+        for callback in callbacks:
+            callback(device, name, values)
+        return newDevice
+
+    def deleteVector(self, device, name=''):
+        # without name the whole device is removed
+        self.lock.lockForWrite()
+        if device in self.devices:
+            if name == '':
+                del self.devices[device]
+                if device in self.interfaces:
+                    del self.interfaces[device]
+            elif name in self.devices[device]:
+                del self.devices[device][name]
+        self.lock.unlock()
+
+    def subscribe(self, device, name, callback):
+        # device and name empty means all changes
+        self.lock.lockForWrite()
+        self.subscribers.setdefault((device, name), []).append(callback)
+        self.lock.unlock()
+
+    def unsubscribe(self, device, name, callback):
+        self.lock.lockForWrite()
+        if callback in self.subscribers.get((device, name), []):
+            self.subscribers[(device, name)].remove(callback)
+        self.lock.unlock()
+
+    def hasDevice(self, device):
+        self.lock.lockForRead()
+        value = device in self.devices
+        self.lock.unlock()
+        return value
+
+    def hasVector(self, device, name):
+        self.lock.lockForRead()
+        value = device in self.devices and name in self.devices[device]
+        self.lock.unlock()
+        return value
+
+    def getValue(self, device, name, element, default=None):
+        self.lock.lockForRead()
+        value = default
+        if device in self.devices and name in self.devices[device]:
+            value = self.devices[device][name].values.get(element, default)
+        self.lock.unlock()
+        return value
+
+    def getValues(self, device, name):
+        # returns a copy of the vector values including the state
+        self.lock.lockForRead()
+        values = {}
+        if device in self.devices and name in self.devices[device]:
+            values = dict(self.devices[device][name].values)
+            values['state'] = self.devices[device][name].state
+        self.lock.unlock()
+        return values
+
+    def getState(self, device, name):
+        self.lock.lockForRead()
+        value = ''
+        if device in self.devices and name in self.devices[device]:
+            value = self.devices[device][name].state
+        self.lock.unlock()
+        return value
+
+    def getVersion(self, device, name):
+        # version counts the updates of a vector, so pollers could skip unchanged data
+        self.lock.lockForRead()
+        value = 0
+        if device in self.devices and name in self.devices[device]:
+            value = self.devices[device][name].version
+        self.lock.unlock()
+        return value
+
+    def getInterface(self, device):
+        # returns the parsed DRIVER_INTERFACE bitmask or None if not known yet
+        self.lock.lockForRead()
+        value = self.interfaces.get(device)
+        self.lock.unlock()
+        return value
+
+    def getDevicesByInterface(self, interface):
+        self.lock.lockForRead()
+        devices = [device for device in self.interfaces if self.interfaces[device] & interface]
+        self.lock.unlock()
+        return devices
+
+    def isConnected(self, device):
+        return self.getValue(device, 'CONNECTION', 'CONNECT') == 'On'
@@ -47,8 +47,12 @@ Notes:
 """
 
 import base64
+import binascii
 import numbers
 import logging
+import os
+import tempfile
+import zlib
 from xml.etree import ElementTree
 
 
@@ -303,6 +307,8 @@ class OneSwitch(INDIElement):
 class OneBLOB(INDIElement):
     def __init__(self, etype, value, attr_dict, etree):
         INDIElement.__init__(self, etype, None, attr_dict, etree)
+        # set by INDIStreamParser if the content was streamed to a file instead of being kept in value
+        self.blobFile = None
 
         #
         # Convert value to bytes from base64 if this object
@@ -795,6 +801,189 @@ def parseINDIXML(xml_string):
     return parseETree(etree)
 
 
+class BLOBStreamDecoder(object):
+    """
+    Decodes the base64 text of a oneBLOB element while it is received and writes the result straight to a file.
+    zlib compressed payloads (.z) are decompressed on the fly, so the file holds the plain content.
+    """
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, directory, attr):
+        self.format = attr.get('format', '')
+        self.decompressor = None
+        if self.format.endswith('.z'):
+            self.format = self.format[:-2]
+            self.decompressor = zlib.decompressobj()
+        handle, self.path = tempfile.mkstemp(suffix=self.format + '.part', dir=directory)
+        self.fileHandle = os.fdopen(handle, 'wb')
+        self.remainder = ''
+        self.length = 0
+        # after a decoding error the file is gone and the rest of the element is skipped
+        self.failed = False
+
+    def fail(self, error):
+        self.logger.error('BLOB content could not be decoded, error: {0}'.format(error))
+        self.failed = True
+        self.remainder = ''
+        self.discard()
+
+    def write(self, text):
+        if self.failed:
+            return
+        # base64 could only be decoded in groups of 4 characters, the rest waits for the next chunk
+        text = self.remainder + ''.join(text.split())
+        usable = len(text) - len(text) % 4
+        self.remainder = text[usable:]
+        if usable > 0:
+            try:
+                self.writeBytes(binascii.a2b_base64(text[:usable]))
+            except (binascii.Error, zlib.error, OSError) as e:
+                self.fail(e)
+
+    def writeBytes(self, data):
+        if self.decompressor is not None:
+            data = self.decompressor.decompress(data)
+        self.fileHandle.write(data)
+        self.length += len(data)
+
+    def close(self):
+        if self.failed:
+            return
+        if self.remainder:
+            self.logger.warning('BLOB base64 data has {0} trailing characters'.format(len(self.remainder)))
+            self.remainder = ''
+        try:
+            if self.decompressor is not None:
+                data = self.decompressor.flush()
+                self.fileHandle.write(data)
+                self.length += len(data)
+            # make the file durable before it is handed over
+            self.fileHandle.flush()
+            os.fsync(self.fileHandle.fileno())
+            self.fileHandle.close()
+        except (zlib.error, OSError) as e:
+            self.fail(e)
+
+    def discard(self):
+        if not self.fileHandle.closed:
+            self.fileHandle.close()
+        if os.path.isfile(self.path):
+            os.remove(self.path)
+
+
+class INDITreeBuilder(object):
+    """
+    Target for the XML parser which collects each complete top level INDI element. If a directory for BLOBs is given,
+    the content of oneBLOB elements is not kept in memory, but streamed through a BLOBStreamDecoder.
+    """
+
+    def __init__(self, blobDirectory=None):
+        self.builder = ElementTree.TreeBuilder()
+        self.blobDirectory = blobDirectory
+        self.root = None
+        self.depth = 0
+        self.blob = None
+        self.blobs = []
+        self.messages = []
+
+    def start(self, tag, attrs):
+        elem = self.builder.start(tag, attrs)
+        self.depth += 1
+        if self.depth == 1:
+            self.root = elem
+        if tag == 'oneBLOB' and self.blobDirectory is not None:
+            try:
+                self.blob = BLOBStreamDecoder(self.blobDirectory, attrs)
+            except Exception as e:
+                self.blob = None
+                BLOBStreamDecoder.logger.error('Could not open BLOB file, error: {0}'.format(e))
+        return elem
+
+    def data(self, data):
+        if self.blob is not None:
+            self.blob.write(data)
+        else:
+            self.builder.data(data)
+
+    def end(self, tag):
+        elem = self.builder.end(tag)
+        self.depth -= 1
+        if tag == 'oneBLOB' and self.blob is not None:
+            self.blob.close()
+            self.blobs.append(self.blob)
+            self.blob = None
+        # depth 1 is the virtual root, so the element is a complete INDI message
+        if self.depth == 1:
+            self.messages.append((elem, self.blobs))
+            self.blobs = []
+            # free memory of already processed elements
+            self.root.remove(elem)
+        return elem
+
+    def close(self):
+        return self.builder.close()
+
+    def discard(self):
+        if self.blob is not None:
+            self.blob.discard()
+            self.blob = None
+        for blob in self.blobs:
+            blob.discard()
+        self.blobs = []
+
+
+class INDIStreamParser(object):
+    """
+    Incremental parser for the INDI XML stream. The stream has no root element, so a virtual one is fed at start.
+    Each top level INDI element is returned as soon as it is closed, the parser state is kept across reads.
+    """
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, blobDirectory=None):
+        self.blobDirectory = blobDirectory
+        self.parser = None
+        self.target = None
+        self.reset()
+
+    def reset(self):
+        if self.target is not None:
+            self.target.discard()
+        self.target = INDITreeBuilder(self.blobDirectory)
+        self.parser = ElementTree.XMLParser(target=self.target)
+        self.parser.feed(b'<data>')
+
+    def feed(self, data):
+        messages = []
+        parseError = None
+        try:
+            self.parser.feed(data)
+        except ElementTree.ParseError as e:
+            parseError = e
+        except Exception as e:
+            # errors in the target callbacks leave the parser in the middle of an element
+            parseError = e
+        # messages completed before an error are still valid
+        completed = self.target.messages
+        self.target.messages = []
+        if parseError is not None:
+            self.logger.error('INDI XML stream parse error: {0}, restarting parser'.format(parseError))
+            self.reset()
+        for elem, blobs in completed:
+            if elem.tag not in indi_spec:
+                self.logger.warning('Unknown INDI element: {0}'.format(elem.tag))
+                for blob in blobs:
+                    blob.discard()
+                continue
+            message = parseETree(elem)
+            # streamed BLOB content is attached to the oneBLOB elements in order of appearance
+            if blobs:
+                oneBLOBs = [elt for elt in message.elt_list if isinstance(elt, OneBLOB)]
+                for elt, blob in zip(oneBLOBs, blobs):
+                    elt.blobFile = blob
+            messages.append(message)
+        return messages
+
+
 # Create the functions for generating INDI command objects.
 
 deviceGetProperties = makeINDIFn("deviceGetProperties")
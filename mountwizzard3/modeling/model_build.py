@@ -26,9 +26,9 @@ import math
 import PyQt5
 import indi.indi_xml as indiXML
 from analyse import analysedata
+from baseclasses import worker
 from modeling import model_points
 from queue import Queue
-from astrometry import transform
 import astropy.io.fits as pyfits
 
 
@@ -57,6 +57,9 @@ class Slewpoint(PyQt5.QtCore.QObject):
         self.mutexTakeNextPoint.lock()
         self.takeNextPoint = True
         self.mutexTakeNextPoint.unlock()
+        # start the slew right away and not on the next cycle
+        if self.isRunning:
+            self.doCommand()
 
     def run(self):
         self.logger.info('model build slewpoint started')
@@ -98,6 +101,7 @@ class Slewpoint(PyQt5.QtCore.QObject):
             self.main.app.messageQueue.put('Slewed>{0:02d}'.format(modelingData['Index'] + 1))
             time.sleep(modelingData['SettlingTime'])
             self.main.workerImage.queueImage.put(copy.copy(modelingData))
+            self.main.workerImage.signalImaging.emit()
             # make signal for hemisphere that point is imaged
             self.signalPointImaged.emit(modelingData['Azimuth'], modelingData['Altitude'])
             # if I have flexure or hysterese, I wait for the next point to slew
@@ -129,20 +133,31 @@ class Image(PyQt5.QtCore.QObject):
         self.imageSaved = False
         self.cycleTimer = None
         self.mutexIsRunning = PyQt5.QtCore.QMutex()
-        self.mutexImageIntegrated = PyQt5.QtCore.QMutex()
-        self.mutexImageSaved = PyQt5.QtCore.QMutex()
-        self.main.app.workerImaging.imageIntegrated.connect(self.setImageIntegrated)
-        self.main.app.workerImaging.imageSaved.connect(self.setImageSaved)
+        self.mutexImage = PyQt5.QtCore.QMutex()
+        self.waitImage = PyQt5.QtCore.QWaitCondition()
+        # the flags are set from imaging thread directly, because this thread is blocked while waiting
+        self.main.app.workerImaging.imageIntegrated.connect(self.setImageIntegrated, type=PyQt5.QtCore.Qt.DirectConnection)
+        self.main.app.workerImaging.imageSaved.connect(self.setImageSaved, type=PyQt5.QtCore.Qt.DirectConnection)
+        self.signalImaging.connect(self.doCommand)
 
     def setImageIntegrated(self):
-        self.mutexImageIntegrated.lock()
+        self.mutexImage.lock()
         self.imageIntegrated = True
-        self.mutexImageIntegrated.unlock()
+        self.waitImage.wakeAll()
+        self.mutexImage.unlock()
 
     def setImageSaved(self):
-        self.mutexImageSaved.lock()
+        self.mutexImage.lock()
         self.imageSaved = True
-        self.mutexImageSaved.unlock()
+        self.waitImage.wakeAll()
+        self.mutexImage.unlock()
+
+    def waitFor(self, flag):
+        # waits until imaging reached the state or modeling is cancelled
+        self.mutexImage.lock()
+        while not getattr(self, flag) and not self.main.cancel and self.isRunning:
+            self.waitImage.wait(self.mutexImage, 100)
+        self.mutexImage.unlock()
 
     def run(self):
         self.logger.info('model build imaging started')
@@ -174,13 +189,14 @@ class Image(PyQt5.QtCore.QObject):
 
     def doCommand(self):
         if not self.queueImage.empty():
+            # back pressure: if solving is behind, we wait before the next image is taken
+            if not self.main.workerPlatesolve.acquireSlot():
+                return
             modelingData = self.queueImage.get()
-            self.mutexImageSaved.lock()
+            self.mutexImage.lock()
             self.imageSaved = False
-            self.mutexImageSaved.unlock()
-            self.mutexImageIntegrated.lock()
             self.imageIntegrated = False
-            self.mutexImageIntegrated.unlock()
+            self.mutexImage.unlock()
             modelingData['File'] = 'Model_Image_' + '{0:03d}'.format(modelingData['Index']) + '.fit'
             modelingData['Imagepath'] = ''
             self.main.app.messageQueue.put('\tCapturing image for model point {0:2d}\n'.format(modelingData['Index'] + 1))
@@ -188,26 +204,27 @@ class Image(PyQt5.QtCore.QObject):
             # getting next image
             self.main.app.workerImaging.imagingCommandQueue.put(modelingData)
             # wait for imaging ready
-            while not self.imageIntegrated and not self.main.cancel:
-                time.sleep(0.1)
-                PyQt5.QtWidgets.QApplication.processEvents()
+            self.waitFor('imageIntegrated')
             # next point after integrating but during downloading if possible or after IDLE
             self.main.workerSlewpoint.signalStartSlewing.emit()
             # we have to wait until image is downloaded before being able to plate solve
-            while not self.imageSaved and not self.main.cancel:
-                time.sleep(0.1)
-                PyQt5.QtWidgets.QApplication.processEvents()
+            self.waitFor('imageSaved')
             self.main.app.messageQueue.put('Imaged>{0:02d}'.format(modelingData['Index'] + 1))
             self.logger.info('Imaged {0:02d}'.format(modelingData['Index'] + 1))
             self.main.workerPlatesolve.queuePlatesolve.put(copy.copy(modelingData))
+            self.main.workerPlatesolve.signalSolve.emit()
 
 
 class Platesolve(PyQt5.QtCore.QObject):
     logger = logging.getLogger(__name__)
 
     queuePlatesolve = Queue()
+    signalSolve = PyQt5.QtCore.pyqtSignal()
 
     CYCLE = 250
+    # maximum number of images taken, but not solved yet. the number of images solved in parallel is set in the gui
+    # and limited to this number as well
+    SOLVE_QUEUE_SIZE = 3
     signalDestruct = PyQt5.QtCore.pyqtSignal()
 
     def __init__(self, main, thread):
@@ -215,16 +232,20 @@ class Platesolve(PyQt5.QtCore.QObject):
         self.main = main
         self.thread = thread
         self.mutexIsRunning = PyQt5.QtCore.QMutex()
-        self.mutexImageDataDownloaded = PyQt5.QtCore.QMutex()
+        self.mutexProgress = PyQt5.QtCore.QMutex()
         self.isRunning = True
         self.cycleTimer = None
-        self.imageDataDownloaded = False
-        self.main.app.workerAstrometry.imageDataDownloaded.connect(self.setImageDataDownloaded)
-
-    def setImageDataDownloaded(self):
-        self.mutexImageDataDownloaded.lock()
-        self.imageDataDownloaded = True
-        self.mutexImageDataDownloaded.unlock()
+        self.numberPointsProcessed = 0
+        self.threadpoolSolve = PyQt5.QtCore.QThreadPool()
+        self.semaphoreSolve = PyQt5.QtCore.QSemaphore(self.SOLVE_QUEUE_SIZE)
+        self.signalSolve.connect(self.doCommand)
+
+    def acquireSlot(self):
+        # blocks the imaging until there is room in the solve queue
+        while not self.semaphoreSolve.tryAcquire(1, 100):
+            if self.main.cancel or not self.isRunning:
+                return False
+        return True
 
     def run(self):
         self.logger.info('model build solving started')
@@ -232,6 +253,12 @@ class Platesolve(PyQt5.QtCore.QObject):
         if not self.isRunning:
             self.isRunning = True
         self.mutexIsRunning.unlock()
+        self.numberPointsProcessed = 0
+        # only the astrometry.net client could handle several images at once, the others are single applications
+        if self.main.app.workerAstrometry.astrometryHandler == self.main.app.workerAstrometry.AstrometryClient:
+            self.threadpoolSolve.setMaxThreadCount(int(self.main.app.ui.astrometryWorkers.value()))
+        else:
+            self.threadpoolSolve.setMaxThreadCount(1)
         self.signalDestruct.connect(self.destruct, type=PyQt5.QtCore.Qt.BlockingQueuedConnection)
         self.cycleTimer = PyQt5.QtCore.QTimer(self)
         self.cycleTimer.setSingleShot(False)
@@ -247,6 +274,9 @@ class Platesolve(PyQt5.QtCore.QObject):
             self.thread.wait()
         self.mutexIsRunning.unlock()
         self.queuePlatesolve.queue.clear()
+        self.threadpoolSolve.waitForDone()
+        # free all slots for the next run
+        self.semaphoreSolve.release(self.SOLVE_QUEUE_SIZE - self.semaphoreSolve.available())
 
     @PyQt5.QtCore.pyqtSlot()
     def destruct(self):
@@ -254,19 +284,17 @@ class Platesolve(PyQt5.QtCore.QObject):
         self.signalDestruct.disconnect(self.destruct)
 
     def doCommand(self):
-        if not self.queuePlatesolve.empty():
-            self.mutexImageDataDownloaded.lock()
-            self.imageDataDownloaded = False
-            self.mutexImageDataDownloaded.unlock()
+        while not self.queuePlatesolve.empty():
             modelingData = self.queuePlatesolve.get()
-            if modelingData['Imagepath'] != '':
+            self.threadpoolSolve.start(worker.Worker(self.solvePoint, modelingData))
+
+    def solvePoint(self, modelingData):
+        # runs in the solve thread pool
+        try:
+            if modelingData['Imagepath'] != '' and not self.main.cancel:
                 self.main.app.messageQueue.put('\tSolving image for model point {0}\n'.format(modelingData['Index'] + 1))
                 self.logger.info('Solving image for model point {0}'.format(modelingData['Index'] + 1))
-                self.main.app.workerAstrometry.astrometryCommandQueue.put(modelingData)
-                # wait for solving ready
-                while not self.imageDataDownloaded and not self.main.cancel:
-                    time.sleep(0.1)
-                    PyQt5.QtWidgets.QApplication.processEvents()
+                self.main.app.workerAstrometry.solveImage(modelingData)
                 if modelingData.get('Solved', False):
                     ra_sol_Jnow, dec_sol_Jnow = self.main.transform.transformERFA(modelingData['RaJ2000Solved'], modelingData['DecJ2000Solved'], 3)
                     modelingData['RaJNowSolved'] = ra_sol_Jnow
@@ -286,22 +314,32 @@ class Platesolve(PyQt5.QtCore.QObject):
                     else:
                         self.main.app.messageQueue.put('\tSolving canceled\n')
                         self.logger.warning('Solving canceled')
-            # write progress to hemisphere windows
-            self.main.app.messageQueue.put('Solved>{0:02d}'.format(modelingData['Index'] + 1))
-            # write progress estimation to main gui
-            modelingDone = (modelingData['Index'] + 1) / modelingData['NumberPoints']
-            timeElapsed = time.time() - self.main.timeStart
-            if modelingDone != 0:
-                timeEstimation = (1 / modelingDone * timeElapsed) * (1 - modelingDone)
-            else:
-                timeEstimation = 0
-            self.main.app.messageQueue.put('percent{0:4.3f}'.format(modelingDone))
-            self.main.app.messageQueue.put('timeEst{0}'.format(time.strftime('%M:%S', time.gmtime(timeEstimation))))
-            finished = datetime.timedelta(seconds=timeEstimation) + datetime.datetime.now()
-            self.main.app.messageQueue.put('timeFin{0}'.format(finished.strftime('%H:%M:%S')))
-            # we come to an end
-            if modelingData['NumberPoints'] == modelingData['Index'] + 1:
-                self.main.modelingHasFinished = True
+        finally:
+            self.semaphoreSolve.release(1)
+            self.updateProgress(modelingData)
+
+    def updateProgress(self, modelingData):
+        # solves could finish out of order, so we count the processed points
+        self.mutexProgress.lock()
+        self.numberPointsProcessed += 1
+        numberPointsProcessed = self.numberPointsProcessed
+        self.mutexProgress.unlock()
+        # write progress to hemisphere windows
+        self.main.app.messageQueue.put('Solved>{0:02d}'.format(modelingData['Index'] + 1))
+        # write progress estimation to main gui
+        modelingDone = numberPointsProcessed / modelingData['NumberPoints']
+        timeElapsed = time.time() - self.main.timeStart
+        if modelingDone != 0:
+            timeEstimation = (1 / modelingDone * timeElapsed) * (1 - modelingDone)
+        else:
+            timeEstimation = 0
+        self.main.app.messageQueue.put('percent{0:4.3f}'.format(modelingDone))
+        self.main.app.messageQueue.put('timeEst{0}'.format(time.strftime('%M:%S', time.gmtime(timeEstimation))))
+        finished = datetime.timedelta(seconds=timeEstimation) + datetime.datetime.now()
+        self.main.app.messageQueue.put('timeFin{0}'.format(finished.strftime('%H:%M:%S')))
+        # we come to an end
+        if numberPointsProcessed >= modelingData['NumberPoints']:
+            self.main.modelingHasFinished = True
 
 
 class ModelingBuild:
@@ -313,7 +351,7 @@ class ModelingBuild:
 
         # assign support classes
         self.analyseData = analysedata.Analyse(self.app)
-        self.transform = transform.Transform(self.app)
+        self.transform = self.app.transform
         self.modelPoints = model_points.ModelPoints(self.app)
 
         # initialize the parallel thread modeling parts
@@ -342,6 +380,7 @@ class ModelingBuild:
         self.modelingHasFinished = False
         self.numberPointsMax = 0
         self.numberSolvedPoints = 0
+        self.slewTimeActual = 0
         self.cancel = False
         self.imageReady = False
         self.solveReady = False
@@ -390,6 +429,7 @@ class ModelingBuild:
         azimuth = modelingData['Azimuth']
         self.mountSlewFinished = False
         self.domeSlewFinished = False
+        timeSlewStart = time.time()
         # limit azimuth and altitude
         if azimuth >= 360:
             azimuth = 359.9
@@ -417,6 +457,7 @@ class ModelingBuild:
                     break
                 time.sleep(0.2)
             self.logger.debug('slews finished, move on')
+        self.slewTimeActual += time.time() - timeSlewStart
 
     def runModelCore(self, messageQueue, runPoints, modelingData):
         self.app.imageWindow.signalSetManualEnable.emit(False)
@@ -439,6 +480,7 @@ class ModelingBuild:
         self.workerSlewpoint.mutexTakeNextPoint.unlock()
         self.modelRun = True
         self.timeStart = time.time()
+        self.slewTimeActual = 0
         # starting the necessary threads
         self.threadSlewpoint.start()
         self.threadImage.start()
@@ -454,7 +496,7 @@ class ModelingBuild:
             modelingData['Index'] = i
             modelingData['Azimuth'] = p_az
             modelingData['Altitude'] = p_alt
-            modelingData['NumberPoints'] = len(runPoints)
+            modelingData['NumberPoints'] = len(runPoints[:100])
             # has to be a copy, otherwise we have always the same content because it will be overwritten
             self.workerSlewpoint.queuePoint.put(copy.copy(modelingData))
         # start process
@@ -483,10 +525,18 @@ class ModelingBuild:
         self.workerImage.stop()
         self.workerPlatesolve.stop()
         self.modelRun = False
+        # compare the real slew time with the estimation of the slew path optimizer
+        if not self.cancel and runPoints == self.modelPoints.slewPathPoints:
+            messageQueue.put('Slew time {0:3.0f} s, estimated {1:3.0f} s, estimated without optimization {2:3.0f} s\n'
+                             .format(self.slewTimeActual, self.modelPoints.slewTimeEstimated, self.modelPoints.slewTimeOriginal))
+            self.logger.info('Slew time actual: {0:3.0f} s, estimated: {1:3.0f} s, without optimization: {2:3.0f} s'
+                             .format(self.slewTimeActual, self.modelPoints.slewTimeEstimated, self.modelPoints.slewTimeOriginal))
         while not self.solvedPointsQueue.empty():
             modelingData = copy.copy(self.solvedPointsQueue.get())
             # clean up intermediate data
             results.append(modelingData)
+        # parallel solving could change the order of the points
+        results.sort(key=lambda x: x['Index'])
         if 'KeepImages' and 'BaseDirImages' in modelingData:
             if not modelingData['KeepImages']:
                 shutil.rmtree(modelingData['BaseDirImages'], ignore_errors=True)
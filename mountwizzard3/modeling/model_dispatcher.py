@@ -245,6 +245,8 @@ class ModelingDispatcher(PyQt5.QtCore.QObject):
         try:
             if 'CheckSortPoints' in self.app.config:
                 self.app.ui.checkSortPoints.setChecked(self.app.config['CheckSortPoints'])
+            if 'CheckOptimizeSlewPath' in self.app.config:
+                self.app.ui.checkOptimizeSlewPath.setChecked(self.app.config['CheckOptimizeSlewPath'])
             if 'CheckDeletePointsHorizonMask' in self.app.config:
                 self.app.ui.checkDeletePointsHorizonMask.setChecked(self.app.config['CheckDeletePointsHorizonMask'])
             if 'AltitudeBase' in self.app.config:
@@ -283,6 +285,7 @@ class ModelingDispatcher(PyQt5.QtCore.QObject):
 
     def storeConfig(self):
         self.app.config['CheckSortPoints'] = self.app.ui.checkSortPoints.isChecked()
+        self.app.config['CheckOptimizeSlewPath'] = self.app.ui.checkOptimizeSlewPath.isChecked()
         self.app.config['CheckDeletePointsHorizonMask'] = self.app.ui.checkDeletePointsHorizonMask.isChecked()
         self.app.config['AltitudeBase'] = self.app.ui.altitudeBase.value()
         self.app.config['AzimuthBase'] = self.app.ui.azimuthBase.value()
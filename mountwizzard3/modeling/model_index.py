@@ -0,0 +1,83 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+import logging
+import math
+
+
+class PointIndex:
+    logger = logging.getLogger(__name__)
+
+    # size of the grid cells in degrees azimuth and altitude. the hemisphere hit test measures
+    # distances with azimuth scaled down by SCALE_AZIMUTH, so the cells are square in that metric
+    SCALE_AZIMUTH = 4
+    CELL_SIZE = 2
+
+    def __init__(self, points=()):
+        # every cell keeps the point objects of the list it indexes, not their positions in the list
+        self.cells = dict()
+        self.count = 0
+        self.source = None
+        self.rebuild(points)
+
+    def cell(self, az, alt):
+        return int(math.floor(az / self.SCALE_AZIMUTH / self.CELL_SIZE)), int(math.floor(alt / self.CELL_SIZE))
+
+    def rebuild(self, points):
+        self.cells = dict()
+        self.count = 0
+        self.source = points
+        for point in points:
+            self.insert(point)
+
+    def isCurrent(self, points):
+        # lists, which are replaced or changed without the index, have to be indexed again
+        return self.source is points and self.count == len(points)
+
+    def insert(self, point):
+        self.cells.setdefault(self.cell(point[0], point[1]), list()).append(point)
+        self.count += 1
+
+    def remove(self, point):
+        key = self.cell(point[0], point[1])
+        bucket = self.cells.get(key, list())
+        for i in range(0, len(bucket)):
+            if bucket[i] is point:
+                del bucket[i]
+                if not bucket:
+                    del self.cells[key]
+                self.count -= 1
+                return True
+        self.logger.warning('Point {0} not in index'.format(point))
+        return False
+
+    def nearest(self, az, alt, epsilon):
+        # returns the nearest point with a distance below epsilon or None, searching only the neighbouring cells
+        cellAz, cellAlt = self.cell(az, alt)
+        reach = int(math.ceil(epsilon / self.CELL_SIZE))
+        nearest = None
+        distance = epsilon
+        for i in range(cellAz - reach, cellAz + reach + 1):
+            for j in range(cellAlt - reach, cellAlt + reach + 1):
+                for point in self.cells.get((i, j), list()):
+                    d = math.sqrt((point[0] - az) ** 2 / self.SCALE_AZIMUTH ** 2 + (point[1] - alt) ** 2)
+                    if d < distance:
+                        nearest = point
+                        distance = d
+        return nearest
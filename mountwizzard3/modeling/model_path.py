@@ -0,0 +1,158 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+import logging
+import math
+import numpy
+
+
+class SlewPathOptimizer:
+    logger = logging.getLogger(__name__)
+
+    # kinematic model of mount and dome, rates in degrees per second, times in seconds
+    RA_RATE = 4.0
+    DEC_RATE = 4.0
+    FLIP_TIME = 30.0
+    DOME_RATE = 5.0
+    # limits for the improvement heuristics
+    MAX_PASSES = 50
+    MAX_SEGMENT = 3
+
+    def __init__(self, latitude, useDome=False):
+        self.latitude = latitude
+        self.useDome = useDome
+
+    def axisPositions(self, points):
+        # converts az / alt to hour angle and declination in degrees and the pier side of the point
+        az = numpy.radians([p[0] for p in points])
+        alt = numpy.radians([p[1] for p in points])
+        lat = math.radians(self.latitude)
+        dec = numpy.arcsin(numpy.sin(alt) * math.sin(lat) + numpy.cos(alt) * math.cos(lat) * numpy.cos(az))
+        ha = numpy.arctan2(-numpy.sin(az) * numpy.cos(alt),
+                           numpy.sin(alt) * math.cos(lat) - numpy.cos(alt) * math.sin(lat) * numpy.cos(az))
+        # same separation of east and west like in sortPoints
+        west = numpy.array([p[0] >= 180 for p in points])
+        return numpy.degrees(ha), numpy.degrees(dec), west
+
+    def costMatrix(self, points):
+        # slew time between all points, mount axes and dome are moving in parallel
+        ha, dec, west = self.axisPositions(points)
+        deltaHa = numpy.abs(ha[:, None] - ha[None, :])
+        deltaHa = numpy.minimum(deltaHa, 360 - deltaHa)
+        deltaDec = numpy.abs(dec[:, None] - dec[None, :])
+        # after a meridian flip the declination axis moves through the pole
+        flip = west[:, None] != west[None, :]
+        deltaDec = numpy.where(flip, numpy.abs(90 - dec[:, None]) + numpy.abs(90 - dec[None, :]), deltaDec)
+        cost = numpy.maximum(deltaHa / self.RA_RATE, deltaDec / self.DEC_RATE) + flip * self.FLIP_TIME
+        if self.useDome:
+            az = numpy.array([p[0] for p in points])
+            deltaAz = numpy.abs(az[:, None] - az[None, :]) % 360
+            deltaAz = numpy.minimum(deltaAz, 360 - deltaAz)
+            cost = numpy.maximum(cost, deltaAz / self.DOME_RATE)
+        return cost
+
+    @staticmethod
+    def pathTime(cost, order):
+        if len(order) < 2:
+            return 0.0
+        return float(sum(cost[order[i], order[i + 1]] for i in range(0, len(order) - 1)))
+
+    @staticmethod
+    def nearestNeighbour(cost, start):
+        order = [start]
+        left = set(range(0, len(cost))) - {start}
+        while left:
+            last = order[-1]
+            nextPoint = min(left, key=lambda x: cost[last, x])
+            order.append(nextPoint)
+            left.remove(nextPoint)
+        return order
+
+    def twoOpt(self, cost, order):
+        # reversing sections of the open path, first point stays fixed
+        number = len(order)
+        improved = True
+        passes = 0
+        while improved and passes < self.MAX_PASSES:
+            improved = False
+            passes += 1
+            for i in range(1, number - 1):
+                for j in range(i + 1, number):
+                    before = cost[order[i - 1], order[i]]
+                    after = cost[order[i - 1], order[j]]
+                    if j < number - 1:
+                        before += cost[order[j], order[j + 1]]
+                        after += cost[order[i], order[j + 1]]
+                    if after < before - 1e-9:
+                        order[i:j + 1] = order[i:j + 1][::-1]
+                        improved = True
+        return order
+
+    def orOpt(self, cost, order):
+        # moving short segments to a better place in the path, first point stays fixed
+        number = len(order)
+        improved = True
+        passes = 0
+        while improved and passes < self.MAX_PASSES:
+            improved = False
+            passes += 1
+            for length in range(1, self.MAX_SEGMENT + 1):
+                i = 1
+                while i < number - length + 1:
+                    first = order[i]
+                    last = order[i + length - 1]
+                    prev = order[i - 1]
+                    removeGain = cost[prev, first]
+                    if i + length < number:
+                        nxt = order[i + length]
+                        removeGain += cost[last, nxt] - cost[prev, nxt]
+                    rest = order[:i] + order[i + length:]
+                    bestInsert = None
+                    bestCost = removeGain - 1e-9
+                    for j in range(1, len(rest) + 1):
+                        if j == i:
+                            continue
+                        a = rest[j - 1]
+                        insertCost = cost[a, first]
+                        if j < len(rest):
+                            insertCost += cost[last, rest[j]] - cost[a, rest[j]]
+                        if insertCost < bestCost:
+                            bestCost = insertCost
+                            bestInsert = j
+                    if bestInsert is not None:
+                        order = rest[:bestInsert] + order[i:i + length] + rest[bestInsert:]
+                        improved = True
+                    i += 1
+        return order
+
+    def optimize(self, points, start=0):
+        # returns the new order of the points, the estimated slew time for the old and for the new order
+        if len(points) < 3:
+            order = list(range(0, len(points)))
+            cost = self.costMatrix(points) if points else None
+            timeEstimated = self.pathTime(cost, order) if points else 0.0
+            return order, timeEstimated, timeEstimated
+        cost = self.costMatrix(points)
+        timeOriginal = self.pathTime(cost, list(range(0, len(points))))
+        order = self.nearestNeighbour(cost, start)
+        order = self.twoOpt(cost, order)
+        order = self.orOpt(cost, order)
+        timeOptimized = self.pathTime(cost, order)
+        self.logger.info('Slew path estimated: {0:4.0f} s, original order: {1:4.0f} s'.format(timeOptimized, timeOriginal))
+        return order, timeOriginal, timeOptimized
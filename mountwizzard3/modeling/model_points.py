@@ -24,18 +24,32 @@ import time
 import copy
 import operator
 import numpy
-from astrometry import transform
+from modeling import model_path
+from modeling import model_index
 
 
 class ModelPoints:
     logger = logging.getLogger(__name__)
 
+    # resolution of the compiled horizon mask in degrees azimuth
+    HORIZON_MASK_RESOLUTION = 0.1
+
     def __init__(self, app):
         self.app = app
-        self.transform = transform.Transform(self.app)
+        self.transform = self.app.transform
         self.horizonPoints = list()
+        # altitude of the horizon line for every step in azimuth, compiled from the horizon points
+        self.horizonMask = None
+        self.compileHorizonMask()
+        # spatial index for the hit test in the hemisphere window
+        self.modelPointsIndex = model_index.PointIndex()
+        self.horizonPointsIndex = model_index.PointIndex()
         self.modelPoints = list()
         self.celestialEquator = list()
+        # estimated slew times of the optimized points in seconds to compare with the real model run
+        self.slewPathPoints = list()
+        self.slewTimeEstimated = 0
+        self.slewTimeOriginal = 0
         # signal slot
         self.app.ui.btn_loadInitialModelPoints.clicked.connect(self.selectInitialModelPointsFileName)
         self.app.ui.btn_saveInitialModelPoints.clicked.connect(self.saveInitialModelPoints)
@@ -200,6 +214,13 @@ class ModelPoints:
         finally:
             return p, msg
 
+    def orderPoints(self, doSortingPoints):
+        # the slew path optimizer takes precedence over the east / west sorting
+        if self.app.ui.checkOptimizeSlewPath.isChecked():
+            self.optimizePoints()
+        elif doSortingPoints:
+            self.sortPoints()
+
     def sortPoints(self):
         if len(self.modelPoints) == 0:
             self.logger.warning('There are no points to sort')
@@ -216,8 +237,30 @@ class ModelPoints:
         eastSide = sorted(eastSide, key=operator.itemgetter(1))
         self.modelPoints = westSide + eastSide
 
+    def optimizePoints(self):
+        # orders the points for minimum slew time of mount and dome, starting from the actual mount position
+        if len(self.modelPoints) == 0:
+            self.logger.warning('There are no points to sort')
+            return
+        points = [(p[0], p[1]) for p in self.modelPoints]
+        mountData = self.app.workerMountDispatcher.getSnapshot()
+        if 'Az' in mountData and 'Alt' in mountData:
+            points.insert(0, (mountData['Az'], mountData['Alt']))
+        else:
+            points.insert(0, points[0])
+        useDome = not self.app.ui.pd_chooseDome.currentText().startswith('No Dome')
+        optimizer = model_path.SlewPathOptimizer(self.transform.site[0], useDome)
+        order, timeOriginal, timeOptimized = optimizer.optimize(points, 0)
+        # first point is the mount position
+        self.modelPoints = [points[i] for i in order[1:]]
+        self.slewPathPoints = list(self.modelPoints)
+        self.slewTimeEstimated = timeOptimized
+        self.slewTimeOriginal = timeOriginal
+        self.app.messageQueue.put('Slew path optimized: estimated slew time {0:3.0f} s instead of {1:3.0f} s\n'.format(timeOptimized, timeOriginal))
+
     def loadHorizonPoints(self, horizonPointsFileName, horizonByFile, horizonByAltitude, altitudeMinimumHorizon):
         self.horizonPoints = []
+        self.compileHorizonMask()
         if not (horizonByFile or horizonByAltitude):
             return
         hp = []
@@ -254,6 +297,7 @@ class ModelPoints:
         if horizonByAltitude:
             y = numpy.clip(y, altitudeMinimumHorizon, None)
         self.horizonPoints = [list(a) for a in zip(x, y)]
+        self.compileHorizonMask()
         return msg
 
     def saveHorizonPoints(self, horizonPointsFileName):
@@ -277,21 +321,98 @@ class ModelPoints:
                 fileHandle.close()
         return msg
 
-    def isAboveHorizonLine(self, point):
-        x = range(0, 361)
-        y = numpy.interp(x, [i[0] for i in self.horizonPoints], [i[1] for i in self.horizonPoints], left=None, right=None, period=None)
-        if point[1] > y[int(point[0])]:
-            return True
+    def compileHorizonMask(self):
+        # has to be called after every change of the horizon points, loading or editing
+        azimuth = numpy.linspace(0, 360, int(round(360 / self.HORIZON_MASK_RESOLUTION)) + 1)
+        if len(self.horizonPoints) == 0:
+            self.horizonMask = numpy.zeros(len(azimuth))
         else:
-            return False
+            self.horizonMask = numpy.interp(azimuth, [i[0] for i in self.horizonPoints], [i[1] for i in self.horizonPoints])
+
+    def horizonAltitude(self, azimuth):
+        # azimuth could be a single value or an array
+        index = numpy.rint(numpy.mod(azimuth, 360) / self.HORIZON_MASK_RESOLUTION).astype(int)
+        return self.horizonMask[index]
+
+    def isAboveHorizonMask(self, points):
+        # returns a boolean array for a list of (az, alt) points
+        if len(points) == 0:
+            return numpy.zeros(0, dtype=bool)
+        points = numpy.asarray(points, dtype=float)
+        return points[:, 1] > self.horizonAltitude(points[:, 0])
+
+    def isAboveHorizonLine(self, point):
+        return bool(self.isAboveHorizonMask([point])[0])
 
     def deleteBelowHorizonLine(self):
-        i = 0
-        while i < len(self.modelPoints):
-            if self.isAboveHorizonLine(self.modelPoints[i]):
-                i += 1
-            else:
+        above = self.isAboveHorizonMask(self.modelPoints)
+        self.modelPoints = [point for point, keep in zip(self.modelPoints, above) if keep]
+
+    def getModelPointsIndex(self):
+        # the lists are replaced by loading or generating points, then the index is built again
+        if not self.modelPointsIndex.isCurrent(self.modelPoints):
+            self.modelPointsIndex.rebuild(self.modelPoints)
+        return self.modelPointsIndex
+
+    def getHorizonPointsIndex(self):
+        if not self.horizonPointsIndex.isCurrent(self.horizonPoints):
+            self.horizonPointsIndex.rebuild(self.horizonPoints)
+        return self.horizonPointsIndex
+
+    def nearestModelPoint(self, az, alt, epsilon):
+        return self.getModelPointsIndex().nearest(az, alt, epsilon)
+
+    def nearestHorizonPoint(self, az, alt, epsilon):
+        return self.getHorizonPointsIndex().nearest(az, alt, epsilon)
+
+    def addModelPoint(self, point):
+        index = self.getModelPointsIndex()
+        self.modelPoints.append(point)
+        index.insert(point)
+
+    def deleteModelPoint(self, point):
+        index = self.getModelPointsIndex()
+        for i in range(0, len(self.modelPoints)):
+            if self.modelPoints[i] is point:
                 del self.modelPoints[i]
+                index.remove(point)
+                return True
+        return False
+
+    def horizonPosition(self, azimuth):
+        # horizon points are sorted by azimuth, so the position is found by bisection
+        low = 0
+        high = len(self.horizonPoints)
+        while low < high:
+            middle = (low + high) // 2
+            if self.horizonPoints[middle][0] < azimuth:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def addHorizonPoint(self, point):
+        # new points are only put between existing ones
+        if len(self.horizonPoints) < 2:
+            return False
+        index = self.getHorizonPointsIndex()
+        self.horizonPoints.insert(self.horizonPosition(point[0]), point)
+        index.insert(point)
+        self.compileHorizonMask()
+        return True
+
+    def deleteHorizonPoint(self, point):
+        # at least two points are needed for the horizon line
+        if len(self.horizonPoints) <= 2:
+            return False
+        index = self.getHorizonPointsIndex()
+        for i in range(self.horizonPosition(point[0]), len(self.horizonPoints)):
+            if self.horizonPoints[i] is point:
+                del self.horizonPoints[i]
+                index.remove(point)
+                self.compileHorizonMask()
+                return True
+        return False
 
     def deletePoints(self):
         self.modelPoints = list()
@@ -306,31 +427,34 @@ class ModelPoints:
         self.modelPoints, msg = self.loadModelPoints(filename, 'Full')
         if limitByHorizonMask:
             self.deleteBelowHorizonLine()
-        if doSortingPoints:
-            self.sortPoints()
+        self.orderPoints(doSortingPoints)
         self.app.messageQueue.put('ToModel>{0:02d}'.format(len(self.modelPoints)))
         self.app.workerModelingDispatcher.signalModelPointsRedraw.emit()
 
     def generateDSOPoints(self, limitByHorizonMask, hoursPathLength, numberOfPathPoints, hoursPathLengthPreview):
         # we have no position of the mount -> therefore we can't calculate the path
-        if 'RaJNow' not in self.app.workerMountDispatcher.data:
+        mountData = self.app.workerMountDispatcher.getSnapshot()
+        if 'RaJNow' not in mountData:
             return
         self.modelPoints = list()
-        ra = copy.copy(self.app.workerMountDispatcher.data['RaJNow'])
-        dec = copy.copy(self.app.workerMountDispatcher.data['DecJNow'])
+        ra = copy.copy(mountData['RaJNow'])
+        dec = copy.copy(mountData['DecJNow'])
+        raPath = list()
         for i in range(0, numberOfPathPoints):
             ra = ra - float(i) * hoursPathLength / numberOfPathPoints - hoursPathLengthPreview
-            az, alt = self.transform.transformERFA(ra, dec, 1)
-            if alt > 0:
-                self.modelPoints.append((az, alt))
+            raPath.append(ra)
+        if len(raPath) > 0:
+            azs, alts = self.transform.transformERFABatch(raPath, [dec] * len(raPath), 1)
+            for az, alt in zip(azs, alts):
+                if alt > 0:
+                    self.modelPoints.append((float(az), float(alt)))
         if limitByHorizonMask:
             self.deleteBelowHorizonLine()
         self.app.messageQueue.put('ToModel>{0:02d}'.format(len(self.modelPoints)))
         self.app.workerModelingDispatcher.signalModelPointsRedraw.emit()
 
     def generateMaxPoints(self, limitByHorizonMask, doSortingPoints):
-        west = []
-        east = []
+        haDec = list()
         off = -5
         i = 0
         for dec in range(-15, 90, 10):
@@ -342,32 +466,20 @@ class ModelPoints:
                 step = 30
             if i % 2:
                 for ha in range(120 + off, -120 + off, -step):
-                    az, alt = self.transform.topocentricToAzAlt(ha / 10, dec)
-                    if alt > 0:
-                        if az > 180:
-                            east.insert(0, (az, alt))
-                        else:
-                            west.append((az, alt))
+                    haDec.append((ha / 10, dec))
             else:
                 for ha in range(-120 + off, 120 + off, step):
-                    az, alt = self.transform.topocentricToAzAlt(ha / 10, dec)
-                    if alt > 0:
-                        if az > 180:
-                            east.insert(0, (az, alt))
-                        else:
-                            west.append((az, alt))
+                    haDec.append((ha / 10, dec))
             i += 1
-        self.modelPoints = west + east
+        self.modelPoints = self.transformHaDecPoints(haDec)
         if limitByHorizonMask:
             self.deleteBelowHorizonLine()
-        if doSortingPoints:
-            self.sortPoints()
+        self.orderPoints(doSortingPoints)
         self.app.messageQueue.put('ToModel>{0:02d}'.format(len(self.modelPoints)))
         self.app.workerModelingDispatcher.signalModelPointsRedraw.emit()
 
     def generateNormalPoints(self, limitByHorizonMask, doSortingPoints):
-        west = []
-        east = []
+        haDec = list()
         off = -5
         i = 0
         for dec in range(-15, 90, 15):
@@ -377,32 +489,20 @@ class ModelPoints:
                 step = 20
             if i % 2:
                 for ha in range(120 + off, -120 + off, -step):
-                    az, alt = self.transform.topocentricToAzAlt(ha / 10, dec)
-                    if alt > 0:
-                        if az > 180:
-                            east.insert(0, (az, alt))
-                        else:
-                            west.append((az, alt))
+                    haDec.append((ha / 10, dec))
             else:
                 for ha in range(-120 + off, 120 + off, step):
-                    az, alt = self.transform.topocentricToAzAlt(ha / 10, dec)
-                    if alt > 0:
-                        if az > 180:
-                            east.insert(0, (az, alt))
-                        else:
-                            west.append((az, alt))
+                    haDec.append((ha / 10, dec))
             i += 1
-        self.modelPoints = west + east
+        self.modelPoints = self.transformHaDecPoints(haDec)
         if limitByHorizonMask:
             self.deleteBelowHorizonLine()
-        if doSortingPoints:
-            self.sortPoints()
+        self.orderPoints(doSortingPoints)
         self.app.messageQueue.put('ToModel>{0:02d}'.format(len(self.modelPoints)))
         self.app.workerModelingDispatcher.signalModelPointsRedraw.emit()
 
     def generateMinPoints(self, limitByHorizonMask, doSortingPoints):
-        west = list()
-        east = list()
+        haDec = list()
         off = -5
         i = 0
         for dec in range(-15, 90, 15):
@@ -412,26 +512,15 @@ class ModelPoints:
                 step = 30
             if i % 2:
                 for ha in range(120 + off, -120 + off, -step):
-                    az, alt = self.transform.topocentricToAzAlt(ha / 10, dec)
-                    if alt > 0:
-                        if az > 180:
-                            east.insert(0, (az, alt))
-                        else:
-                            west.append((az, alt))
+                    haDec.append((ha / 10, dec))
             else:
                 for ha in range(-120 + off, 120 + off, step):
-                    az, alt = self.transform.topocentricToAzAlt(ha / 10, dec)
-                    if alt > 0:
-                        if az > 180:
-                            east.insert(0, (az, alt))
-                        else:
-                            west.append((az, alt))
+                    haDec.append((ha / 10, dec))
             i += 1
-        self.modelPoints = west + east
+        self.modelPoints = self.transformHaDecPoints(haDec)
         if limitByHorizonMask:
             self.deleteBelowHorizonLine()
-        if doSortingPoints:
-            self.sortPoints()
+        self.orderPoints(doSortingPoints)
         self.app.messageQueue.put('ToModel>{0:02d}'.format(len(self.modelPoints)))
         self.app.workerModelingDispatcher.signalModelPointsRedraw.emit()
 
@@ -458,8 +547,7 @@ class ModelPoints:
         self.modelPoints = west + east
         if limitByHorizonMask:
             self.deleteBelowHorizonLine()
-        if doSortingPoints:
-            self.sortPoints()
+        self.orderPoints(doSortingPoints)
         self.app.messageQueue.put('ToModel>{0:02d}'.format(len(self.modelPoints)))
         self.app.workerModelingDispatcher.signalModelPointsRedraw.emit()
 
@@ -478,8 +566,26 @@ class ModelPoints:
     def generateCelestialEquator(self):
         self.celestialEquator = list()
         off = -5
+        haDec = list()
         for dec in range(-15, 90, 15):
             for ha in range(120 + off, -120 + off, -2):
-                az, alt = self.transform.topocentricToAzAlt(ha / 10, dec)
-                if alt > 0:
-                    self.celestialEquator.append((az, alt))
+                haDec.append((ha / 10, dec))
+        azs, alts = self.transform.topocentricToAzAltBatch([i[0] for i in haDec], [i[1] for i in haDec])
+        for az, alt in zip(azs, alts):
+            if alt > 0:
+                self.celestialEquator.append((float(az), float(alt)))
+
+    def transformHaDecPoints(self, haDec):
+        # all points are transformed in one batch, the order of the serpentine path is kept
+        west = list()
+        east = list()
+        if len(haDec) == 0:
+            return west
+        azs, alts = self.transform.topocentricToAzAltBatch([i[0] for i in haDec], [i[1] for i in haDec])
+        for az, alt in zip(azs, alts):
+            if alt > 0:
+                if az > 180:
+                    east.insert(0, (float(az), float(alt)))
+                else:
+                    west.append((float(az), float(alt)))
+        return west + east
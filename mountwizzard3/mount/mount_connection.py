@@ -0,0 +1,359 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+import logging
+import PyQt5
+import time
+import concurrent.futures
+from mount import mount_framer
+
+
+class MountConnection(PyQt5.QtCore.QObject):
+    logger = logging.getLogger(__name__)
+
+    CONNECTION_TIMEOUT = 2000
+    CYCLE = 250
+    # time in seconds a started request might wait for its complete reply
+    REPLY_TIMEOUT = 10
+    # number of requests written to the mount before their replies arrived
+    PIPELINE_DEPTH = 4
+    # lower number is served first
+    PRIORITY_COMMAND = 0
+    PRIORITY_FAST = 1
+    PRIORITY_STATUS = 2
+    PRIORITY_BULK = 3
+    # time in seconds after enqueue, when a request should be on the wire. requests which missed
+    # their deadline are served before all others, so bulk transfers are not starved by status polling
+    DEADLINE = {PRIORITY_COMMAND: 0.25,
+                PRIORITY_FAST: 0.75,
+                PRIORITY_STATUS: 3,
+                PRIORITY_BULK: 10}
+    signalDestruct = PyQt5.QtCore.pyqtSignal()
+    signalSchedule = PyQt5.QtCore.pyqtSignal()
+
+    def __init__(self, app, thread, data):
+        super().__init__()
+
+        self.app = app
+        self.thread = thread
+        self.data = data
+        self.mutexIsRunning = PyQt5.QtCore.QMutex()
+        self.mutexQueue = PyQt5.QtCore.QMutex()
+        self.isRunning = False
+        self.connectCounter = 0
+        self.socket = None
+        self.cycleTimer = None
+        self.framer = mount_framer.MountReplyFramer()
+        self.runners = list()
+        self.startupRunners = list()
+        self.runnersStarted = False
+        self.pending = list()
+        self.inFlight = list()
+        self.mutexStatistics = PyQt5.QtCore.QMutex()
+        self.statistics = dict()
+
+    def addRunner(self, runner, startup=False):
+        # startup runners are served right after connecting, all others wait for the firmware data
+        self.runners.append(runner)
+        if startup:
+            self.startupRunners.append(runner)
+        runner.moveToThread(self.thread)
+
+    def run(self):
+        self.logger.info('mount connection started')
+        self.mutexIsRunning.lock()
+        if not self.isRunning:
+            self.isRunning = True
+        self.mutexIsRunning.unlock()
+        self.socket = PyQt5.QtNetwork.QTcpSocket()
+        self.socket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.LowDelayOption, 1)
+        self.socket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.KeepAliveOption, 1)
+        self.socket.hostFound.connect(self.handleHostFound)
+        self.socket.connected.connect(self.handleConnected)
+        self.socket.stateChanged.connect(self.handleStateChanged)
+        self.socket.disconnected.connect(self.handleDisconnect)
+        self.socket.readyRead.connect(self.handleReadyRead)
+        self.socket.error.connect(self.handleError)
+        self.signalSchedule.connect(self.schedule, type=PyQt5.QtCore.Qt.QueuedConnection)
+        self.signalDestruct.connect(self.destruct, type=PyQt5.QtCore.Qt.BlockingQueuedConnection)
+        for runner in self.runners:
+            runner.run()
+        self.cycleTimer = PyQt5.QtCore.QTimer(self)
+        self.cycleTimer.setSingleShot(False)
+        self.cycleTimer.timeout.connect(self.doCommand)
+        self.cycleTimer.start(self.CYCLE)
+
+    def stop(self):
+        self.mutexIsRunning.lock()
+        if self.isRunning:
+            self.isRunning = False
+            self.signalDestruct.emit()
+            self.thread.quit()
+            self.thread.wait()
+        self.mutexIsRunning.unlock()
+        self.logger.info('mount connection stopped')
+
+    @PyQt5.QtCore.pyqtSlot()
+    def destruct(self):
+        self.cycleTimer.stop()
+        for runner in self.runners:
+            runner.destruct()
+            runner.handleDisconnect()
+        self.signalDestruct.disconnect(self.destruct)
+        self.signalSchedule.disconnect(self.schedule)
+        self.socket.hostFound.disconnect(self.handleHostFound)
+        self.socket.connected.disconnect(self.handleConnected)
+        self.socket.stateChanged.disconnect(self.handleStateChanged)
+        self.socket.disconnected.disconnect(self.handleDisconnect)
+        self.socket.error.disconnect(self.handleError)
+        self.socket.readyRead.disconnect(self.handleReadyRead)
+        self.socket.abort()
+        self.clearRequests()
+        self.logStatistics()
+
+    def isConnected(self):
+        if not self.socket:
+            return False
+        return self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState
+
+    def commandKnown(self, command):
+        # single commands are only accepted, if we know about their reply
+        return self.framer.commandLength(command) is not None
+
+    def commandName(self, command):
+        for key in self.framer.COMMAND_RETURN:
+            if command.startswith(key):
+                return key
+        return command[:8]
+
+    def sendRequest(self, command, priority, callback=None, key='', queued=None, future=None):
+        # could be called from every thread, the writing to the socket is done in the connection thread.
+        # the callback gets the list of reply fields, one for each command with reply. the returned future
+        # gets the return value of the callback or the fields, when the reply is complete
+        if queued is None:
+            queued = time.time()
+        if future is None:
+            future = concurrent.futures.Future()
+        commandSet = {'command': command,
+                      'priority': priority,
+                      'deadline': queued + self.DEADLINE[priority],
+                      'callback': callback,
+                      'key': key,
+                      'queued': queued,
+                      'future': future,
+                      'reply': list()}
+        self.mutexQueue.lock()
+        waiting = [x for x in self.pending if key and x['key'] == key]
+        if waiting:
+            # same request is already waiting, so no need to ask twice
+            self.mutexQueue.unlock()
+            return waiting[0]['future']
+        self.pending.append(commandSet)
+        self.mutexQueue.unlock()
+        self.signalSchedule.emit()
+        return future
+
+    def selectRequest(self):
+        # requests which missed their deadline first, otherwise by priority, each in order of deadline
+        now = time.time()
+        return min(self.pending, key=lambda x: (x['deadline'] > now, x['priority'], x['deadline']))
+
+    def clearRequests(self):
+        self.mutexQueue.lock()
+        lost = self.pending + self.inFlight
+        self.pending = list()
+        self.inFlight = list()
+        self.framer.clear()
+        self.mutexQueue.unlock()
+        # nobody should wait for replies, which will never come
+        for commandSet in lost:
+            if not commandSet['future'].done():
+                commandSet['future'].set_exception(ConnectionError('Mount connection lost for {0}'.format(commandSet['command'])))
+
+    @PyQt5.QtCore.pyqtSlot()
+    def schedule(self):
+        while self.isRunning and self.isConnected():
+            self.mutexQueue.lock()
+            if not self.pending or len(self.inFlight) >= self.PIPELINE_DEPTH:
+                self.mutexQueue.unlock()
+                return
+            commandSet = self.selectRequest()
+            self.pending.remove(commandSet)
+            commandSet['sent'] = time.time()
+            hasReply = self.framer.expect(commandSet, commandSet['command'])
+            if hasReply:
+                self.inFlight.append(commandSet)
+            self.mutexQueue.unlock()
+            self.socket.write(bytes(commandSet['command'] + '\r', encoding='ascii'))
+            self.socket.flush()
+            if not hasReply:
+                self.completeRequest(commandSet, list())
+
+    def completeRequest(self, commandSet, reply):
+        commandSet['reply'] = reply
+        self.updateStatistics(commandSet, time.time())
+        result = reply
+        if commandSet['callback']:
+            try:
+                result = commandSet['callback'](reply)
+            except Exception as e:
+                self.logger.error('Handling reply of {0} got error: {1}'.format(commandSet['command'], e))
+        if not commandSet['future'].done():
+            commandSet['future'].set_result(result)
+        # to get order in requests, we wait for the firmware version before starting the other runners
+        if not self.runnersStarted and self.data['FW'] > 0:
+            self.startRunners()
+
+    def updateStatistics(self, commandSet, timeDone):
+        # latency of every request type: waiting until sent and until the reply is complete
+        if commandSet['key']:
+            name = commandSet['key']
+        else:
+            name = self.commandName(commandSet['command'])
+        wait = commandSet['sent'] - commandSet['queued']
+        total = timeDone - commandSet['queued']
+        self.mutexStatistics.lock()
+        if name not in self.statistics:
+            self.statistics[name] = {'Number': 0,
+                                     'Wait': 0,
+                                     'WaitMax': 0,
+                                     'Total': 0,
+                                     'TotalMax': 0,
+                                     'Last': 0}
+        stat = self.statistics[name]
+        stat['Number'] += 1
+        stat['Wait'] += wait
+        stat['WaitMax'] = max(stat['WaitMax'], wait)
+        stat['Total'] += total
+        stat['TotalMax'] = max(stat['TotalMax'], total)
+        stat['Last'] = total
+        self.mutexStatistics.unlock()
+
+    def getStatistics(self):
+        # returns mean and max latency in seconds per request type
+        result = dict()
+        self.mutexStatistics.lock()
+        for name in self.statistics:
+            stat = self.statistics[name]
+            result[name] = {'Number': stat['Number'],
+                            'WaitMean': stat['Wait'] / stat['Number'],
+                            'WaitMax': stat['WaitMax'],
+                            'TotalMean': stat['Total'] / stat['Number'],
+                            'TotalMax': stat['TotalMax'],
+                            'Last': stat['Last']}
+        self.mutexStatistics.unlock()
+        return result
+
+    def logStatistics(self):
+        statistics = self.getStatistics()
+        for name in sorted(statistics):
+            stat = statistics[name]
+            self.logger.info('Latency {0:10s} number: {1:5d}, wait mean: {2:6.3f}s max: {3:6.3f}s, total mean: {4:6.3f}s max: {5:6.3f}s'
+                             .format(name, stat['Number'], stat['WaitMean'], stat['WaitMax'], stat['TotalMean'], stat['TotalMax']))
+
+    def startRunners(self):
+        self.runnersStarted = True
+        for runner in self.runners:
+            if runner not in self.startupRunners:
+                runner.handleConnected()
+
+    def doCommand(self):
+        self.doReconnect()
+        self.mutexQueue.lock()
+        timeout = self.inFlight and time.time() - self.inFlight[0]['sent'] > self.REPLY_TIMEOUT
+        self.mutexQueue.unlock()
+        if timeout:
+            # without transaction id in the protocol we can't sync the replies again, so we start over
+            self.logger.error('Reply of {0} timed out, received {1} fields'.format(self.inFlight[0]['command'], len(self.inFlight[0]['reply'])))
+            self.socket.abort()
+            self.connectCounter = 0
+
+    def doReconnect(self):
+        if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.UnconnectedState:
+            if self.connectCounter == 0:
+                self.app.sharedMountDataLock.lockForRead()
+                self.socket.connectToHost(self.data['MountIP'], self.data['MountPort'])
+                self.app.sharedMountDataLock.unlock()
+            else:
+                # connection build up is ongoing
+                pass
+            if self.connectCounter * self.CYCLE > self.CONNECTION_TIMEOUT:
+                self.socket.abort()
+                self.connectCounter = 0
+            else:
+                self.connectCounter += 1
+        else:
+            if self.socket.state() != PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
+                if self.connectCounter * self.CYCLE > self.CONNECTION_TIMEOUT:
+                    self.socket.abort()
+                    self.connectCounter = 0
+                else:
+                    self.connectCounter += 1
+            else:
+                # connected
+                pass
+
+    @PyQt5.QtCore.pyqtSlot()
+    def handleHostFound(self):
+        self.app.sharedMountDataLock.lockForRead()
+        self.logger.debug('Mount connection found at {}:{}'.format(self.data['MountIP'], self.data['MountPort']))
+        self.app.sharedMountDataLock.unlock()
+
+    @PyQt5.QtCore.pyqtSlot()
+    def handleConnected(self):
+        self.app.sharedMountDataLock.lockForRead()
+        self.logger.info('Mount connection connected at {0}:{1}'.format(self.data['MountIP'], self.data['MountPort']))
+        self.app.sharedMountDataLock.unlock()
+        self.clearRequests()
+        self.runnersStarted = False
+        for runner in self.startupRunners:
+            runner.handleConnected()
+
+    @PyQt5.QtCore.pyqtSlot(PyQt5.QtNetwork.QAbstractSocket.SocketError)
+    def handleError(self, socketError):
+        self.logger.warning('Mount connection fault: {0}'.format(socketError))
+
+    @PyQt5.QtCore.pyqtSlot()
+    def handleStateChanged(self):
+        self.logger.debug('Mount connection has state: {0}'.format(self.socket.state()))
+
+    @PyQt5.QtCore.pyqtSlot()
+    def handleDisconnect(self):
+        self.logger.info('Mount connection is disconnected from host')
+        self.clearRequests()
+        self.runnersStarted = False
+        for runner in self.runners:
+            runner.handleDisconnect()
+
+    @PyQt5.QtCore.pyqtSlot()
+    def handleReadyRead(self):
+        while self.socket.bytesAvailable() and self.isRunning:
+            data = bytes(self.socket.read(4000))
+            # fields are parsed as soon as they arrive, so there is no rescanning of the whole reply
+            completed = list()
+            self.mutexQueue.lock()
+            for commandSet, fields, complete in self.framer.feed(data):
+                commandSet['reply'] = fields
+                if complete:
+                    self.inFlight.remove(commandSet)
+                    completed.append(commandSet)
+            self.mutexQueue.unlock()
+            for commandSet in completed:
+                self.completeRequest(commandSet, commandSet['reply'])
+        self.schedule()
@@ -18,11 +18,14 @@
 #
 ###########################################################
 import logging
+import os
 import time
 import PyQt5
 import queue
 import math
 import copy
+import types
+from mount import mount_connection
 from mount import mount_command
 from mount import mount_statusfast
 from mount import mount_statusmedium
@@ -32,9 +35,10 @@ from mount import mount_getalignmodel
 from mount import mount_setalignmodel
 from mount import mount_getmodelnames
 from mount import mount_modelhandling
+from mount import mount_modelsolver
+from mount import mount_telemetry
 from analyse import analysedata
 from baseclasses import checkIP
-from astrometry import transform
 
 
 class MountDispatcher(PyQt5.QtCore.QThread):
@@ -51,8 +55,11 @@ class MountDispatcher(PyQt5.QtCore.QThread):
     signalMountShowAlignmentModel = PyQt5.QtCore.pyqtSignal()
     signalMountShowModelNames = PyQt5.QtCore.pyqtSignal()
     signalSlewFinished = PyQt5.QtCore.pyqtSignal()
+    signalSlewStarted = PyQt5.QtCore.pyqtSignal()
 
     CYCLE = 200
+    # time in seconds to wait for alignment model transfers
+    MODEL_TIMEOUT = 30
     signalDestruct = PyQt5.QtCore.pyqtSignal()
 
     statusReference = {
@@ -104,63 +111,54 @@ class MountDispatcher(PyQt5.QtCore.QThread):
         self.isRunning = False
         self.mutexIsRunning = PyQt5.QtCore.QMutex()
         self.mutexIPChange = PyQt5.QtCore.QMutex()
+        # readers get a frozen copy of data, which is replaced as a whole after every change
+        self.mutexPublish = PyQt5.QtCore.QMutex()
+        self.mountSnapshot = types.MappingProxyType(dict())
         self.commandDispatcherQueue = queue.Queue()
         self.cycleTimer = None
         # getting all supporting classes assigned
         self.mountModelHandling = mount_modelhandling.MountModelHandling(self.app, self.data)
         self.analyse = analysedata.Analyse(self.app)
-        self.transform = transform.Transform(self.app)
+        self.transform = self.app.transform
         self.checkIP = checkIP.CheckIP()
-
-        # getting all threads setup
-        # commands sending thread
-        self.threadMountCommandRunner = PyQt5.QtCore.QThread()
-        self.workerMountCommandRunner = mount_command.MountCommandRunner(self.app, self.threadMountCommandRunner, self.data, self.signalMountConnected, self.mountStatus)
-        self.threadMountCommandRunner.setObjectName("MountCommandRunner")
-        self.workerMountCommandRunner.moveToThread(self.threadMountCommandRunner)
-        self.threadMountCommandRunner.started.connect(self.workerMountCommandRunner.run)
-        # fast status thread
-        self.threadMountStatusRunnerFast = PyQt5.QtCore.QThread()
-        self.workerMountStatusRunnerFast = mount_statusfast.MountStatusRunnerFast(self.app, self.threadMountStatusRunnerFast, self.data, self.signalMountConnected, self.mountStatus)
-        self.threadMountStatusRunnerFast.setObjectName("MountStatusRunnerFast")
-        self.workerMountStatusRunnerFast.moveToThread(self.threadMountStatusRunnerFast)
-        self.threadMountStatusRunnerFast.started.connect(self.workerMountStatusRunnerFast.run)
-        # medium status thread
-        self.threadMountStatusRunnerMedium = PyQt5.QtCore.QThread()
-        self.workerMountStatusRunnerMedium = mount_statusmedium.MountStatusRunnerMedium(self.app, self.threadMountStatusRunnerMedium, self.data, self.signalMountConnected, self.mountStatus)
-        self.threadMountStatusRunnerMedium.setObjectName("MountStatusRunnerMedium")
-        self.workerMountStatusRunnerMedium.moveToThread(self.threadMountStatusRunnerMedium)
-        self.threadMountStatusRunnerMedium.started.connect(self.workerMountStatusRunnerMedium.run)
-        # slow status thread
-        self.threadMountStatusRunnerSlow = PyQt5.QtCore.QThread()
-        self.workerMountStatusRunnerSlow = mount_statusslow.MountStatusRunnerSlow(self.app, self.threadMountStatusRunnerSlow, self.data, self.signalMountConnected, self.mountStatus)
-        self.threadMountStatusRunnerSlow.setObjectName("MountStatusRunnerSlow")
-        self.workerMountStatusRunnerSlow.moveToThread(self.threadMountStatusRunnerSlow)
-        self.threadMountStatusRunnerSlow.started.connect(self.workerMountStatusRunnerSlow.run)
-        # once status thread
-        self.threadMountStatusRunnerOnce = PyQt5.QtCore.QThread()
-        self.workerMountStatusRunnerOnce = mount_statusonce.MountStatusRunnerOnce(self.app, self.threadMountStatusRunnerOnce, self.data, self.signalMountConnected, self.mountStatus)
-        self.threadMountStatusRunnerOnce.setObjectName("MountStatusRunnerOnce")
-        self.workerMountStatusRunnerOnce.moveToThread(self.threadMountStatusRunnerOnce)
-        self.threadMountStatusRunnerOnce.started.connect(self.workerMountStatusRunnerOnce.run)
+        # history of the fast status values, filled by the fast status runner
+        self.mountTelemetry = mount_telemetry.MountTelemetry()
+
+        # getting the connection setup, all runners share one socket and thread
+        self.threadMountConnection = PyQt5.QtCore.QThread()
+        self.workerMountConnection = mount_connection.MountConnection(self.app, self.threadMountConnection, self.data)
+        self.threadMountConnection.setObjectName("MountConnection")
+        self.workerMountConnection.moveToThread(self.threadMountConnection)
+        self.threadMountConnection.started.connect(self.workerMountConnection.run)
+        # once status has to be first, it gets the firmware data
+        self.workerMountStatusRunnerOnce = mount_statusonce.MountStatusRunnerOnce(self.app, self.workerMountConnection, self.data, self.signalMountConnected, self.mountStatus)
+        self.workerMountConnection.addRunner(self.workerMountStatusRunnerOnce, startup=True)
+        # commands sending
+        self.workerMountCommandRunner = mount_command.MountCommandRunner(self.app, self.workerMountConnection, self.data, self.signalMountConnected, self.mountStatus)
+        self.workerMountConnection.addRunner(self.workerMountCommandRunner)
+        # fast status
+        self.workerMountStatusRunnerFast = mount_statusfast.MountStatusRunnerFast(self.app, self.workerMountConnection, self.data, self.signalMountConnected, self.mountStatus)
+        self.workerMountConnection.addRunner(self.workerMountStatusRunnerFast)
+        # medium status
+        self.workerMountStatusRunnerMedium = mount_statusmedium.MountStatusRunnerMedium(self.app, self.workerMountConnection, self.data, self.signalMountConnected, self.mountStatus)
+        self.workerMountConnection.addRunner(self.workerMountStatusRunnerMedium)
+        # slow status
+        self.workerMountStatusRunnerSlow = mount_statusslow.MountStatusRunnerSlow(self.app, self.workerMountConnection, self.data, self.signalMountConnected, self.mountStatus)
+        self.workerMountConnection.addRunner(self.workerMountStatusRunnerSlow)
+        # the polling rates follow the mount state, which is known by fast status
+        self.signalSlewStarted.connect(self.workerMountStatusRunnerFast.setSlewStarted)
+        self.workerMountStatusRunnerFast.signalPollingMode.connect(self.workerMountStatusRunnerMedium.setPollingMode)
+        self.workerMountStatusRunnerFast.signalPollingMode.connect(self.workerMountStatusRunnerSlow.setPollingMode)
+        self.publishData()
         # get alignment model
-        self.threadMountGetAlignmentModel = PyQt5.QtCore.QThread()
-        self.workerMountGetAlignmentModel = mount_getalignmodel.MountGetAlignmentModel(self.app, self.threadMountGetAlignmentModel, self.data, self.signalMountConnected, self.mountStatus)
-        self.threadMountGetAlignmentModel.setObjectName("MountGetAlignmentModel")
-        self.workerMountGetAlignmentModel.moveToThread(self.threadMountGetAlignmentModel)
-        self.threadMountGetAlignmentModel.started.connect(self.workerMountGetAlignmentModel.run)
+        self.workerMountGetAlignmentModel = mount_getalignmodel.MountGetAlignmentModel(self.app, self.workerMountConnection, self.data, self.signalMountConnected, self.mountStatus)
+        self.workerMountConnection.addRunner(self.workerMountGetAlignmentModel)
         # set alignment model
-        self.threadMountSetAlignmentModel = PyQt5.QtCore.QThread()
-        self.workerMountSetAlignmentModel = mount_setalignmodel.MountSetAlignmentModel(self.app, self.threadMountSetAlignmentModel, self.data, self.signalMountConnected, self.mountStatus)
-        self.threadMountSetAlignmentModel.setObjectName("MountSetAlignmentModel")
-        self.workerMountSetAlignmentModel.moveToThread(self.threadMountSetAlignmentModel)
-        self.threadMountSetAlignmentModel.started.connect(self.workerMountSetAlignmentModel.run)
+        self.workerMountSetAlignmentModel = mount_setalignmodel.MountSetAlignmentModel(self.app, self.workerMountConnection, self.data, self.signalMountConnected, self.mountStatus)
+        self.workerMountConnection.addRunner(self.workerMountSetAlignmentModel)
         # get model names
-        self.threadMountGetModelNames = PyQt5.QtCore.QThread()
-        self.workerMountGetModelNames = mount_getmodelnames.MountGetModelNames(self.app, self.threadMountGetModelNames, self.data, self.signalMountConnected, self.mountStatus)
-        self.threadMountGetModelNames.setObjectName("MountGetModelNames")
-        self.workerMountGetModelNames.moveToThread(self.threadMountGetModelNames)
-        self.threadMountGetModelNames.started.connect(self.workerMountGetModelNames.run)
+        self.workerMountGetModelNames = mount_getmodelnames.MountGetModelNames(self.app, self.workerMountConnection, self.data, self.signalMountConnected, self.mountStatus)
+        self.workerMountConnection.addRunner(self.workerMountGetModelNames)
 
         self.cancelRunTargetRMS = False
         self.runTargetRMS = False
@@ -266,6 +264,15 @@ class MountDispatcher(PyQt5.QtCore.QThread):
                 self.app.ui.checkAutoRefractionNotTracking.setChecked(self.app.config['CheckAutoRefractionNotTracking'])
             if 'CheckAutoRefractionNone' in self.app.config:
                 self.app.ui.checkAutoRefractionNone.setChecked(self.app.config['CheckAutoRefractionNone'])
+            if 'MountTelemetryRecord' in self.app.config:
+                if self.app.config['MountTelemetryRecord']:
+                    self.mountTelemetry.setDirectory(os.getcwd() + '/telemetry')
+            if 'MountPollingFast' in self.app.config:
+                self.workerMountStatusRunnerFast.setPollingCycles(self.app.config['MountPollingFast'])
+            if 'MountPollingMedium' in self.app.config:
+                self.workerMountStatusRunnerMedium.setPollingCycles(self.app.config['MountPollingMedium'])
+            if 'MountPollingSlow' in self.app.config:
+                self.workerMountStatusRunnerSlow.setPollingCycles(self.app.config['MountPollingSlow'])
             # if we have already stored the site data, we use it until we get new information from mount
             if 'SiteLongitude' in self.app.config:
                 self.data['SiteLongitude'] = copy.copy(self.app.config['SiteLongitude'])
@@ -280,6 +287,7 @@ class MountDispatcher(PyQt5.QtCore.QThread):
             self.logger.error('item in config.cfg not be initialize, error:{0}'.format(e))
         finally:
             pass
+        self.publishData()
 
     def storeConfig(self):
         self.app.config['MountIP'] = self.app.ui.le_mountIP.text()
@@ -287,12 +295,35 @@ class MountDispatcher(PyQt5.QtCore.QThread):
         self.app.config['CheckAutoRefractionContinuous'] = self.app.ui.checkAutoRefractionContinous.isChecked()
         self.app.config['CheckAutoRefractionNotTracking'] = self.app.ui.checkAutoRefractionNotTracking.isChecked()
         self.app.config['CheckAutoRefractionNone'] = self.app.ui.checkAutoRefractionNone.isChecked()
+        self.app.config['MountTelemetryRecord'] = (self.mountTelemetry.directory != '')
+        self.app.config['MountPollingFast'] = self.workerMountStatusRunnerFast.getPollingCycles()
+        self.app.config['MountPollingMedium'] = self.workerMountStatusRunnerMedium.getPollingCycles()
+        self.app.config['MountPollingSlow'] = self.workerMountStatusRunnerSlow.getPollingCycles()
         # if we had a connection to the mount, the site data should be there.
         if self.mountStatus['Once']:
             self.app.config['SiteLongitude'] = copy.copy(self.data['SiteLongitude'])
             self.app.config['SiteLatitude'] = copy.copy(self.data['SiteLatitude'])
             self.app.config['SiteHeight'] = copy.copy(self.data['SiteHeight'])
 
+    def publishData(self):
+        # writers call this after unlocking their changes. values in data are replaced and not changed in
+        # place, so a shallow copy is enough and readers need no lock
+        self.mutexPublish.lock()
+        self.app.sharedMountDataLock.lockForRead()
+        snapshot = types.MappingProxyType(dict(self.data))
+        self.app.sharedMountDataLock.unlock()
+        self.mountSnapshot = snapshot
+        self.mutexPublish.unlock()
+
+    def getSnapshot(self):
+        return self.mountSnapshot
+
+    def setData(self, key, value):
+        self.app.sharedMountDataLock.lockForWrite()
+        self.data[key] = value
+        self.app.sharedMountDataLock.unlock()
+        self.publishData()
+
     def setCancelRunTargetRMS(self):
         self.cancelRunTargetRMS = True
 
@@ -302,34 +333,21 @@ class MountDispatcher(PyQt5.QtCore.QThread):
         if self.isRunning:
             # stopping thread for chang of parameters
             self.logger.info('Stopping threads for IP change')
-            self.workerMountStatusRunnerFast.stop()
-            self.workerMountStatusRunnerMedium.stop()
-            self.workerMountStatusRunnerSlow.stop()
-            self.workerMountStatusRunnerOnce.stop()
-            self.workerMountGetAlignmentModel.stop()
-            self.workerMountSetAlignmentModel.stop()
-            self.workerMountCommandRunner.stop()
-            self.workerMountGetModelNames.stop()
+            self.workerMountConnection.stop()
             self.app.sharedMountDataLock.lockForWrite()
             self.data['MountIP'] = self.app.ui.le_mountIP.text()
             self.data['MountMAC'] = self.app.ui.le_mountMAC.text()
             self.logger.info('Setting IP address for mount to: {0}'.format(self.data['MountIP']))
             self.app.sharedMountDataLock.unlock()
             # and restarting for using new parameters
-            self.threadMountCommandRunner.start()
-            self.threadMountGetModelNames.start()
-            self.threadMountSetAlignmentModel.start()
-            self.threadMountGetAlignmentModel.start()
-            self.threadMountStatusRunnerOnce.start()
-            self.threadMountStatusRunnerSlow.start()
-            self.threadMountStatusRunnerMedium.start()
-            self.threadMountStatusRunnerFast.start()
+            self.threadMountConnection.start()
         else:
             self.logger.info('IP change when threads not running')
             self.app.sharedMountDataLock.lockForWrite()
             self.data['MountIP'] = self.app.ui.le_mountIP.text()
             self.data['MountMAC'] = self.app.ui.le_mountMAC.text()
             self.app.sharedMountDataLock.unlock()
+        self.publishData()
         self.app.messageQueue.put('Setting IP address for mount to: {0}\n'.format(self.data['MountIP']))
         self.mutexIPChange.unlock()
 
@@ -342,14 +360,7 @@ class MountDispatcher(PyQt5.QtCore.QThread):
         if not self.isRunning:
             self.isRunning = True
         self.mutexIsRunning.unlock()
-        self.threadMountCommandRunner.start()
-        self.threadMountSetAlignmentModel.start()
-        self.threadMountGetModelNames.start()
-        self.threadMountGetAlignmentModel.start()
-        self.threadMountStatusRunnerOnce.start()
-        self.threadMountStatusRunnerSlow.start()
-        self.threadMountStatusRunnerMedium.start()
-        self.threadMountStatusRunnerFast.start()
+        self.threadMountConnection.start()
         self.signalDestruct.connect(self.destruct, type=PyQt5.QtCore.Qt.BlockingQueuedConnection)
         self.cycleTimer = PyQt5.QtCore.QTimer(self)
         self.cycleTimer.setSingleShot(False)
@@ -370,14 +381,8 @@ class MountDispatcher(PyQt5.QtCore.QThread):
     @PyQt5.QtCore.pyqtSlot()
     def destruct(self):
         self.cycleTimer.stop()
-        self.workerMountStatusRunnerFast.stop()
-        self.workerMountStatusRunnerMedium.stop()
-        self.workerMountStatusRunnerSlow.stop()
-        self.workerMountStatusRunnerOnce.stop()
-        self.workerMountGetAlignmentModel.stop()
-        self.workerMountSetAlignmentModel.stop()
-        self.workerMountGetModelNames.stop()
-        self.workerMountCommandRunner.stop()
+        self.workerMountConnection.stop()
+        self.mountTelemetry.flush()
         self.signalDestruct.disconnect(self.destruct)
         self.app.ui.le_mountIP.editingFinished.disconnect(self.changedSettings)
 
@@ -545,41 +550,31 @@ class MountDispatcher(PyQt5.QtCore.QThread):
 
     def mountShutdown(self):
         # mount has to run
-        if self.workerMountCommandRunner.socket.state() != PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
+        if not self.workerMountConnection.isConnected():
             return
-        commandSet = {'command': ':shutdown#', 'reply': ''}
-        self.app.mountCommandQueue.put(commandSet)
-        while len(commandSet['reply']) == 0:
-            time.sleep(0.1)
-        if commandSet['reply'] == '1':
-            self.workerMountCommandRunner.connected = False
+        reply = self.app.mountCommandQueue.getReply(self.app.mountCommandQueue.sendCommand(':shutdown#'))
+        if reply == '1':
             time.sleep(1)
             self.logger.info('Shutdown mount manually')
             self.app.messageQueue.put('Shutting mount down !\n')
         else:
-            self.logger.error('error: {0}'.format(commandSet['reply']))
+            self.logger.error('error: {0}'.format(reply))
             self.app.messageQueue.put('#BRError in mount shutdown\n')
 
     def flipMount(self):
-        commandSet = {'command': ':FLIP#', 'reply': ''}
-        self.app.mountCommandQueue.put(commandSet)
-        while len(commandSet['reply']) == 0:
-            time.sleep(0.1)
-        if commandSet['reply'] == '0':
+        reply = self.app.mountCommandQueue.getReply(self.app.mountCommandQueue.sendCommand(':FLIP#'))
+        if reply != '1':
             self.app.messageQueue.put('#BRFlip Mount could not be executed\n')
-            self.logger.error('error: {0}'.format(commandSet['reply']))
+            self.logger.error('error: {0}'.format(reply))
 
     def syncMountModel(self, ra, dec):
         self.logger.info('ra:{0} dec:{1}'.format(ra, dec))
         self.app.mountCommandQueue.put(':Sr{0}#'.format(ra))
         self.app.mountCommandQueue.put(':Sd{0}#'.format(dec))
         self.app.mountCommandQueue.put(':CMCFG0#')
-        # send sync command
-        commandSet = {'command': ':CM#', 'reply': ''}
-        self.app.mountCommandQueue.put(commandSet)
-        while len(commandSet['reply']) == 0:
-            time.sleep(0.1)
-        if commandSet['reply'][:5] == 'Coord':
+        # send sync command, the queue keeps the order, so we only wait for the last reply
+        reply = self.app.mountCommandQueue.getReply(self.app.mountCommandQueue.sendCommand(':CM#'))
+        if reply[:5] == 'Coord':
             self.logger.info('Mount modeling synced')
             return True
         else:
@@ -589,23 +584,19 @@ class MountDispatcher(PyQt5.QtCore.QThread):
     def programBatchData(self, data):
         if not('RaJNow' in data and 'DecJNow' in data):
             self.logger.warning('RaJNow or DecJNow not in data file')
-            self.messageQueue.put('Mount coordinates missing\n')
+            self.app.messageQueue.put('Mount coordinates missing\n')
             return
         if not('RaJNowSolved' in data and 'DecJNowSolved' in data):
             self.logger.warning('RaJNowSolved or DecJNowSolved not in data file')
-            self.messageQueue.put('Solved data missing\n')
+            self.app.messageQueue.put('Solved data missing\n')
             return
         if not('Pierside' in data and 'LocalSiderealTimeFloat' in data):
             self.logger.warning('Pierside and LocalSiderealTimeFloat not in data file')
-            self.messageQueue.put('Time and Pierside missing\n')
+            self.app.messageQueue.put('Time and Pierside missing\n')
             return
         self.app.messageQueue.put('#BWProgramming alignment model data\n')
-        self.workerMountSetAlignmentModel.result = None
-        self.workerMountSetAlignmentModel.setAlignmentModel(data)
-        while self.workerMountSetAlignmentModel.result is None:
-            time.sleep(0.1)
-            PyQt5.QtWidgets.QApplication.processEvents()
-        if self.workerMountSetAlignmentModel.result:
+        future = self.workerMountSetAlignmentModel.setAlignmentModel(data)
+        if self.app.mountCommandQueue.getReply(future, self.MODEL_TIMEOUT):
             self.logger.info('Model successful finished!')
             self.app.messageQueue.put('#BWProgrammed alignment model with {0} points\n'.format(len(data['Index'])))
         else:
@@ -623,6 +614,8 @@ class MountDispatcher(PyQt5.QtCore.QThread):
         if condition:
             self.runTargetRMS = False
             return
+        # first try to reach the target with one batch of deletions, then continue point by point
+        self.runTargetRMSBatch()
         while True:
             self.app.sharedMountDataLock.lockForRead()
             data = self.data['RMS']
@@ -639,21 +632,59 @@ class MountDispatcher(PyQt5.QtCore.QThread):
             self.app.messageQueue.put('#BWTarget RMS Run finished\n')
         self.runTargetRMS = False
 
-    def reloadAlignmentModel(self):
-        self.workerMountGetAlignmentModel.getAlignmentModel()
-        # wait form alignment model to be downloaded
-        while True:
-            self.app.sharedMountDataLock.lockForRead()
-            condition = not self.data['ModelLoading']
+    def modelPierside(self, hourAngle):
+        # pier side from the modeling data if it belongs to the actual model, otherwise from the hour angle
+        modelingData = self.app.workerModelingDispatcher.modelingRunner.modelAlignmentData
+        if 'Pierside' in modelingData and len(modelingData['Pierside']) == len(hourAngle):
+            return [1 if x == 'W' else -1 for x in modelingData['Pierside']]
+        return [1 if (x + 12) % 24 - 12 < 0 else -1 for x in hourAngle]
+
+    def runTargetRMSBatch(self):
+        self.app.sharedMountDataLock.lockForRead()
+        if 'ModelHourAngle' not in self.data or len(self.data['ModelHourAngle']) != self.data['Number']:
             self.app.sharedMountDataLock.unlock()
-            if condition:
+            return
+        hourAngle = list(self.data['ModelHourAngle'])
+        declination = list(self.data['ModelDeclination'])
+        error = list(self.data['ModelError'])
+        errorAngle = list(self.data['ModelErrorAngle'])
+        self.app.sharedMountDataLock.unlock()
+        solver = mount_modelsolver.PointingModelSolver(self.app.transform.site[0])
+        result = solver.predictDeletion(hourAngle, declination, self.modelPierside(hourAngle), error, errorAngle, float(self.app.ui.targetRMS.value()))
+        if not result['Reliable']:
+            self.app.messageQueue.put('Model of mount could not be reproduced, deleting points one by one\n')
+            return
+        if not result['Delete']:
+            return
+        self.app.messageQueue.put('Deleting {0} points in one batch, predicted RMS:  {1:05.1f}\n'.format(len(result['Delete']), result['RMS']))
+        # deleting from the highest index, so the index of the other points doesn't change
+        for index in sorted(result['Delete'], reverse=True):
+            if self.cancelRunTargetRMS:
                 break
-            time.sleep(0.2)
+            reply = self.app.mountCommandQueue.getReply(self.app.mountCommandQueue.sendCommand(':delalst{0:d}#'.format(index + 1)))
+            if reply != '1':
+                self.app.messageQueue.put('#BR\tPoint could not be deleted \n')
+                self.logger.warning('Point {0} could not be deleted'.format(index + 1))
+                break
+        self.reloadAlignmentModel()
+        # cross check of the prediction with the model of the mount
+        self.app.sharedMountDataLock.lockForRead()
+        mountRMS = self.data['RMS']
+        self.app.sharedMountDataLock.unlock()
+        self.app.messageQueue.put('\tMount RMS:  {0:05.1f}, predicted RMS:  {1:05.1f}\n'.format(mountRMS, result['RMS']))
+        self.logger.info('Batch deletion of {0}, mount RMS: {1}, predicted RMS: {2}'.format(result['Delete'], mountRMS, result['RMS']))
+
+    def reloadAlignmentModel(self):
+        future = self.workerMountGetAlignmentModel.getAlignmentModel()
+        # wait for alignment model to be downloaded
+        if future:
+            self.app.mountCommandQueue.getReply(future, self.MODEL_TIMEOUT)
 
     def deleteWorstPoint(self):
         # if there are less than 4 point, optimization can't take place
         self.app.sharedMountDataLock.lockForRead()
         if self.data['Number'] < 4:
+            self.app.sharedMountDataLock.unlock()
             return True
         # find worst point
         maxError = 0
@@ -668,12 +699,8 @@ class MountDispatcher(PyQt5.QtCore.QThread):
                                           self.data['ModelAltitude'][worstPointIndex],
                                           maxError))
         self.app.sharedMountDataLock.unlock()
-        commandSet = {'command': ':delalst{0:d}#'.format(worstPointIndex + 1), 'reply': ''}
-        self.app.mountCommandQueue.put(commandSet)
-        while len(commandSet['reply']) == 0:
-            time.sleep(0.1)
-        time.sleep(0.2)
-        if commandSet['reply'] == '1':
+        reply = self.app.mountCommandQueue.getReply(self.app.mountCommandQueue.sendCommand(':delalst{0:d}#'.format(worstPointIndex + 1)))
+        if reply == '1':
             # point could be deleted, feedback from mount ok
             self.logger.info('Deleting worst point {0} with error of:  {1}'.format(worstPointIndex+1, maxError))
             # get new calculated alignment model from mount
@@ -681,15 +708,8 @@ class MountDispatcher(PyQt5.QtCore.QThread):
         else:
             self.app.messageQueue.put('#BR\tPoint could not be deleted \n')
             self.logger.warning('Point {0} could not be deleted'.format(worstPointIndex))
-        self.workerMountGetAlignmentModel.getAlignmentModel()
-        # wait form alignment model to be downloaded
-        while True:
-            self.app.sharedMountDataLock.lockForRead()
-            condition = not self.data['ModelLoading']
-            self.app.sharedMountDataLock.unlock()
-            if condition:
-                break
-            time.sleep(0.2)
+        # get new calculated alignment model from mount
+        self.reloadAlignmentModel()
 
     def retrofitMountData(self, modelingData):
         self.app.sharedMountDataLock.lockForRead()
@@ -0,0 +1,182 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+import logging
+from collections import deque
+
+
+class MountReplyFramer:
+    logger = logging.getLogger(__name__)
+
+    # define the number of bytes for the return bytes in case of not having them in bulk mode
+    # this is needed, because the mount computer  doesn't support a transaction base like number of
+    # bytes to be expected. it's just plain data and i have to find out myself how much it is.
+    # all commands not in the list are answered with a reply terminated by #
+    # -2 is a status byte, which is followed by a text terminated by # if the status is not 0
+    COMMAND_RETURN = {':AP#': 0,
+                      ':hP#': 0,
+                      ':PO#': 0,
+                      ':RT0#': 0,
+                      ':RT1#': 0,
+                      ':RT2#': 0,
+                      ':RT9#': 0,
+                      ':STOP#': 0,
+                      ':U2#': 0,
+                      ':modelld0': 2,
+                      ':modelsv0': 2,
+                      ':modeldel0': 2,
+                      ':delalst': 2,
+                      ':delalig': 1,
+                      ':SRPRS': 1,
+                      ':SRTMP': 1,
+                      ':Sz': 1,
+                      ':Sa': 1,
+                      ':Sr': 1,
+                      ':Sd': 1,
+                      ':MA#': -2,
+                      ':MS#': -2,
+                      ':shutdown': 1,
+                      ':Sw': 1,
+                      ':Sdat': 1,
+                      ':Suaf': 1,
+                      ':FLIP': 1,
+                      ':So': 1,
+                      ':Sh': 1,
+                      ':SREF': 1,
+                      ':CM#': 27,
+                      ':CMS#': 1,
+                      ':Gr#': 12,
+                      ':Gd#': 12,
+                      ':newalig#': 2,
+                      ':endalig#': 2,
+                      ':CMCFG': 1,
+                      # status flags are sent without terminator
+                      ':GREF#': 1,
+                      ':Guaf#': 1,
+                      ':Gdat#': 1}
+
+    def __init__(self):
+        self.buffer = bytearray()
+        # start of the field actually received and position up to which it is scanned
+        self.start = 0
+        self.position = 0
+        self.frames = deque()
+
+    @classmethod
+    def commandLength(cls, command):
+        # returns the number of bytes of the reply, -1 for replies terminated by #, -2 for a status byte
+        # with optional text and None if unknown
+        for key in cls.COMMAND_RETURN:
+            if command.startswith(key):
+                return cls.COMMAND_RETURN[key]
+        return None
+
+    @classmethod
+    def splitCommand(cls, command):
+        # a combined command string like :U2#:GS#:Ginfo#: is split into single commands
+        return [':' + x.lstrip(':') + '#' for x in command.split('#') if len(x.lstrip(':')) > 0]
+
+    @classmethod
+    def fieldSpecs(cls, command):
+        # list of reply lengths for all commands in a combined command string, which have a reply
+        specs = list()
+        for single in cls.splitCommand(command):
+            length = cls.commandLength(single)
+            if length is None:
+                specs.append(-1)
+            elif length > 0 or length == -2:
+                specs.append(length)
+        return specs
+
+    def expect(self, request, command):
+        # registers the reply of the next command on the wire, returns false if there is no reply
+        specs = self.fieldSpecs(command)
+        if not specs:
+            return False
+        self.frames.append({'request': request,
+                            'specs': specs,
+                            'fields': list()})
+        return True
+
+    def clear(self):
+        self.buffer = bytearray()
+        self.start = 0
+        self.position = 0
+        self.frames.clear()
+
+    def pending(self):
+        return len(self.buffer) - self.start
+
+    def decodeField(self, data, terminated):
+        value = data.decode('ascii', errors='replace')
+        # a corrupted field is replaced, but the frame boundaries are kept intact
+        if any(x < 0x20 or x > 0x7e for x in data):
+            self.logger.warning('Received corrupted field: {0}'.format(value))
+            return ''
+        if terminated:
+            return value
+        return value.rstrip('#')
+
+    def feed(self, data):
+        # yields (request, fields, complete) for every field as soon as it is complete
+        self.buffer += data
+        while self.frames:
+            frame = self.frames[0]
+            length = frame['specs'][len(frame['fields'])]
+            if length == -1:
+                end = self.buffer.find(b'#', self.position)
+                if end == -1:
+                    self.position = len(self.buffer)
+                    break
+                field = self.decodeField(bytes(self.buffer[self.start:end]), True)
+                self.start = end + 1
+            elif length == -2:
+                if len(self.buffer) - self.start < 1:
+                    break
+                if self.buffer[self.start:self.start + 1] == b'0':
+                    field = '0'
+                    self.start += 1
+                else:
+                    # a rejected command is answered with the status and the reason like 1Object below horizon#
+                    end = self.buffer.find(b'#', max(self.position, self.start + 1))
+                    if end == -1:
+                        self.position = len(self.buffer)
+                        break
+                    field = self.decodeField(bytes(self.buffer[self.start:end]), True)
+                    self.start = end + 1
+            else:
+                if len(self.buffer) - self.start < length:
+                    break
+                field = self.decodeField(bytes(self.buffer[self.start:self.start + length]), False)
+                self.start += length
+            self.position = self.start
+            frame['fields'].append(field)
+            complete = len(frame['fields']) == len(frame['specs'])
+            if complete:
+                self.frames.popleft()
+            yield frame['request'], frame['fields'], complete
+        if not self.frames and self.start < len(self.buffer):
+            self.logger.warning('Received data without request: {0}'.format(bytes(self.buffer[self.start:])))
+            self.start = len(self.buffer)
+            self.position = self.start
+        # compacting the buffer from time to time
+        if self.start > 4096 or self.start == len(self.buffer):
+            del self.buffer[:self.start]
+            self.position -= self.start
+            self.start = 0
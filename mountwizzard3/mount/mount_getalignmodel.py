@@ -18,196 +18,108 @@
 #
 ############################################################
 import logging
+import concurrent.futures
 import PyQt5
-import time
-from queue import Queue
-from astrometry import transform
 
 
 class MountGetAlignmentModel(PyQt5.QtCore.QObject):
     logger = logging.getLogger(__name__)
 
-    CONNECTION_TIMEOUT = 2000
-    CYCLE = 250
-    signalDestruct = PyQt5.QtCore.pyqtSignal()
-
-    def __init__(self, app, thread, data, signalConnected, mountStatus):
+    def __init__(self, app, connection, data, signalConnected, mountStatus):
         super().__init__()
 
         self.app = app
-        self.thread = thread
+        self.connection = connection
         self.data = data
         self.signalConnected = signalConnected
         self.mountStatus = mountStatus
-        self.mutexIsRunning = PyQt5.QtCore.QMutex()
-        self.isRunning = False
-        self.connectCounter = 0
-        self.socket = None
-        self.sendLock = False
-        self.cycleTimer = None
-        self.messageString = ''
-        self.sendCommandQueue = Queue()
-        self.transform = transform.Transform(self.app)
+        self.transform = self.app.transform
+        self.mutexModelFuture = PyQt5.QtCore.QMutex()
+        self.modelFuture = None
+        # the model is only downloaded, if the fingerprint of getalst and getain changed.
+        # the conversion of the point data is cached by the raw point string
+        self.fingerprint = None
+        self.modelCache = dict()
+        self.pointCache = dict()
 
     def run(self):
         self.logger.info('mount get align started')
-        self.mutexIsRunning.lock()
-        if not self.isRunning:
-            self.isRunning = True
-        self.mutexIsRunning.unlock()
-        self.socket = PyQt5.QtNetwork.QTcpSocket()
-        self.socket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.LowDelayOption, 1)
-        self.socket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.KeepAliveOption, 1)
-        self.socket.hostFound.connect(self.handleHostFound)
-        self.socket.connected.connect(self.handleConnected)
-        self.socket.stateChanged.connect(self.handleStateChanged)
-        self.socket.disconnected.connect(self.handleDisconnect)
-        self.socket.readyRead.connect(self.handleReadyRead)
-        self.socket.error.connect(self.handleError)
-
-        self.signalDestruct.connect(self.destruct, type=PyQt5.QtCore.Qt.BlockingQueuedConnection)
-        self.cycleTimer = PyQt5.QtCore.QTimer(self)
-        self.cycleTimer.setSingleShot(False)
-        self.cycleTimer.timeout.connect(self.doCommand)
-        self.cycleTimer.start(self.CYCLE)
-
-    def stop(self):
-        self.mutexIsRunning.lock()
-        if self.isRunning:
-            self.isRunning = False
-            self.signalDestruct.emit()
-            self.signalConnected.emit({'GetAlign': False})
-            self.thread.quit()
-            self.thread.wait()
-        self.mutexIsRunning.unlock()
-        self.logger.info('mount get align stopped')
 
-    @PyQt5.QtCore.pyqtSlot()
     def destruct(self):
-        self.cycleTimer.stop()
-        self.signalDestruct.disconnect(self.destruct)
-        self.socket.hostFound.disconnect(self.handleHostFound)
-        self.socket.connected.disconnect(self.handleConnected)
-        self.socket.stateChanged.disconnect(self.handleStateChanged)
-        self.socket.disconnected.disconnect(self.handleDisconnect)
-        self.socket.error.disconnect(self.handleError)
-        self.socket.readyRead.disconnect(self.handleReadyRead)
-        self.socket.abort()
-
-    def doCommand(self):
-        self.doReconnect()
-        if not self.sendCommandQueue.empty() and (self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState):
-            command = self.sendCommandQueue.get()
-            if not self.sendLock:
-                self.sendCommand(command)
-
-    def doReconnect(self):
-        # to get order in connections, we wait for first connecting the once type
-        if self.mountStatus['Once'] and self.data['FW'] > 0:
-            if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.UnconnectedState:
-                if self.connectCounter == 0:
-                    self.app.sharedMountDataLock.lockForRead()
-                    self.socket.connectToHost(self.data['MountIP'], self.data['MountPort'])
-                    self.app.sharedMountDataLock.unlock()
-                    self.sendCommandQueue.queue.clear()
-                else:
-                    # connection build up is ongoing
-                    pass
-                if self.connectCounter * self.CYCLE > self.CONNECTION_TIMEOUT:
-                    self.socket.abort()
-                    self.connectCounter = 0
-                else:
-                    self.connectCounter += 1
-            else:
-                if self.socket.state() != PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
-                    if self.connectCounter * self.CYCLE > self.CONNECTION_TIMEOUT:
-                        self.socket.abort()
-                        self.connectCounter = 0
-                    else:
-                        self.connectCounter += 1
-                else:
-                    # connected
-                    pass
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleHostFound(self):
-        self.logger.debug('Mount GetAlignmentModel found at {}:{}'.format(self.data['MountIP'], self.data['MountPort']))
+        self.logger.info('mount get align stopped')
 
-    @PyQt5.QtCore.pyqtSlot()
     def handleConnected(self):
         self.signalConnected.emit({'GetAlign': True})
-        self.logger.info('Mount GetAlignmentModel connected at {0}:{1}'.format(self.data['MountIP'], self.data['MountPort']))
+        self.logger.info('Mount GetAlignmentModel connected')
         self.getAlignmentModel()
 
-    @PyQt5.QtCore.pyqtSlot(PyQt5.QtNetwork.QAbstractSocket.SocketError)
-    def handleError(self, socketError):
-        self.logger.warning('Mount GetAlignmentModel connection fault: {0}'.format(socketError))
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleStateChanged(self):
-        self.logger.debug('Mount GetAlignmentModel connection has state: {0}'.format(self.socket.state()))
-
-    @PyQt5.QtCore.pyqtSlot()
     def handleDisconnect(self):
-        self.logger.info('Mount GetAlignmentModel connection is disconnected from host')
         self.signalConnected.emit({'GetAlign': False})
-
-    def sendCommand(self, command):
-        if self.isRunning:
-            if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
-                self.sendLock = True
-                self.socket.write(bytes(command + '\r', encoding='ascii'))
-                self.socket.flush()
-            else:
-                self.sendLock = False
-                self.logger.warning('Socket GetAlignmentModel not connected')
+        # a running download is lost with the connection and we could be connected to another mount afterwards
+        self.app.sharedMountDataLock.lockForWrite()
+        self.data['ModelLoading'] = False
+        self.app.sharedMountDataLock.unlock()
+        self.app.workerMountDispatcher.publishData()
+        self.fingerprint = None
+        self.modelCache = dict()
+        self.pointCache = dict()
 
     def getAlignmentModel(self):
+        # returns a future, which is completed when the model is downloaded
+        if not self.connection.isConnected():
+            return None
+        self.mutexModelFuture.lock()
+        if self.modelFuture and not self.modelFuture.done():
+            # download is already running
+            future = self.modelFuture
+            self.mutexModelFuture.unlock()
+            return future
+        future = concurrent.futures.Future()
+        self.modelFuture = future
+        self.mutexModelFuture.unlock()
+        self.app.sharedMountDataLock.lockForWrite()
         self.data['ModelLoading'] = True
-        if self.data['FW'] < 21500:
-            command = ':getalst#'
-        else:
+        self.app.sharedMountDataLock.unlock()
+        self.app.workerMountDispatcher.publishData()
+        if self.data['FW'] >= 21500:
             command = ':getalst#:getain#'
-        # asking for 100 points data
-        for i in range(1, 102):
-            command += (':getalp{0:d}#'.format(i))
-        self.sendCommandQueue.put(command)
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleReadyRead(self):
-        # Get message from socket.
-        while self.socket.bytesAvailable() and self.isRunning:
-            self.messageString += self.socket.read(4000).decode()
-        # if the last characters are not E#, there are more points to receive
-        if not self.messageString.endswith('E#'):
-            return
         else:
-            messageToProcess = self.messageString
-            self.messageString = ''
-        while messageToProcess.endswith('E#'):
-            messageToProcess = messageToProcess.rstrip('E#')
-        while messageToProcess.startswith('E#'):
-            messageToProcess = messageToProcess.lstrip('E#')
-        # now transfer the model data
+            command = ':getalst#'
+        infoFuture = self.connection.sendRequest(command, self.connection.PRIORITY_BULK, lambda fields: self.handleInfo(fields, future), 'GetAlignInfo')
+        infoFuture.add_done_callback(lambda x: self.forwardException(x, future))
+        return future
+
+    @staticmethod
+    def forwardException(infoFuture, future):
+        if infoFuture.exception() and not future.done():
+            future.set_exception(infoFuture.exception())
+
+    def finishLoading(self, future):
+        self.app.sharedMountDataLock.lockForWrite()
+        self.data['ModelLoading'] = False
+        self.app.sharedMountDataLock.unlock()
+        self.app.workerMountDispatcher.publishData()
+        self.app.workerMountDispatcher.signalMountShowAlignmentModel.emit()
+        if not future.done():
+            future.set_result(None)
+
+    def handleInfo(self, fields, future):
+        numberStars = 0
         try:
-            if len(messageToProcess) == 0:
-                return
             self.app.sharedMountDataLock.lockForWrite()
-            self.logger.info('Raw data from Mount: {0}'.format(messageToProcess))
-            valueList = messageToProcess.strip('#').split('#')
+            self.logger.info('Raw info from Mount: {0}'.format(fields))
             # now the first part of the command cluster
-            numberStars = int(valueList[0])
+            if fields and fields[0] != 'E':
+                numberStars = int(fields[0])
             self.logger.info('Align info number stars: {0}'.format(numberStars))
             self.data['NumberAlignmentStars'] = numberStars
             self.data['Number'] = numberStars
-            del valueList[0]
-            if numberStars < 3:
-                valueList = ['E,E,E,E,E,E,E,E,E']
-            self.logger.info('Align info data: {0}'.format(valueList[0]))
+            valueList = list(fields[1:])
             # now the second part of the command cluster. it is related to firmware feature
-            if self.data['FW'] > 21500:
+            if self.data['FW'] >= 21500 and valueList:
                 if numberStars < 3:
                     valueList = ['E,E,E,E,E,E,E,E,E']
+                self.logger.info('Align info data: {0}'.format(valueList[0]))
                 # here we have more data in
                 if len(valueList[0]) > 3:
                     a1, a2, a3, a4, a5, a6, a7, a8, a9 = valueList[0].split(',')
@@ -267,36 +179,74 @@ class MountGetAlignmentModel(PyQt5.QtCore.QObject):
                     self.data['ModelKnobTurnAlt'] = '{0}'.format(value)
                 else:
                     self.logger.error('Receive error getain command content: {0}'.format(valueList[0]))
-                # remove the first remaining element in list if it was there
-                del valueList[0]
-            # now the third part of the command cluster
-            self.data['ModelIndex'] = list()
-            self.data['ModelAzimuth'] = list()
-            self.data['ModelAltitude'] = list()
-            self.data['ModelError'] = list()
-            self.data['ModelErrorAngle'] = list()
-            # we start every time with index 0, because if the first parsing took place, the first list element will be deleted
-            self.logger.info('Align info points data: {0}'.format(valueList))
-            for i in range(0, len(valueList)):
-                values = valueList[i].split(',')
-                ha = values[0]
-                dec = values[1]
-                ErrorRMS = float(values[2])
-                ErrorAngle = float(values[3])
-                dec = dec.replace('*', ':')
-                RaJNow = self.transform.degStringToDecimal(ha)
-                DecJNow = self.transform.degStringToDecimal(dec)
-                az, alt = self.transform.topocentricToAzAlt(RaJNow, DecJNow)
-                # index should start with 0, but numbering in mount starts with 1
-                self.data['ModelIndex'].append(i)
-                self.data['ModelAzimuth'].append(az)
-                self.data['ModelAltitude'].append(alt)
-                self.data['ModelError'].append(ErrorRMS)
-                self.data['ModelErrorAngle'].append(ErrorAngle)
         except Exception as e:
-            self.logger.error('Parsing GetAlignmentModel got error:{0}, values:{1}'.format(e, messageToProcess))
+            self.logger.error('Parsing GetAlignmentModel info got error:{0}, values:{1}'.format(e, fields))
         finally:
             self.app.sharedMountDataLock.unlock()
-            self.app.workerMountDispatcher.signalMountShowAlignmentModel.emit()
-        self.data['ModelLoading'] = False
-        self.sendLock = False
+        # without getain the number of stars is no fingerprint of the model
+        fingerprint = None
+        if self.data['FW'] >= 21500:
+            fingerprint = tuple(fields)
+        if numberStars == 0:
+            self.storeModel(list(), fingerprint)
+            self.finishLoading(future)
+        elif fingerprint and fingerprint == self.fingerprint:
+            self.logger.info('Alignment model unchanged, using cached data')
+            self.app.sharedMountDataLock.lockForWrite()
+            for key in self.modelCache:
+                self.data[key] = list(self.modelCache[key])
+            self.app.sharedMountDataLock.unlock()
+            self.finishLoading(future)
+        else:
+            # asking only for the points in the model
+            command = ''
+            for i in range(1, numberStars + 1):
+                command += (':getalp{0:d}#'.format(i))
+            self.connection.sendRequest(command, self.connection.PRIORITY_BULK, lambda values: self.handlePoints(values, fingerprint, future), 'GetAlignPoints', future=future)
+
+    def parsePoint(self, value):
+        if value in self.pointCache:
+            return self.pointCache[value]
+        values = value.split(',')
+        ha = values[0]
+        dec = values[1]
+        ErrorRMS = float(values[2])
+        ErrorAngle = float(values[3])
+        dec = dec.replace('*', ':')
+        RaJNow = self.transform.degStringToDecimal(ha)
+        DecJNow = self.transform.degStringToDecimal(dec)
+        az, alt = self.transform.topocentricToAzAlt(RaJNow, DecJNow)
+        self.pointCache[value] = (az, alt, ErrorRMS, ErrorAngle, RaJNow, DecJNow)
+        return self.pointCache[value]
+
+    def storeModel(self, points, fingerprint):
+        self.app.sharedMountDataLock.lockForWrite()
+        # index should start with 0, but numbering in mount starts with 1
+        self.data['ModelIndex'] = list(range(0, len(points)))
+        self.data['ModelAzimuth'] = [x[0] for x in points]
+        self.data['ModelAltitude'] = [x[1] for x in points]
+        self.data['ModelError'] = [x[2] for x in points]
+        self.data['ModelErrorAngle'] = [x[3] for x in points]
+        # hour angle and declination of the points are needed for the local model solver
+        self.data['ModelHourAngle'] = [x[4] for x in points]
+        self.data['ModelDeclination'] = [x[5] for x in points]
+        self.modelCache = dict()
+        for key in ['ModelIndex', 'ModelAzimuth', 'ModelAltitude', 'ModelError', 'ModelErrorAngle', 'ModelHourAngle', 'ModelDeclination']:
+            self.modelCache[key] = list(self.data[key])
+        self.app.sharedMountDataLock.unlock()
+        self.fingerprint = fingerprint
+
+    def handlePoints(self, fields, fingerprint, future):
+        points = list()
+        try:
+            self.logger.info('Align info points data: {0}'.format(fields))
+            # points, which are not available are answered with E
+            for value in fields:
+                if value != 'E':
+                    points.append(self.parsePoint(value))
+        except Exception as e:
+            self.logger.error('Parsing GetAlignmentModel got error:{0}, values:{1}'.format(e, fields))
+            fingerprint = None
+        finally:
+            self.storeModel(points, fingerprint)
+        self.finishLoading(future)
@@ -30,59 +30,44 @@ class MountModelHandling:
 
     def saveModel(self, target):
         self.app.mountCommandQueue.put(':modeldel0{0}#'.format(target))
-        commandSet = {'command': ':modelsv0{0}#'.format(target), 'reply': ''}
-        self.app.mountCommandQueue.put(commandSet)
-        while len(commandSet['reply']) == 0:
-            time.sleep(0.1)
-        if commandSet['reply'].endswith('1'):
+        reply = self.app.mountCommandQueue.getReply(self.app.mountCommandQueue.sendCommand(':modelsv0{0}#'.format(target)))
+        if reply.endswith('1'):
             self.app.messageQueue.put('Mount Model {0} saved\n'.format(target))
             self.app.workerMountDispatcher.workerMountGetModelNames.getModelNames()
             returnValue = True
         else:
-            self.logger.warning('Mount Model {0} could not be saved. Error code: {1}'.format(target, commandSet['reply']))
+            self.logger.warning('Mount Model {0} could not be saved. Error code: {1}'.format(target, reply))
             returnValue = False
         return returnValue
 
     def loadModel(self, target):
-        commandSet = {'command': ':modelld0{0}#'.format(target), 'reply': ''}
-        self.app.mountCommandQueue.put(commandSet)
-        while len(commandSet['reply']) == 0:
-            time.sleep(0.1)
-        if commandSet['reply'].endswith('1'):
-            self.app.workerMountDispatcher.workerMountGetAlignmentModel.getAlignmentModel()
-            while self.data['ModelLoading']:
-                time.sleep(0.2)
+        reply = self.app.mountCommandQueue.getReply(self.app.mountCommandQueue.sendCommand(':modelld0{0}#'.format(target)))
+        if reply.endswith('1'):
+            self.app.workerMountDispatcher.reloadAlignmentModel()
             self.app.messageQueue.put('Mount Model {0} loaded\n'.format(target))
             self.app.workerMountDispatcher.workerMountGetModelNames.getModelNames()
             returnValue = True
         else:
             self.app.messageQueue.put('#BRMount Model {0} could not be loaded\n'.format(target))
-            self.logger.warning('Mount Model {0} could not be loaded. Error code: {1}'.format(target, commandSet['reply']))
+            self.logger.warning('Mount Model {0} could not be loaded. Error code: {1}'.format(target, reply))
             returnValue = False
         return returnValue
 
     def deleteModel(self, target):
-        commandSet = {'command': ':modeldel0{0}#'.format(target), 'reply': ''}
-        self.app.mountCommandQueue.put(commandSet)
-        while len(commandSet['reply']) == 0:
-            time.sleep(0.1)
-        if commandSet['reply'].endswith('1'):
-            self.app.workerMountDispatcher.workerMountGetAlignmentModel.getAlignmentModel()
-            while self.data['ModelLoading']:
-                time.sleep(0.2)
+        reply = self.app.mountCommandQueue.getReply(self.app.mountCommandQueue.sendCommand(':modeldel0{0}#'.format(target)))
+        if reply.endswith('1'):
+            self.app.workerMountDispatcher.reloadAlignmentModel()
             self.app.messageQueue.put('Mount Model {0} deleted\n'.format(target))
             self.app.workerMountDispatcher.workerMountGetModelNames.getModelNames()
             returnValue = True
         else:
             self.app.messageQueue.put('#BRMount Model {0} could not be deleted\n'.format(target))
-            self.logger.warning('Mount Model {0} could not be deleted. Error code: {1}'.format(target, commandSet['reply']))
+            self.logger.warning('Mount Model {0} could not be deleted. Error code: {1}'.format(target, reply))
             returnValue = False
         return returnValue
 
     def clearAlign(self):
         self.app.mountCommandQueue.put(':delalig#')
         time.sleep(1)
-        self.app.workerMountDispatcher.workerMountGetAlignmentModel.getAlignmentModel()
-        while self.data['ModelLoading']:
-            time.sleep(0.2)
+        self.app.workerMountDispatcher.reloadAlignmentModel()
         self.app.messageQueue.put('Mount Model cleared\n')
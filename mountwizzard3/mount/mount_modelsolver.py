@@ -0,0 +1,124 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+import logging
+import math
+import numpy
+
+
+class PointingModelSolver:
+    logger = logging.getLogger(__name__)
+
+    # terms of the local model: index errors, collimation, non perpendicularity, polar axis and tube flexure
+    TERMS = ['IH', 'ID', 'CH', 'NP', 'MA', 'ME', 'TF']
+    # the mount needs at least 3 points for a model, points are only deleted above
+    MIN_POINTS = 3
+    # the residuals of the mount are orthogonal to its terms. if the local terms explain more than this part
+    # of what they would explain for random residuals, the mount uses a different model and predictions fail
+    MAX_EXPLAINED = 0.5
+
+    def __init__(self, latitude):
+        self.latitude = latitude
+
+    def designMatrix(self, ha, dec, pierside):
+        # ha in hours, dec in degrees, pierside +1 / -1. rows are alternating error in ha * cos(dec) and in dec
+        h = numpy.radians(numpy.asarray(ha, dtype=float) * 15)
+        d = numpy.radians(numpy.asarray(dec, dtype=float))
+        s = numpy.asarray(pierside, dtype=float)
+        phi = math.radians(self.latitude)
+        zero = numpy.zeros(len(h))
+        one = numpy.ones(len(h))
+        rowsHa = numpy.column_stack([numpy.cos(d),
+                                     zero,
+                                     s,
+                                     s * numpy.sin(d),
+                                     -numpy.cos(h) * numpy.sin(d),
+                                     numpy.sin(h) * numpy.sin(d),
+                                     math.cos(phi) * numpy.sin(h)])
+        rowsDec = numpy.column_stack([zero,
+                                      one,
+                                      zero,
+                                      zero,
+                                      numpy.sin(h),
+                                      numpy.cos(h),
+                                      math.cos(phi) * numpy.cos(h) * numpy.sin(d) - math.sin(phi) * numpy.cos(d)])
+        design = numpy.empty((2 * len(h), len(self.TERMS)))
+        design[0::2] = rowsHa
+        design[1::2] = rowsDec
+        return design
+
+    @staticmethod
+    def residualVector(error, angle):
+        # same split of the error into ra and dec part like in retrofitMountData
+        error = numpy.asarray(error, dtype=float)
+        angle = numpy.radians(numpy.asarray(angle, dtype=float))
+        residual = numpy.empty(2 * len(error))
+        residual[0::2] = error * numpy.sin(angle)
+        residual[1::2] = error * numpy.cos(angle)
+        return residual
+
+    @staticmethod
+    def rms(errors):
+        if len(errors) == 0:
+            return 0.0
+        return float(math.sqrt(numpy.mean(numpy.square(errors))))
+
+    @staticmethod
+    def refit(design, residual, keep):
+        # residuals are the measurements minus the old model. the old model is a combination of the terms,
+        # so a new fit on the remaining points removes it completely and only the residuals are needed
+        rows = numpy.ravel([[2 * i, 2 * i + 1] for i in keep])
+        solution = numpy.linalg.lstsq(design[rows], residual[rows], rcond=None)[0]
+        remaining = (residual[rows] - design[rows].dot(solution)).reshape(-1, 2)
+        return numpy.hypot(remaining[:, 0], remaining[:, 1])
+
+    def explainedPart(self, design, residual):
+        # part of the residuals, which is described by the local terms relative to the level of random residuals
+        norm = numpy.linalg.norm(residual)
+        if norm == 0:
+            return 0.0
+        solution = numpy.linalg.lstsq(design, residual, rcond=None)[0]
+        explained = numpy.linalg.norm(design.dot(solution)) / norm
+        return float(explained / math.sqrt(len(self.TERMS) / len(residual)))
+
+    def predictDeletion(self, ha, dec, pierside, error, angle, targetRMS):
+        # returns the indices of the points to delete to reach the target rms, deleting the worst point each time
+        result = {'Delete': list(),
+                  'RMS': self.rms(error),
+                  'Explained': 0.0,
+                  'Reliable': False}
+        if len(error) <= self.MIN_POINTS:
+            return result
+        design = self.designMatrix(ha, dec, pierside)
+        residual = self.residualVector(error, angle)
+        result['Explained'] = self.explainedPart(design, residual)
+        result['Reliable'] = result['Explained'] < self.MAX_EXPLAINED
+        if not result['Reliable']:
+            self.logger.warning('Local terms explain {0:4.2f} of residuals, model of mount is not reproduced'.format(result['Explained']))
+            return result
+        keep = list(range(0, len(error)))
+        errors = numpy.asarray(error, dtype=float)
+        while self.rms(errors) >= targetRMS and len(keep) > self.MIN_POINTS:
+            worst = int(numpy.argmax(errors))
+            result['Delete'].append(keep[worst])
+            del keep[worst]
+            errors = self.refit(design, residual, keep)
+        result['RMS'] = self.rms(errors)
+        self.logger.info('Predicted deletion of points {0} for rms {1:5.2f}'.format(result['Delete'], result['RMS']))
+        return result
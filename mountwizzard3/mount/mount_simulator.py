@@ -0,0 +1,541 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+import logging
+import math
+import random
+import time
+import PyQt5.QtCore
+import PyQt5.QtNetwork
+
+
+class MountSimulator(PyQt5.QtCore.QObject):
+    # local stand in for a 10micron mount, implementing the command subset mountwizzard uses.
+    # run it with: python -m mount.mount_simulator --port 3490
+    logger = logging.getLogger(__name__)
+
+    # axis rates in degree per second and settling time after a slew in seconds
+    RA_RATE = 4
+    DEC_RATE = 4
+    SETTLE_TIME = 1.0
+    # limits of the mount in degree
+    MERIDIAN_LIMIT_GUIDE = 5
+    MERIDIAN_LIMIT_SLEW = 5
+    PARK_ALT = 0.0
+    PARK_AZ = 0.0
+    FIRMWARE = '2.15.8'
+    CM_REPLY = 'Coordinates     matched   #'
+
+    def __init__(self, port=3490, latitude=48.0337, longitude=11.7048, latency=0.0, jitter=0.0,
+                 numberPoints=30, modelRMS=15.0, dropInterval=0):
+        super().__init__()
+
+        self.port = port
+        self.latitude = latitude
+        # east positive, the protocol uses west positive
+        self.longitude = longitude
+        # latency and jitter of replies in seconds
+        self.latency = latency
+        self.jitter = jitter
+        # connections are dropped every dropInterval seconds to test reconnecting
+        self.dropInterval = dropInterval
+        self.tcpServer = None
+        self.dropTimer = None
+        self.clients = dict()
+        self.lastReply = dict()
+        # mount state
+        self.status = 0
+        self.tracking = True
+        self.targetRA = 0.0
+        self.targetDEC = 0.0
+        self.targetAlt = 0.0
+        self.targetAz = 0.0
+        self.targetAltAz = False
+        self.slewStart = 0.0
+        self.slewFrom = (0.0, 0.0)
+        self.slewTo = (0.0, 0.0)
+        self.slewEnd = 0.0
+        self.slewing = False
+        self.parkRequested = False
+        self.temperature = 10.0
+        self.pressure = 950.0
+        self.refraction = '1'
+        self.unattendedFlip = '0'
+        self.dualAxis = '1'
+        self.horizonHigh = '+90'
+        self.horizonLow = '+00'
+        self.numberCommands = 0
+        # pointing model
+        self.modelRMS = modelRMS
+        self.model = list()
+        self.newModel = list()
+        self.storedModels = dict()
+        self.initModel(numberPoints)
+        # starting pointing to the south at 45 degree altitude
+        ha, dec = self.altAzToHaDec(45, 180)
+        self.targetRA = (self.siderealTime() - ha) % 24
+        self.targetDEC = dec
+        self.slewFrom = self.slewTo = (ha, dec)
+
+    def start(self):
+        self.tcpServer = PyQt5.QtNetwork.QTcpServer(self)
+        if not self.tcpServer.listen(PyQt5.QtNetwork.QHostAddress.Any, self.port):
+            self.logger.error('port {0} is already in use'.format(self.port))
+            return False
+        self.port = self.tcpServer.serverPort()
+        self.tcpServer.newConnection.connect(self.addConnection)
+        if self.dropInterval > 0:
+            self.dropTimer = PyQt5.QtCore.QTimer(self)
+            self.dropTimer.setSingleShot(False)
+            self.dropTimer.timeout.connect(self.dropConnections)
+            self.dropTimer.start(int(self.dropInterval * 1000))
+        self.logger.info('Mount simulator listening on port {0}'.format(self.port))
+        return True
+
+    def stop(self):
+        if self.dropTimer:
+            self.dropTimer.stop()
+        self.dropConnections()
+        if self.tcpServer:
+            self.tcpServer.close()
+            self.tcpServer = None
+        self.logger.info('Mount simulator stopped after {0} commands'.format(self.numberCommands))
+
+    @PyQt5.QtCore.pyqtSlot()
+    def addConnection(self):
+        while self.tcpServer.hasPendingConnections():
+            client = self.tcpServer.nextPendingConnection()
+            self.clients[client] = ''
+            self.lastReply[client] = 0
+            client.readyRead.connect(lambda client=client: self.receiveMessage(client))
+            client.disconnected.connect(lambda client=client: self.removeConnection(client))
+            self.logger.info('Connection to simulator from {0}'.format(client.peerAddress().toString()))
+
+    def removeConnection(self, client):
+        if client in self.clients:
+            del self.clients[client]
+            del self.lastReply[client]
+            client.deleteLater()
+
+    @PyQt5.QtCore.pyqtSlot()
+    def dropConnections(self):
+        for client in list(self.clients):
+            client.abort()
+            self.removeConnection(client)
+
+    def receiveMessage(self, client):
+        if client not in self.clients:
+            return
+        self.clients[client] += bytes(client.readAll()).decode('ascii', errors='replace')
+        # every command is terminated by #, the combined commands are terminated by \r
+        while '#' in self.clients[client]:
+            command, self.clients[client] = self.clients[client].split('#', 1)
+            command = command.split('\r')[-1]
+            if not command.startswith(':'):
+                continue
+            self.numberCommands += 1
+            reply = self.handleCommand(command[1:])
+            if reply is None:
+                self.logger.warning('Simulator got unknown command: {0}'.format(command))
+            elif reply:
+                self.sendReply(client, reply)
+
+    def sendReply(self, client, reply):
+        # injected latency, but the replies keep their order
+        now = time.time()
+        sendTime = max(self.lastReply[client], now + self.latency + random.uniform(0, self.jitter))
+        self.lastReply[client] = sendTime
+        delay = int((sendTime - now) * 1000)
+        if delay <= 0:
+            self.writeReply(client, reply)
+        else:
+            PyQt5.QtCore.QTimer.singleShot(delay, lambda: self.writeReply(client, reply))
+
+    def writeReply(self, client, reply):
+        if client in self.clients and client.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
+            client.write(bytes(reply, encoding='ascii'))
+            client.flush()
+
+    @staticmethod
+    def formatHours(value):
+        value = value % 24
+        hours = int(value)
+        minutes = int((value - hours) * 60)
+        seconds = (value - hours - minutes / 60) * 3600
+        return '{0:02d}:{1:02d}:{2:05.2f}'.format(hours, minutes, min(seconds, 59.99))
+
+    @staticmethod
+    def formatDegree(value, separator='*', digits=2):
+        sign = '-' if value < 0 else '+'
+        value = abs(value)
+        degree = int(value)
+        minutes = int((value - degree) * 60)
+        seconds = (value - degree - minutes / 60) * 3600
+        return '{0}{1:0{5}d}{2}{3:02d}:{4:04.1f}'.format(sign, degree, separator, minutes, min(seconds, 59.9), digits)
+
+    @staticmethod
+    def parseSexagesimal(value):
+        value = value.strip().replace('*', ':').replace(' ', ':')
+        sign = -1 if value.startswith('-') else 1
+        parts = [float(x) for x in value.lstrip('+-').split(':') if x]
+        result = 0
+        for i in range(0, len(parts)):
+            result += parts[i] / 60 ** i
+        return sign * result
+
+    @staticmethod
+    def julianDate():
+        return time.time() / 86400 + 2440587.5
+
+    def siderealTime(self):
+        gmst = 18.697374558 + 24.06570982441908 * (self.julianDate() - 2451545.0)
+        return (gmst + self.longitude / 15) % 24
+
+    def haDecToAltAz(self, ha, dec):
+        ha = math.radians(ha * 15)
+        dec = math.radians(dec)
+        lat = math.radians(self.latitude)
+        alt = math.asin(math.sin(dec) * math.sin(lat) + math.cos(dec) * math.cos(lat) * math.cos(ha))
+        az = math.atan2(-math.sin(ha) * math.cos(dec), math.sin(dec) * math.cos(lat) - math.cos(dec) * math.sin(lat) * math.cos(ha))
+        return math.degrees(alt), math.degrees(az) % 360
+
+    def altAzToHaDec(self, alt, az):
+        alt = math.radians(alt)
+        az = math.radians(az)
+        lat = math.radians(self.latitude)
+        dec = math.asin(math.sin(alt) * math.sin(lat) + math.cos(alt) * math.cos(lat) * math.cos(az))
+        ha = math.atan2(-math.sin(az) * math.cos(alt), math.sin(alt) * math.cos(lat) - math.cos(alt) * math.sin(lat) * math.cos(az))
+        return math.degrees(ha) / 15, math.degrees(dec)
+
+    def position(self):
+        # returns the current ha and dec of the axis and updates slewing state
+        now = time.time()
+        if not self.slewing:
+            if self.status == 5:
+                return self.altAzToHaDec(self.PARK_ALT, self.PARK_AZ)
+            if self.tracking:
+                return (self.siderealTime() - self.targetRA + 12) % 24 - 12, self.targetDEC
+            return self.slewTo
+        if now > self.slewEnd:
+            self.slewing = False
+            if self.parkRequested:
+                self.parkRequested = False
+                self.status = 5
+            else:
+                self.status = 0 if self.tracking else 7
+            return self.position()
+        elapsed = now - self.slewStart
+        ha = self.moveAxis(self.slewFrom[0] * 15, self.slewTo[0] * 15, self.RA_RATE, elapsed) / 15
+        dec = self.moveAxis(self.slewFrom[1], self.slewTo[1], self.DEC_RATE, elapsed)
+        return ha, dec
+
+    @staticmethod
+    def moveAxis(start, target, rate, elapsed):
+        distance = target - start
+        if abs(distance) <= rate * elapsed:
+            return target
+        return start + math.copysign(rate * elapsed, distance)
+
+    def startSlew(self, ha, dec):
+        haNow, decNow = self.position()
+        self.slewFrom = (haNow, decNow)
+        self.slewTo = (ha, dec)
+        self.slewStart = time.time()
+        timeRA = abs(ha - haNow) * 15 / self.RA_RATE
+        timeDEC = abs(dec - decNow) / self.DEC_RATE
+        self.slewEnd = self.slewStart + max(timeRA, timeDEC) + self.SETTLE_TIME
+        self.slewing = True
+        self.status = 6
+        self.targetRA = (self.siderealTime() - ha) % 24
+        self.targetDEC = dec
+
+    def pierSide(self, ha):
+        return 'W' if ha < 0 else 'E'
+
+    def initModel(self, numberPoints):
+        self.model = list()
+        for i in range(0, numberPoints):
+            alt = random.uniform(20, 85)
+            az = random.uniform(0, 360)
+            ha, dec = self.altAzToHaDec(alt, az)
+            self.model.append({'HA': ha,
+                               'DEC': dec,
+                               'Error': abs(random.gauss(0, self.modelRMS)),
+                               'Angle': random.uniform(0, 360)})
+
+    def modelRMSValue(self):
+        if not self.model:
+            return 0
+        return math.sqrt(sum([x['Error'] ** 2 for x in self.model]) / len(self.model))
+
+    def modelPoint(self, value):
+        # newalpt: ra, dec, pierside, solved ra, solved dec, sidereal time
+        ra, dec, pierside, raSolved, decSolved, lst = value.split(',')
+        ra = self.parseSexagesimal(ra)
+        dec = self.parseSexagesimal(dec)
+        raSolved = self.parseSexagesimal(raSolved)
+        decSolved = self.parseSexagesimal(decSolved)
+        lst = self.parseSexagesimal(lst)
+        deltaRA = (raSolved - ra) * 15 * math.cos(math.radians(dec)) * 3600
+        deltaDEC = (decSolved - dec) * 3600
+        return {'HA': (lst - ra + 12) % 24 - 12,
+                'DEC': dec,
+                'Error': math.sqrt(deltaRA ** 2 + deltaDEC ** 2),
+                'Angle': math.degrees(math.atan2(deltaRA, deltaDEC)) % 360}
+
+    def slewTarget(self, ha, dec):
+        # like the real controller, targets outside the altitude limits are rejected with a reason
+        alt, az = self.haDecToAltAz(ha, dec)
+        alt = round(alt, 6)
+        if alt < float(self.horizonLow):
+            return '1Object below horizon#'
+        if alt > float(self.horizonHigh):
+            return '1Object above upper limit#'
+        self.startSlew(ha, dec)
+        return '0'
+
+    def handleCommand(self, command):
+        # returns the reply for a command, empty for commands without reply and None for unknown ones
+        if command in ['U2', 'AP', 'RT0', 'RT1', 'RT2', 'RT9', 'PO', 'hP', 'STOP']:
+            if command == 'AP':
+                self.tracking = True
+            elif command == 'RT9':
+                self.tracking = False
+            elif command == 'PO' and self.status == 5:
+                self.status = 0 if self.tracking else 7
+            elif command == 'hP':
+                ha, dec = self.altAzToHaDec(self.PARK_ALT, self.PARK_AZ)
+                self.startSlew(ha, dec)
+                self.parkRequested = True
+            elif command == 'STOP':
+                self.slewTo = self.position()
+                self.slewing = False
+                self.status = 1
+            return ''
+        if command == 'GS':
+            return self.formatHours(self.siderealTime()) + '#'
+        if command == 'Ginfo':
+            ha, dec = self.position()
+            alt, az = self.haDecToAltAz(ha, dec)
+            ra = (self.siderealTime() - ha) % 24
+            return '{0:.4f},{1:+.4f},{2},{3:.4f},{4:+.4f},{5:.8f},{6:d},{7:d}#'.format(ra, dec, self.pierSide(ha), az, alt,
+                                                                                     self.julianDate(), self.status, int(self.slewing))
+        if command == 'GMs':
+            return '{0:d}#'.format(int(self.RA_RATE))
+        if command == 'Gmte':
+            ha, dec = self.position()
+            minutes = ((self.MERIDIAN_LIMIT_GUIDE / 15 - ha) % 24) * 60
+            return '{0:04d}#'.format(int(minutes))
+        if command == 'Glmt':
+            return '{0:02d}#'.format(self.MERIDIAN_LIMIT_GUIDE)
+        if command == 'Glms':
+            return '{0:02d}#'.format(self.MERIDIAN_LIMIT_SLEW)
+        if command == 'GRTMP':
+            return '{0:+06.1f}#'.format(self.temperature)
+        if command == 'GRPRS':
+            return '{0:06.1f}#'.format(self.pressure)
+        if command == 'GTMP1':
+            return '{0:+06.1f}#'.format(self.temperature + 2)
+        if command == 'GREF':
+            return self.refraction
+        if command == 'Guaf':
+            return self.unattendedFlip
+        if command == 'Gdat':
+            return self.dualAxis
+        if command == 'Gh':
+            return self.horizonHigh + '#'
+        if command == 'Go':
+            return self.horizonLow + '#'
+        if command == 'GDUTV':
+            return 'V,2018-12-31#'
+        if command == 'Gev':
+            return '+0580.9#'
+        if command == 'Gg':
+            return self.formatDegree(-self.longitude, ':', 3) + '#'
+        if command == 'Gt':
+            return self.formatDegree(self.latitude, ':') + '#'
+        if command == 'GVD':
+            return 'Oct 25 2017#'
+        if command == 'GVN':
+            return self.FIRMWARE + '#'
+        if command == 'GVP':
+            return '10micron GM1000HPS#'
+        if command == 'GVT':
+            return '16:58:31#'
+        if command == 'GVZ':
+            return 'Q-TYPE2012#'
+        if command == 'Gr':
+            ha, dec = self.position()
+            return self.formatHours(self.siderealTime() - ha) + '#'
+        if command == 'Gd':
+            ha, dec = self.position()
+            return self.formatDegree(dec) + '#'
+        # setting of targets and parameters
+        if command.startswith('Sz'):
+            self.targetAz = self.parseSexagesimal(command[2:])
+            self.targetAltAz = True
+            return '1'
+        if command.startswith('Sa'):
+            self.targetAlt = self.parseSexagesimal(command[2:])
+            self.targetAltAz = True
+            return '1'
+        if command.startswith('Sr'):
+            self.targetRA = self.parseSexagesimal(command[2:])
+            self.targetAltAz = False
+            return '1'
+        if command.startswith('Sd'):
+            self.targetDEC = self.parseSexagesimal(command[2:])
+            self.targetAltAz = False
+            return '1'
+        if command.startswith('SRTMP'):
+            self.temperature = float(command[5:])
+            return '1'
+        if command.startswith('SRPRS'):
+            self.pressure = float(command[5:])
+            return '1'
+        if command.startswith('SREF'):
+            self.refraction = command[4:5]
+            return '1'
+        if command.startswith('Suaf'):
+            self.unattendedFlip = command[4:5]
+            return '1'
+        if command.startswith('Sdat'):
+            self.dualAxis = command[4:5]
+            return '1'
+        if command.startswith('Sh'):
+            self.horizonHigh = command[2:]
+            return '1'
+        if command.startswith('So'):
+            self.horizonLow = command[2:]
+            return '1'
+        if command.startswith('Sw') or command.startswith('CMCFG'):
+            return '1'
+        if command == 'MA':
+            return self.slewTarget(*self.altAzToHaDec(self.targetAlt, self.targetAz))
+        if command == 'MS':
+            # mountwizzard sets az/alt targets before, otherwise use ra/dec
+            if self.targetAltAz:
+                ha, dec = self.altAzToHaDec(self.targetAlt, self.targetAz)
+            else:
+                ha, dec = (self.siderealTime() - self.targetRA + 12) % 24 - 12, self.targetDEC
+            return self.slewTarget(ha, dec)
+        if command == 'CM':
+            return self.CM_REPLY
+        if command == 'CMS':
+            return '0'
+        if command == 'FLIP':
+            ha, dec = self.position()
+            self.startSlew(ha, dec)
+            return '1'
+        if command == 'shutdown':
+            return '1'
+        # alignment model
+        if command == 'getalst':
+            return '{0:d}#'.format(len(self.model))
+        if command == 'getain':
+            if len(self.model) < 3:
+                return 'E#'
+            return '{0:.4f},{1:.4f},{2:.4f},{3:.1f},{4:.4f},{5:.2f},{6:.2f},{7:d},{8:.1f}#'.format(0.0123, -0.0045, 0.0131, 110.0, 0.0021,
+                                                                                            0.35, -0.12, min(len(self.model), 12), self.modelRMSValue())
+        if command.startswith('getalp'):
+            number = int(command[6:])
+            if not 0 < number <= len(self.model):
+                return 'E#'
+            point = self.model[number - 1]
+            return '{0},{1},{2:.1f},{3:.1f}#'.format(self.formatHours(point['HA']), self.formatDegree(point['DEC']), point['Error'], point['Angle'])
+        if command == 'newalig':
+            self.newModel = list()
+            return 'V#'
+        if command.startswith('newalpt'):
+            try:
+                self.newModel.append(self.modelPoint(command[7:]))
+            except Exception as e:
+                self.logger.warning('Simulator could not parse model point: {0}'.format(e))
+                return 'E#'
+            return '{0:d}#'.format(len(self.newModel))
+        if command == 'endalig':
+            if len(self.newModel) < 3:
+                return 'E#'
+            self.model = self.newModel
+            self.newModel = list()
+            return 'V#'
+        if command.startswith('delalst'):
+            number = int(command[7:])
+            if 0 < number <= len(self.model):
+                del self.model[number - 1]
+                return '1#'
+            return '0#'
+        if command == 'delalig':
+            self.model = list()
+            return '1'
+        # stored models
+        if command.startswith('modelnam'):
+            names = sorted(self.storedModels)
+            number = int(command[8:])
+            if 0 < number <= len(names):
+                return names[number - 1] + '#'
+            return '#'
+        if command.startswith('modelsv0'):
+            self.storedModels[command[8:]] = list(self.model)
+            return '1#'
+        if command.startswith('modelld0'):
+            if command[8:] not in self.storedModels:
+                return '0#'
+            self.model = list(self.storedModels[command[8:]])
+            return '1#'
+        if command.startswith('modeldel0'):
+            if command[9:] not in self.storedModels:
+                return '0#'
+            del self.storedModels[command[9:]]
+            return '1#'
+        return None
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description='10micron mount simulator for MountWizzard')
+    parser.add_argument('--port', type=int, default=3490)
+    parser.add_argument('--latitude', type=float, default=48.0337)
+    parser.add_argument('--longitude', type=float, default=11.7048, help='east positive')
+    parser.add_argument('--latency', type=float, default=0.0, help='reply latency in ms')
+    parser.add_argument('--jitter', type=float, default=0.0, help='additional random latency in ms')
+    parser.add_argument('--rate', type=float, default=MountSimulator.RA_RATE, help='axis rate in degree per second')
+    parser.add_argument('--settle', type=float, default=MountSimulator.SETTLE_TIME, help='settling time in seconds')
+    parser.add_argument('--points', type=int, default=30, help='number of points in initial alignment model')
+    parser.add_argument('--rms', type=float, default=15.0, help='rms of initial alignment model in arcsec')
+    parser.add_argument('--drop', type=float, default=0, help='drop all connections every n seconds')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(message)s')
+    application = PyQt5.QtCore.QCoreApplication(sys.argv)
+    MountSimulator.RA_RATE = MountSimulator.DEC_RATE = args.rate
+    MountSimulator.SETTLE_TIME = args.settle
+    simulator = MountSimulator(port=args.port,
+                               latitude=args.latitude,
+                               longitude=args.longitude,
+                               latency=args.latency / 1000,
+                               jitter=args.jitter / 1000,
+                               numberPoints=args.points,
+                               modelRMS=args.rms,
+                               dropInterval=args.drop)
+    if not simulator.start():
+        sys.exit(1)
+    sys.exit(application.exec_())
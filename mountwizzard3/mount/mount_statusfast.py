@@ -18,186 +18,126 @@
 #
 ############################################################
 import logging
-import PyQt5
 import time
-from queue import Queue
-from astrometry import transform
+import PyQt5
 
 
 class MountStatusRunnerFast(PyQt5.QtCore.QObject):
     logger = logging.getLogger(__name__)
 
-    CONNECTION_TIMEOUT = 2000
-    CYCLE_STATUS_FAST = 750
-    CYCLE = 250
-    signalDestruct = PyQt5.QtCore.pyqtSignal()
+    # polling cycles in ms: active while slewing or modeling, idle when parked or stopped
+    CYCLE_STATUS_FAST = {'Active': 200,
+                         'Normal': 750,
+                         'Idle': 2000}
+    # mount status numbers, where the mount doesn't move: stopped, parked, no tracking, motors inhibited
+    STATUS_IDLE = [1, 5, 7, 8]
+    # time in seconds we wait for the mount to report slewing after a slew command
+    SLEW_START_TIMEOUT = 3
+    # number of slews kept for the end of slew latency
+    SLEW_LATENCY_NUMBER = 100
+
+    signalPollingMode = PyQt5.QtCore.pyqtSignal(str)
 
-    def __init__(self, app, thread, data, signalConnected, mountStatus):
+    def __init__(self, app, connection, data, signalConnected, mountStatus):
         super().__init__()
 
         self.app = app
         self.data = data
-        self.thread = thread
+        self.connection = connection
         self.signalConnected = signalConnected
         self.mountStatus = mountStatus
-        self.mutexIsRunning = PyQt5.QtCore.QMutex()
         self.dataTimer = None
-        self.cycleTimer = None
-        self.isRunning = False
-        self.connectCounter = 0
-        self.socket = None
-        self.sendLock = False
-        self.messageString = ''
-        self.sendCommandQueue = Queue()
-        self.transform = transform.Transform(self.app)
+        self.transform = self.app.transform
         self.audioDone = False
+        self.cycleStatus = dict(self.CYCLE_STATUS_FAST)
+        self.pollingMode = 'Normal'
+        self.slewStarted = 0
+        self.lastSlewing = 0
+        self.mutexSlewLatency = PyQt5.QtCore.QMutex()
+        self.slewLatency = list()
 
     def run(self):
         self.logger.info('mount fast started')
-        self.mutexIsRunning.lock()
-        if not self.isRunning:
-            self.isRunning = True
-        self.mutexIsRunning.unlock()
-        self.socket = PyQt5.QtNetwork.QTcpSocket()
-        self.socket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.LowDelayOption, 1)
-        self.socket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.KeepAliveOption, 1)
-        self.socket.hostFound.connect(self.handleHostFound)
-        self.socket.connected.connect(self.handleConnected)
-        self.socket.stateChanged.connect(self.handleStateChanged)
-        self.socket.disconnected.connect(self.handleDisconnect)
-        self.socket.readyRead.connect(self.handleReadyRead)
-        self.socket.error.connect(self.handleError)
         # timers
         self.dataTimer = PyQt5.QtCore.QTimer(self)
         self.dataTimer.setSingleShot(False)
         self.dataTimer.timeout.connect(self.getStatusFast)
-        self.dataTimer.start(self.CYCLE_STATUS_FAST)
-        self.signalDestruct.connect(self.destruct, type=PyQt5.QtCore.Qt.BlockingQueuedConnection)
-        self.cycleTimer = PyQt5.QtCore.QTimer(self)
-        self.cycleTimer.setSingleShot(False)
-        self.cycleTimer.timeout.connect(self.doCommand)
-        self.cycleTimer.start(self.CYCLE)
 
-    def stop(self):
-        self.mutexIsRunning.lock()
-        if self.isRunning:
-            self.isRunning = False
-            self.signalDestruct.emit()
-            self.signalConnected.emit({'Fast': False})
-            self.thread.quit()
-            self.thread.wait()
-        self.mutexIsRunning.unlock()
-        self.logger.info('mount fast stopped')
-
-    @PyQt5.QtCore.pyqtSlot()
     def destruct(self):
-        self.cycleTimer.stop()
         self.dataTimer.stop()
-        self.socket.hostFound.disconnect(self.handleHostFound)
-        self.socket.connected.disconnect(self.handleConnected)
-        self.socket.stateChanged.disconnect(self.handleStateChanged)
-        self.socket.disconnected.disconnect(self.handleDisconnect)
-        self.socket.error.disconnect(self.handleError)
-        self.socket.readyRead.disconnect(self.handleReadyRead)
-        self.signalDestruct.disconnect(self.destruct)
-        self.socket.abort()
-
-    def doCommand(self):
-        self.doReconnect()
-        if not self.sendCommandQueue.empty() and (self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState):
-            command = self.sendCommandQueue.get()
-            if not self.sendLock:
-                self.sendCommand(command)
-
-    def doReconnect(self):
-        # to get order in connections, we wait for first connecting the once type
-        if self.mountStatus['Once'] and self.data['FW'] > 0:
-            if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.UnconnectedState:
-                if self.connectCounter == 0:
-                    self.app.sharedMountDataLock.lockForRead()
-                    self.socket.connectToHost(self.data['MountIP'], self.data['MountPort'])
-                    self.app.sharedMountDataLock.unlock()
-                    self.sendCommandQueue.queue.clear()
-                else:
-                    # connection build up is ongoing
-                    pass
-                if self.connectCounter * self.CYCLE > self.CONNECTION_TIMEOUT:
-                    self.socket.abort()
-                    self.connectCounter = 0
-                else:
-                    self.connectCounter += 1
-            else:
-                if self.socket.state() != PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
-                    if self.connectCounter * self.CYCLE > self.CONNECTION_TIMEOUT:
-                        self.socket.abort()
-                        self.connectCounter = 0
-                    else:
-                        self.connectCounter += 1
-                else:
-                    # connected
-                    pass
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleHostFound(self):
-        self.app.sharedMountDataLock.lockForRead()
-        self.logger.debug('Mount RunnerFast found at {}:{}'.format(self.data['MountIP'], self.data['MountPort']))
-        self.app.sharedMountDataLock.unlock()
+        latency = self.getSlewLatency()
+        if latency['Number'] > 0:
+            self.logger.info('End of slew latency number: {0}, mean: {1:5.3f}s, max: {2:5.3f}s'.format(latency['Number'], latency['Mean'], latency['Max']))
+        self.logger.info('mount fast stopped')
 
-    @PyQt5.QtCore.pyqtSlot()
     def handleConnected(self):
         self.signalConnected.emit({'Fast': True})
-        self.app.sharedMountDataLock.lockForRead()
-        self.logger.info('Mount RunnerFast connected at {0}:{1}'.format(self.data['MountIP'], self.data['MountPort']))
-        self.app.sharedMountDataLock.unlock()
+        self.dataTimer.start(self.cycleStatus[self.pollingMode])
+        self.logger.info('Mount RunnerFast connected')
 
-    @PyQt5.QtCore.pyqtSlot(PyQt5.QtNetwork.QAbstractSocket.SocketError)
-    def handleError(self, socketError):
-        self.logger.warning('Mount RunnerFast connection fault: {0}'.format(socketError))
+    def handleDisconnect(self):
+        self.signalConnected.emit({'Fast': False})
+        self.dataTimer.stop()
 
-    @PyQt5.QtCore.pyqtSlot()
-    def handleStateChanged(self):
-        self.logger.debug('Mount RunnerFast connection has state: {0}'.format(self.socket.state()))
+    def setPollingCycles(self, cycles):
+        # could be called from every thread, the timer gets the new cycle with the next reply
+        for mode in cycles:
+            if mode in self.cycleStatus:
+                self.cycleStatus[mode] = int(cycles[mode])
+
+    def getPollingCycles(self):
+        return dict(self.cycleStatus)
+
+    def getSlewLatency(self):
+        # time between the last reply reporting slewing and the first reporting the stop. this is the
+        # upper limit of the delay, until the end of a slew is detected
+        self.mutexSlewLatency.lock()
+        latency = list(self.slewLatency)
+        self.mutexSlewLatency.unlock()
+        if not latency:
+            return {'Number': 0, 'Mean': 0, 'Max': 0, 'Last': 0}
+        return {'Number': len(latency),
+                'Mean': sum(latency) / len(latency),
+                'Max': max(latency),
+                'Last': latency[-1]}
 
     @PyQt5.QtCore.pyqtSlot()
-    def handleDisconnect(self):
-        self.logger.info('Mount RunnerFast connection is disconnected from host')
-        self.signalConnected.emit({'Fast': False})
+    def setSlewStarted(self):
+        # the mount reports slewing with the next replies, but we should poll fast from now on
+        self.slewStarted = time.time()
+        self.setPollingMode('Active')
+
+    def updatePollingMode(self):
+        if self.slewStarted and time.time() - self.slewStarted > self.SLEW_START_TIMEOUT:
+            self.slewStarted = 0
+        # slewing and status are there only after the first valid Ginfo reply
+        if self.data.get('Slewing', False) or self.slewStarted or self.app.workerModelingDispatcher.modelingRunner.modelRun:
+            mode = 'Active'
+        elif self.data.get('Status') in self.STATUS_IDLE:
+            mode = 'Idle'
+        else:
+            mode = 'Normal'
+        self.setPollingMode(mode)
 
-    def sendCommand(self, command):
-        if self.isRunning:
-            if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
-                self.sendLock = True
-                self.socket.write(bytes(command + '\r', encoding='ascii'))
-                self.socket.flush()
-            else:
-                self.sendLock = False
-                self.logger.warning('Socket RunnerFast not connected')
+    def setPollingMode(self, mode):
+        if mode != self.pollingMode:
+            self.logger.info('Mount polling mode changed from {0} to {1}'.format(self.pollingMode, mode))
+            self.pollingMode = mode
+            self.signalPollingMode.emit(mode)
+        if self.dataTimer.isActive() and self.dataTimer.interval() != self.cycleStatus[mode]:
+            self.dataTimer.setInterval(self.cycleStatus[mode])
 
     @PyQt5.QtCore.pyqtSlot()
     def getStatusFast(self):
-        if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
-            self.sendCommandQueue.put(':U2#:GS#:Ginfo#:')
+        if self.connection.isConnected():
+            self.connection.sendRequest(':U2#:GS#:Ginfo#:', self.connection.PRIORITY_FAST, self.handleReply, 'Fast')
 
-    @PyQt5.QtCore.pyqtSlot()
-    def handleReadyRead(self):
-        # Get message from socket.
-        while self.socket.bytesAvailable() and self.isRunning:
-            self.messageString += self.socket.read(1024).decode()
-        if self.messageString.count('#') < 2:
+    def handleReply(self, valueList):
+        if len(valueList) == 0:
             return
-        if self.messageString.count(',') != 7 or self.messageString.count('#') != 2:
-            self.logger.error('Receiving data got error:{0}'.format(self.messageString))
-            self.messageString = ''
-            messageToProcess = ''
-        else:
-            messageToProcess = self.messageString
-            self.messageString = ''
-        # Try and parse the message. In fast we ask for GS and Ginfo so we expect 2
+        # Try and parse the message. In fast we ask for GS and Ginfo so we expect 2, each field is checked on its own
         try:
-            if len(messageToProcess) == 0:
-                return
             self.app.sharedMountDataLock.lockForWrite()
-            valueList = messageToProcess.strip('#').split('#')
             # first the GS command
             if len(valueList) == 2:
                 if len(valueList[0]) > 0:
@@ -231,7 +171,14 @@ class MountStatusRunnerFast(PyQt5.QtCore.QObject):
                                 if self.data['Slewing'] and value[7] != '1':
                                     self.app.workerMountDispatcher.signalSlewFinished.emit()
                                     self.app.audioCommandQueue.put('MountSlew')
+                                    self.mutexSlewLatency.lock()
+                                    self.slewLatency.append(time.time() - self.lastSlewing)
+                                    self.slewLatency = self.slewLatency[-self.SLEW_LATENCY_NUMBER:]
+                                    self.mutexSlewLatency.unlock()
                             self.data['Slewing'] = (value[7] == '1')
+                            if self.data['Slewing']:
+                                self.lastSlewing = time.time()
+                                self.slewStarted = 0
                             self.data['RaJ2000'], self.data['DecJ2000'] = self.transform.transformERFA(self.data['RaJNow'], self.data['DecJNow'], 2)
                             self.data['TelescopeRA'] = '{0}'.format(self.transform.decimalToDegree(self.data['RaJ2000'], False, False))
                             self.data['TelescopeDEC'] = '{0}'.format(self.transform.decimalToDegree(self.data['DecJ2000'], True, False))
@@ -243,6 +190,7 @@ class MountStatusRunnerFast(PyQt5.QtCore.QObject):
                             else:
                                 self.data['TelescopePierSide'] = 'EAST'
                             self.app.workerMountDispatcher.signalMountAzAltPointer.emit(self.data['Az'], self.data['Alt'])
+                            self.app.workerMountDispatcher.mountTelemetry.append(self.data)
                             self.app.signalJulianDate.emit(float(self.data['JulianDate']))
                         else:
                             self.logger.warning('Ginfo command delivered wrong number of arguments: {0}'.format(value))
@@ -250,10 +198,11 @@ class MountStatusRunnerFast(PyQt5.QtCore.QObject):
                         self.logger.error('Receive error Ginfo command: {0} reply:{1}'.format(e, value))
                     finally:
                         pass
+                self.updatePollingMode()
             else:
                 self.logger.warning('Parsing GS-Ginfo combined command valueList is not OK: length:{0} content:{1}'.format(len(valueList), valueList))
         except Exception as e:
-            self.logger.error('Problem parsing response, error: {0}, message:{1}'.format(e, messageToProcess))
+            self.logger.error('Problem parsing response, error: {0}, message:{1}'.format(e, valueList))
         finally:
             self.app.sharedMountDataLock.unlock()
-        self.sendLock = False
+        self.app.workerMountDispatcher.publishData()
@@ -19,162 +19,67 @@
 ############################################################
 import logging
 import PyQt5
-import time
-from queue import Queue
-from astrometry import transform
 
 
 class MountStatusRunnerMedium(PyQt5.QtCore.QObject):
     logger = logging.getLogger(__name__)
 
-    CONNECTION_TIMEOUT = 2000
-    CYCLE_STATUS_MEDIUM = 3000
-    CYCLE = 250
-    signalDestruct = PyQt5.QtCore.pyqtSignal()
+    # polling cycles in ms, depending on the polling mode of the fast runner
+    CYCLE_STATUS_MEDIUM = {'Active': 3000,
+                           'Normal': 3000,
+                           'Idle': 10000}
 
-    def __init__(self, app, thread, data, signalConnected, mountStatus):
+    def __init__(self, app, connection, data, signalConnected, mountStatus):
         super().__init__()
 
         self.app = app
-        self.thread = thread
+        self.connection = connection
         self.data = data
         self.signalConnected = signalConnected
         self.mountStatus = mountStatus
-        self.mutexIsRunning = PyQt5.QtCore.QMutex()
         self.dataTimer = None
-        self.cycleTimer = None
-        self.isRunning = False
-        self.connectCounter = 0
-        self.socket = None
-        self.sendLock = False
-        self.messageString = ''
-        self.sendCommandQueue = Queue()
-        self.transform = transform.Transform(self.app)
+        self.transform = self.app.transform
+        self.cycleStatus = dict(self.CYCLE_STATUS_MEDIUM)
+        self.pollingMode = 'Normal'
 
     def run(self):
         self.logger.info('mount medium started')
-        self.mutexIsRunning.lock()
-        if not self.isRunning:
-            self.isRunning = True
-        self.mutexIsRunning.unlock()
-        self.socket = PyQt5.QtNetwork.QTcpSocket()
-        self.socket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.LowDelayOption, 1)
-        self.socket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.KeepAliveOption, 1)
-        self.socket.hostFound.connect(self.handleHostFound)
-        self.socket.connected.connect(self.handleConnected)
-        self.socket.stateChanged.connect(self.handleStateChanged)
-        self.socket.disconnected.connect(self.handleDisconnect)
-        self.socket.readyRead.connect(self.handleReadyRead)
-        self.socket.error.connect(self.handleError)
         # timer
         self.dataTimer = PyQt5.QtCore.QTimer(self)
         self.dataTimer.setSingleShot(False)
         self.dataTimer.timeout.connect(self.getStatusMedium)
-        self.dataTimer.start(self.CYCLE_STATUS_MEDIUM)
-        self.signalDestruct.connect(self.destruct, type=PyQt5.QtCore.Qt.BlockingQueuedConnection)
-        self.cycleTimer = PyQt5.QtCore.QTimer(self)
-        self.cycleTimer.setSingleShot(False)
-        self.cycleTimer.timeout.connect(self.doCommand)
-        self.cycleTimer.start(self.CYCLE)
 
-    def stop(self):
-        self.mutexIsRunning.lock()
-        if self.isRunning:
-            self.isRunning = False
-            self.signalDestruct.emit()
-            self.signalConnected.emit({'Medium': False})
-            self.thread.quit()
-            self.thread.wait()
-        self.mutexIsRunning.unlock()
-        self.logger.info('mount medium stopped')
-
-    @PyQt5.QtCore.pyqtSlot()
     def destruct(self):
-        self.cycleTimer.stop()
         self.dataTimer.stop()
-        self.signalDestruct.disconnect(self.destruct)
-        self.socket.hostFound.disconnect(self.handleHostFound)
-        self.socket.connected.disconnect(self.handleConnected)
-        self.socket.stateChanged.disconnect(self.handleStateChanged)
-        self.socket.disconnected.disconnect(self.handleDisconnect)
-        self.socket.error.disconnect(self.handleError)
-        self.socket.readyRead.disconnect(self.handleReadyRead)
-        self.socket.abort()
-
-    def doCommand(self):
-        self.doReconnect()
-        if not self.sendCommandQueue.empty() and (self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState):
-            command = self.sendCommandQueue.get()
-            if not self.sendLock:
-                self.sendCommand(command)
-
-    def doReconnect(self):
-        # to get order in connections, we wait for first connecting the once type
-        if self.mountStatus['Once'] and self.data['FW'] > 0:
-            if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.UnconnectedState:
-                if self.connectCounter == 0:
-                    self.app.sharedMountDataLock.lockForRead()
-                    self.socket.connectToHost(self.data['MountIP'], self.data['MountPort'])
-                    self.app.sharedMountDataLock.unlock()
-                    self.sendCommandQueue.queue.clear()
-                else:
-                    # connection build up is ongoing
-                    pass
-                if self.connectCounter * self.CYCLE > self.CONNECTION_TIMEOUT:
-                    self.socket.abort()
-                    self.connectCounter = 0
-                else:
-                    self.connectCounter += 1
-            else:
-                if self.socket.state() != PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
-                    if self.connectCounter * self.CYCLE > self.CONNECTION_TIMEOUT:
-                        self.socket.abort()
-                        self.connectCounter = 0
-                    else:
-                        self.connectCounter += 1
-                else:
-                    # connected
-                    pass
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleHostFound(self):
-        self.app.sharedMountDataLock.lockForRead()
-        self.logger.debug('Mount RunnerMedium found at {}:{}'.format(self.data['MountIP'], self.data['MountPort']))
-        self.app.sharedMountDataLock.unlock()
+        self.logger.info('mount medium stopped')
 
-    @PyQt5.QtCore.pyqtSlot()
     def handleConnected(self):
         self.signalConnected.emit({'Medium': True})
-        self.app.sharedMountDataLock.lockForRead()
-        self.logger.info('Mount RunnerMedium connected at {0}:{1}'.format(self.data['MountIP'], self.data['MountPort']))
-        self.app.sharedMountDataLock.unlock()
-
-    @PyQt5.QtCore.pyqtSlot(PyQt5.QtNetwork.QAbstractSocket.SocketError)
-    def handleError(self, socketError):
-        self.logger.warning('Mount RunnerMedium connection fault: {0}'.format(socketError))
+        self.dataTimer.start(self.cycleStatus[self.pollingMode])
+        self.logger.info('Mount RunnerMedium connected')
 
-    @PyQt5.QtCore.pyqtSlot()
-    def handleStateChanged(self):
-        self.logger.debug('Mount RunnerMedium connection has state: {0}'.format(self.socket.state()))
-
-    @PyQt5.QtCore.pyqtSlot()
     def handleDisconnect(self):
-        self.logger.info('Mount RunnerMedium connection is disconnected from host')
         self.signalConnected.emit({'Medium': False})
+        self.dataTimer.stop()
 
-    def sendCommand(self, command):
-        if self.isRunning:
-            if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
-                self.sendLock = True
-                self.socket.write(bytes(command + '\r', encoding='ascii'))
-                self.socket.flush()
-            else:
-                self.sendLock = False
-                self.logger.warning('Socket RunnerMedium not connected')
+    def setPollingCycles(self, cycles):
+        # could be called from every thread, the timer gets the new cycle with the next polling mode change
+        for mode in cycles:
+            if mode in self.cycleStatus:
+                self.cycleStatus[mode] = int(cycles[mode])
+
+    def getPollingCycles(self):
+        return dict(self.cycleStatus)
+
+    @PyQt5.QtCore.pyqtSlot(str)
+    def setPollingMode(self, mode):
+        self.pollingMode = mode
+        if self.dataTimer.isActive() and self.dataTimer.interval() != self.cycleStatus[mode]:
+            self.dataTimer.setInterval(self.cycleStatus[mode])
 
     @PyQt5.QtCore.pyqtSlot()
     def getStatusMedium(self):
-        if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
+        if self.connection.isConnected():
             doRefractionUpdate = False
             pressure = 950
             temperature = 10
@@ -207,31 +112,16 @@ class MountStatusRunnerMedium(PyQt5.QtCore.QObject):
                         self.app.mountCommandQueue.put(':SRTMP+{0:03.1f}#'.format(temperature))
                     else:
                         self.app.mountCommandQueue.put(':SRTMP-{0:3.1f}#'.format(-temperature))
-            self.sendCommandQueue.put(':GMs#:Gmte#:Glmt#:Glms#:GRTMP#:GRPRS#')
+            self.connection.sendRequest(':GMs#:Gmte#:Glmt#:Glms#:GRTMP#:GRPRS#', self.connection.PRIORITY_STATUS, self.handleReply, 'Medium')
 
-    @PyQt5.QtCore.pyqtSlot()
-    def handleReadyRead(self):
-        # Get message from socket.
-        while self.socket.bytesAvailable() and self.isRunning:
-            self.messageString += self.socket.read(1024).decode()
-        if self.messageString.count('#') < 6:
+    def handleReply(self, valueList):
+        if len(valueList) == 0:
             return
-        if self.messageString.count('#') != 6:
-            self.logger.error('Receiving data got error:{0}'.format(self.messageString))
-            self.messageString = ''
-            messageToProcess = ''
-        else:
-            messageToProcess = self.messageString
-            self.messageString = ''
         # Try and parse the message. In medium we expect 6
         try:
-            if len(messageToProcess) == 0:
-                return
             self.app.sharedMountDataLock.lockForWrite()
-            valueList = messageToProcess.strip('#').split('#')
-            # print(valueList)
             # all parameters are delivered
-            if len(valueList) >= 4:
+            if len(valueList) == 6:
                 if len(valueList[0]) > 0:
                     self.data['SlewRate'] = valueList[0]
                 if len(valueList[1]) > 0:
@@ -249,7 +139,7 @@ class MountStatusRunnerMedium(PyQt5.QtCore.QObject):
             else:
                 self.logger.warning('Parsing Status Medium combined command valueList is not OK: length:{0} content:{1}'.format(len(valueList), valueList))
         except Exception as e:
-            self.logger.error('Problem parsing response, error: {0}, message:{1}'.format(e, messageToProcess))
+            self.logger.error('Problem parsing response, error: {0}, message:{1}'.format(e, valueList))
         finally:
             self.app.sharedMountDataLock.unlock()
-        self.sendLock = False
+        self.app.workerMountDispatcher.publishData()
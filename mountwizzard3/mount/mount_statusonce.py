@@ -19,186 +19,49 @@
 ############################################################
 import logging
 import PyQt5
-import time
-from queue import Queue
-from astrometry import transform
 
 
 class MountStatusRunnerOnce(PyQt5.QtCore.QObject):
     logger = logging.getLogger(__name__)
 
-    signalDestruct = PyQt5.QtCore.pyqtSignal()
-    CYCLE = 250
-    CYCLE_STATUS_ONCE = 500
-    CONNECTION_TIMEOUT = 2000
-
-    def __init__(self, app, thread, data, signalConnected, mountStatus):
+    def __init__(self, app, connection, data, signalConnected, mountStatus):
         super().__init__()
 
         self.app = app
-        self.thread = thread
+        self.connection = connection
         self.data = data
         self.signalConnected = signalConnected
         self.mountStatus = mountStatus
-        self.mutexIsRunning = PyQt5.QtCore.QMutex()
-        self.dataTimer = None
-        self.cycleTimer = None
-        self.isRunning = False
-        self.connectCounter = 0
-        self.socket = None
-        self.sendLock = False
-        self.messageString = ''
-        self.sendCommandQueue = Queue()
-        self.transform = transform.Transform(self.app)
+        self.transform = self.app.transform
 
     def run(self):
         self.logger.info('mount once started')
-        self.mutexIsRunning.lock()
-        if not self.isRunning:
-            self.isRunning = True
-        self.mutexIsRunning.unlock()
-        self.socket = PyQt5.QtNetwork.QTcpSocket()
-        self.socket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.LowDelayOption, 1)
-        self.socket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.KeepAliveOption, 1)
-        self.socket.hostFound.connect(self.handleHostFound)
-        self.socket.connected.connect(self.handleConnected)
-        self.socket.stateChanged.connect(self.handleStateChanged)
-        self.socket.disconnected.connect(self.handleDisconnect)
-        self.socket.readyRead.connect(self.handleReadyRead)
-        self.socket.error.connect(self.handleError)
-        # timers
-        self.dataTimer = PyQt5.QtCore.QTimer(self)
-        self.dataTimer.setSingleShot(False)
-        self.dataTimer.timeout.connect(self.getStatusOnce)
-        self.dataTimer.start(self.CYCLE_STATUS_ONCE)
-        self.signalDestruct.connect(self.destruct, type=PyQt5.QtCore.Qt.BlockingQueuedConnection)
-        self.cycleTimer = PyQt5.QtCore.QTimer(self)
-        self.cycleTimer.setSingleShot(False)
-        self.cycleTimer.timeout.connect(self.doCommand)
-        self.cycleTimer.start(self.CYCLE)
-
-    def stop(self):
-        self.mutexIsRunning.lock()
-        if self.isRunning:
-            self.isRunning = False
-            self.signalDestruct.emit()
-            self.signalConnected.emit({'Once': False})
-            self.thread.quit()
-            self.thread.wait()
-        self.mutexIsRunning.unlock()
-        self.logger.info('mount once stopped')
 
-    @PyQt5.QtCore.pyqtSlot()
     def destruct(self):
-        self.cycleTimer.stop()
-        self.dataTimer.stop()
-        self.signalDestruct.disconnect(self.destruct)
-        self.socket.hostFound.disconnect(self.handleHostFound)
-        self.socket.connected.disconnect(self.handleConnected)
-        self.socket.stateChanged.disconnect(self.handleStateChanged)
-        self.socket.disconnected.disconnect(self.handleDisconnect)
-        self.socket.error.disconnect(self.handleError)
-        self.socket.readyRead.disconnect(self.handleReadyRead)
-        self.socket.abort()
-
-    def doCommand(self):
-        self.doReconnect()
-        if not self.sendCommandQueue.empty() and (self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState):
-            command = self.sendCommandQueue.get()
-            if not self.sendLock:
-                self.sendCommand(command)
-
-    def doReconnect(self):
-        if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.UnconnectedState:
-            if self.connectCounter == 0:
-                self.app.sharedMountDataLock.lockForRead()
-                self.socket.connectToHost(self.data['MountIP'], self.data['MountPort'])
-                self.app.sharedMountDataLock.unlock()
-                self.sendCommandQueue.queue.clear()
-            else:
-                # connection build up is ongoing
-                pass
-            if self.connectCounter * self.CYCLE > self.CONNECTION_TIMEOUT:
-                self.socket.abort()
-                self.connectCounter = 0
-            else:
-                self.connectCounter += 1
-        else:
-            if self.socket.state() != PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
-                if self.connectCounter * self.CYCLE > self.CONNECTION_TIMEOUT:
-                    self.socket.abort()
-                    self.connectCounter = 0
-                else:
-                    self.connectCounter += 1
-            else:
-                # connected
-                pass
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleHostFound(self):
-        self.app.sharedMountDataLock.lockForRead()
-        self.logger.debug('Mount RunnerOnce found at {}:{}'.format(self.data['MountIP'], self.data['MountPort']))
-        self.app.sharedMountDataLock.unlock()
+        self.logger.info('mount once stopped')
 
-    @PyQt5.QtCore.pyqtSlot()
     def handleConnected(self):
-        self.app.sharedMountDataLock.lockForRead()
-        self.logger.info('Mount RunnerOnce connected at {0}:{1}'.format(self.data['MountIP'], self.data['MountPort']))
-        self.app.sharedMountDataLock.unlock()
         self.signalConnected.emit({'Once': True})
+        self.getStatusOnce()
+        self.logger.info('Mount RunnerOnce connected')
 
-    @PyQt5.QtCore.pyqtSlot(PyQt5.QtNetwork.QAbstractSocket.SocketError)
-    def handleError(self, socketError):
-        if self.socket.error() > 0:
-            self.logger.warning('Mount RunnerOnce connection fault: {0}'.format(socketError))
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleStateChanged(self):
-        self.logger.debug('Mount RunnerOnce connection has state: {0}'.format(self.socket.state()))
-
-    @PyQt5.QtCore.pyqtSlot()
     def handleDisconnect(self):
-        self.logger.info('Mount RunnerOnce connection is disconnected from host')
         self.signalConnected.emit({'Once': False})
 
-    def sendCommand(self, command):
-        if self.isRunning:
-            if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
-                self.socket.write(bytes(command + '\r', encoding='ascii'))
-                self.socket.flush()
-            else:
-                self.logger.warning('Socket RunnerOnce not connected')
-
     def getStatusOnce(self):
-        if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
+        if self.connection.isConnected():
             command = ':U2#:Gev#:Gg#:Gt#:GVD#:GVN#:GVP#:GVT#:GVZ#:newalig#:endalig#'
             # command = ':U2#:Gev#:Gg#:Gt#:GVD#:GVN#:GVP#:GVT#:GVZ#'
-            self.sendCommandQueue.put(command)
-            self.dataTimer.stop()
+            self.connection.sendRequest(command, self.connection.PRIORITY_STATUS, self.handleReply, 'Once')
 
-    @PyQt5.QtCore.pyqtSlot()
-    def handleReadyRead(self):
-        # Get message from socket.
-        while self.socket.bytesAvailable() and self.isRunning:
-            self.messageString += self.socket.read(1024).decode()
-        if self.messageString.count('#') < 10:
+    def handleReply(self, valueList):
+        if len(valueList) == 0:
             return
-        if self.messageString.count('#') != 10:
-            self.logger.error('Receiving data got error:{0}'.format(self.messageString))
-            self.messageString = ''
-            messageToProcess = ''
-        else:
-            messageToProcess = self.messageString
-            self.messageString = ''
-        # Try and parse the message. In once we expect 6
+        # Try and parse the message. In once we expect 10
         try:
-            if len(messageToProcess) == 0:
-                return
             self.app.sharedMountDataLock.lockForWrite()
-            valueList = messageToProcess.strip('#').split('#')
             # +0580.9#-011:42:17.3#+48:02:01.6#Oct 25 2017#2.15.8#10micron GM1000HPS#16:58:31#Q-TYPE2012#
             # all parameters are delivered
-            self.logger.info('Once raw: {0}'.format(messageToProcess))
             self.logger.info('Once processed: {0}'.format(valueList))
             if len(valueList) >= 8:
                 if len(valueList[0]) > 0:
@@ -237,7 +100,7 @@ class MountStatusRunnerOnce(PyQt5.QtCore.QObject):
             else:
                 self.logger.warning('Parsing Status Once combined command valueList is not OK: length:{0} content:{1}'.format(len(valueList), valueList))
         except Exception as e:
-            self.logger.error('Problem parsing response, error: {0}, message:{1}'.format(e, messageToProcess))
+            self.logger.error('Problem parsing response, error: {0}, message:{1}'.format(e, valueList))
         finally:
             self.app.sharedMountDataLock.unlock()
-        self.sendLock = False
+        self.app.workerMountDispatcher.publishData()
@@ -19,39 +19,30 @@
 ############################################################
 import logging
 import PyQt5
-import time
-from queue import Queue
-from astrometry import transform
 from mount import align_stars
-import numpy as np
 
 
 class MountStatusRunnerSlow(PyQt5.QtCore.QObject):
     logger = logging.getLogger(__name__)
 
-    CYCLE_STATUS_SLOW = 10000
-    CYCLE = 250
-    signalDestruct = PyQt5.QtCore.pyqtSignal()
+    # polling cycles in ms, depending on the polling mode of the fast runner
+    CYCLE_STATUS_SLOW = {'Active': 10000,
+                         'Normal': 10000,
+                         'Idle': 30000}
 
-    def __init__(self, app, thread, data, signalConnected, mountStatus):
+    def __init__(self, app, connection, data, signalConnected, mountStatus):
         super().__init__()
 
         self.app = app
-        self.thread = thread
+        self.connection = connection
         self.data = data
         self.signalConnected = signalConnected
         self.mountStatus = mountStatus
-        self.mutexIsRunning = PyQt5.QtCore.QMutex()
         self.dataTimer = None
-        self.cycleTimer = None
-        self.isRunning = False
-        self.socket = None
-        self.sendLock = False
-        self.messageString = ''
-        self.sendCommandQueue = Queue()
-        self.transform = transform.Transform(self.app)
+        self.transform = self.app.transform
+        self.cycleStatus = dict(self.CYCLE_STATUS_SLOW)
+        self.pollingMode = 'Normal'
         self.alignmentStars = align_stars.AlignStars(self.app)
-
         self.app.sharedMountDataLock.lockForWrite()
         self.data['starsTopo'] = list()
         self.data['starsNames'] = list()
@@ -66,178 +57,94 @@ class MountStatusRunnerSlow(PyQt5.QtCore.QObject):
 
     def run(self):
         self.logger.info('mount slow started')
-        self.mutexIsRunning.lock()
-        if not self.isRunning:
-            self.isRunning = True
-        self.mutexIsRunning.unlock()
-        self.socket = PyQt5.QtNetwork.QTcpSocket()
-        self.socket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.LowDelayOption, 1)
-        self.socket.setSocketOption(PyQt5.QtNetwork.QAbstractSocket.KeepAliveOption, 1)
-        self.socket.hostFound.connect(self.handleHostFound)
-        self.socket.connected.connect(self.handleConnected)
-        self.socket.stateChanged.connect(self.handleStateChanged)
-        self.socket.disconnected.connect(self.handleDisconnect)
-        self.socket.readyRead.connect(self.handleReadyRead)
-        self.socket.error.connect(self.handleError)
         # timers
         self.dataTimer = PyQt5.QtCore.QTimer(self)
         self.dataTimer.setSingleShot(False)
         self.dataTimer.timeout.connect(self.getStatusSlow)
-        self.dataTimer.start(self.CYCLE_STATUS_SLOW)
-        self.signalDestruct.connect(self.destruct, type=PyQt5.QtCore.Qt.BlockingQueuedConnection)
-        self.cycleTimer = PyQt5.QtCore.QTimer(self)
-        self.cycleTimer.setSingleShot(False)
-        self.cycleTimer.timeout.connect(self.doCommand)
-        self.cycleTimer.start(self.CYCLE)
-
-    def stop(self):
-        self.mutexIsRunning.lock()
-        if self.isRunning:
-            self.isRunning = False
-            self.signalDestruct.emit()
-            self.signalConnected.emit({'Slow': False})
-            self.thread.quit()
-            self.thread.wait()
-        self.mutexIsRunning.unlock()
-        self.logger.info('mount slow stopped')
+        self.dataTimer.start(self.cycleStatus[self.pollingMode])
 
-    @PyQt5.QtCore.pyqtSlot()
     def destruct(self):
-        self.cycleTimer.stop()
         self.dataTimer.stop()
-        self.signalDestruct.disconnect(self.destruct)
-        self.socket.hostFound.disconnect(self.handleHostFound)
-        self.socket.connected.disconnect(self.handleConnected)
-        self.socket.stateChanged.disconnect(self.handleStateChanged)
-        self.socket.disconnected.disconnect(self.handleDisconnect)
-        self.socket.error.disconnect(self.handleError)
-        self.socket.readyRead.disconnect(self.handleReadyRead)
-        self.socket.abort()
-
-    def doCommand(self):
-        self.doReconnect()
-        if not self.sendCommandQueue.empty() and (self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState):
-            command = self.sendCommandQueue.get()
-            if not self.sendLock:
-                self.sendCommand(command)
-
-    def doReconnect(self):
-        # to get order in connections, we wait for first connecting the once type
-        if self.mountStatus['Once'] and self.data['FW'] > 0:
-            if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.UnconnectedState:
-                self.app.sharedMountDataLock.lockForRead()
-                self.socket.connectToHost(self.data['MountIP'], self.data['MountPort'])
-                self.app.sharedMountDataLock.unlock()
-                self.sendCommandQueue.queue.clear()
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleHostFound(self):
-        self.app.sharedMountDataLock.lockForRead()
-        self.logger.debug('Mount RunnerSlow found at {}:{}'.format(self.data['MountIP'], self.data['MountPort']))
-        self.app.sharedMountDataLock.unlock()
+        self.logger.info('mount slow stopped')
 
-    @PyQt5.QtCore.pyqtSlot()
     def handleConnected(self):
         self.signalConnected.emit({'Slow': True})
         self.getStatusSlow()
-        self.app.sharedMountDataLock.lockForRead()
-        self.logger.info('Mount RunnerSlow connected at {0}:{1}'.format(self.data['MountIP'], self.data['MountPort']))
-        self.app.sharedMountDataLock.unlock()
+        self.logger.info('Mount RunnerSlow connected')
 
-    @PyQt5.QtCore.pyqtSlot(PyQt5.QtNetwork.QAbstractSocket.SocketError)
-    def handleError(self, socketError):
-        self.logger.warning('Mount RunnerSlow connection fault: {0}'.format(socketError))
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleStateChanged(self):
-        self.logger.debug('Mount RunnerSlow connection has state: {0}'.format(self.socket.state()))
-
-    @PyQt5.QtCore.pyqtSlot()
     def handleDisconnect(self):
-        self.logger.info('Mount RunnerSlow connection is disconnected from host')
         self.signalConnected.emit({'Slow': False})
 
-    def sendCommand(self, command):
-        if self.isRunning:
-            if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
-                self.socket.write(bytes(command + '\r', encoding='ascii'))
-                self.socket.flush()
-            else:
-                self.logger.warning('Socket RunnerSlow not connected')
+    def setPollingCycles(self, cycles):
+        # could be called from every thread, the timer gets the new cycle with the next polling mode change
+        for mode in cycles:
+            if mode in self.cycleStatus:
+                self.cycleStatus[mode] = int(cycles[mode])
+
+    def getPollingCycles(self):
+        return dict(self.cycleStatus)
+
+    @PyQt5.QtCore.pyqtSlot(str)
+    def setPollingMode(self, mode):
+        self.pollingMode = mode
+        if self.dataTimer.isActive() and self.dataTimer.interval() != self.cycleStatus[mode]:
+            self.dataTimer.setInterval(self.cycleStatus[mode])
 
     @PyQt5.QtCore.pyqtSlot()
     def getStatusSlow(self):
         self.updateAlignmentStarPositions()
+        self.app.workerMountDispatcher.publishData()
         self.app.workerMountDispatcher.signalAlignmentStars.emit()
-        if self.socket.state() == PyQt5.QtNetwork.QAbstractSocket.ConnectedState:
+        if self.connection.isConnected():
+            # we have a firmware dependency
             self.app.sharedMountDataLock.lockForRead()
-            if self.data['FW'] < 21500:
-                self.sendCommandQueue.put(':U2#:GTMP1#:GREF#:Guaf#:Gdat#:Gh#:Go#')
+            if self.data['FW'] >= 21500:
+                command = ':U2#:GTMP1#:GREF#:Guaf#:Gdat#:Gh#:Go#:GDUTV#'
             else:
-                self.sendCommandQueue.put(':U2#:GTMP1#:GREF#:Guaf#:Gdat#:Gh#:Go#:GDUTV#')
+                command = ':U2#:GTMP1#:GREF#:Guaf#:Gdat#:Gh#:Go#'
             self.app.sharedMountDataLock.unlock()
+            self.connection.sendRequest(command, self.connection.PRIORITY_STATUS, self.handleReply, 'Slow')
 
     def updateAlignmentStarPositions(self):
         # update topo data for alignment stars
+        ra = [self.transform.degStringToDecimal(self.alignmentStars.stars[name][0], ' ') for name in self.alignmentStars.stars]
+        dec = [self.transform.degStringToDecimal(self.alignmentStars.stars[name][1], ' ') for name in self.alignmentStars.stars]
+        az, alt = self.transform.transformERFABatch(ra, dec, 1)
+        # the list is replaced as a whole, published snapshots keep their own
+        starsTopo = [(float(az[i]), float(alt[i])) for i in range(0, len(ra))]
         self.app.sharedMountDataLock.lockForWrite()
-        if len(self.data['starsTopo']) == 0:
-            self.data['starsTopo'] = np.empty((len(self.alignmentStars.stars), 0)).tolist()
-        self.app.sharedMountDataLock.unlock()
-        for i, name in enumerate(self.alignmentStars.stars):
-            self.app.sharedMountDataLock.lockForWrite()
-            ra = self.transform.degStringToDecimal(self.alignmentStars.stars[name][0], ' ')
-            dec = self.transform.degStringToDecimal(self.alignmentStars.stars[name][1], ' ')
-            self.data['starsTopo'][i] = self.transform.transformERFA(ra, dec, 1)
-            self.app.sharedMountDataLock.unlock()
-
-    @PyQt5.QtCore.pyqtSlot()
-    def handleReadyRead(self):
-        # Get message from socket.
-        # we have a firmware dependency
-        self.app.sharedMountDataLock.lockForRead()
-        if self.data['FW'] < 21500:
-            numberResults = 3
-        else:
-            numberResults = 4
+        self.data['starsTopo'] = starsTopo
         self.app.sharedMountDataLock.unlock()
 
-        while self.socket.bytesAvailable() and self.isRunning:
-            self.messageString += self.socket.read(1024).decode()
-        if self.messageString.count('#') < numberResults:
+    def handleReply(self, valueList):
+        if len(valueList) == 0:
             return
-        if self.messageString.count('#') != numberResults:
-            self.logger.error('Receiving data got error:{0}'.format(self.messageString))
-            self.messageString = ''
-            messageToProcess = ''
-        else:
-            messageToProcess = self.messageString
-            self.messageString = ''
-        # Try and parse the message. In medium we expect 3 or 4 depending on FW
+        # Try and parse the message. In slow we expect 6 or 7 depending on FW
         try:
-            if len(messageToProcess) == 0:
-                return
             self.app.sharedMountDataLock.lockForWrite()
-            valueList = messageToProcess.strip('#').split('#')
             #  +029.8# 1 0 1 +90# +00# V,2018-03-24#
             # all parameters are delivered
-            if 2 < len(valueList) < 5:
+            if 5 < len(valueList) < 8:
                 if len(valueList[0]) > 0:
                     self.data['TelescopeTempDEC'] = valueList[0]
                 if len(valueList[1]) > 0:
-                    self.data['RefractionStatus'] = valueList[1][0]
-                    self.data['UnattendedFlip'] = valueList[1][1]
-                    self.data['DualAxisTracking'] = valueList[1][2]
-                    self.data['CurrentHorizonLimitHigh'] = valueList[1][3:]
+                    self.data['RefractionStatus'] = valueList[1]
                 if len(valueList[2]) > 0:
-                    self.data['CurrentHorizonLimitLow'] = valueList[2]
-                if self.data['FW'] > 21500 and len(valueList[3]) > 0:
-                    valid, expirationDate = valueList[3].split(',')
+                    self.data['UnattendedFlip'] = valueList[2]
+                if len(valueList[3]) > 0:
+                    self.data['DualAxisTracking'] = valueList[3]
+                if len(valueList[4]) > 0:
+                    self.data['CurrentHorizonLimitHigh'] = valueList[4]
+                if len(valueList[5]) > 0:
+                    self.data['CurrentHorizonLimitLow'] = valueList[5]
+                if self.data['FW'] >= 21500 and len(valueList) == 7 and len(valueList[6]) > 0:
+                    valid, expirationDate = valueList[6].split(',')
                     self.data['UTCDataValid'] = valid
                     self.data['UTCDataExpirationDate'] = expirationDate
             else:
                 self.logger.warning('Parsing Status Slow combined command valueList is not OK: length:{0} content:{1}'.format(len(valueList), valueList))
         except Exception as e:
-            self.logger.error('Problem parsing response, error: {0}, message:{1}'.format(e, messageToProcess))
+            self.logger.error('Problem parsing response, error: {0}, message:{1}'.format(e, valueList))
         finally:
             self.app.sharedMountDataLock.unlock()
-        self.sendLock = False
+        self.app.workerMountDispatcher.publishData()
@@ -0,0 +1,159 @@
+############################################################
+# -*- coding: utf-8 -*-
+#
+#       #   #  #   #   #  ####
+#      ##  ##  #  ##  #     #
+#     # # # #  # # # #     ###
+#    #  ##  #  ##  ##        #
+#   #   #   #  #   #     ####
+#
+# Python-based Tool for interaction with the 10micron mounts
+# GUI with PyQT5 for python
+# Python  v3.6.4
+#
+# Michael Würtenberger
+# (c) 2016, 2017, 2018
+#
+# Licence APL2.0
+#
+###########################################################
+import logging
+import os
+import glob
+import time
+import numpy
+import PyQt5
+
+
+class MountTelemetry:
+    logger = logging.getLogger(__name__)
+
+    # recorded fast status values, pierside is stored as +1 for west and -1 for east
+    COLUMNS = [('Time', numpy.float64),
+               ('RaJNow', numpy.float64),
+               ('DecJNow', numpy.float64),
+               ('Az', numpy.float64),
+               ('Alt', numpy.float64),
+               ('Status', numpy.int16),
+               ('Slewing', numpy.bool_),
+               ('Pierside', numpy.int8)]
+    # number of samples in memory, with fast polling during slews this is more than a whole night
+    SIZE = 200000
+    # number of samples written to one segment file
+    SEGMENT_SIZE = 10000
+
+    def __init__(self, size=SIZE, directory=''):
+        self.dtype = numpy.dtype(self.COLUMNS)
+        self.size = size
+        self.buffer = numpy.zeros(size, dtype=self.dtype)
+        self.mutexBuffer = PyQt5.QtCore.QMutex()
+        # number of samples ever appended, the write position is count modulo size
+        self.count = 0
+        # number of samples already written to the segment files
+        self.written = 0
+        self.directory = directory
+
+    def setDirectory(self, directory):
+        # empty directory switches the file recording off
+        self.mutexBuffer.lock()
+        self.directory = directory
+        self.written = self.count
+        self.mutexBuffer.unlock()
+
+    def append(self, data, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        self.mutexBuffer.lock()
+        row = self.buffer[self.count % self.size]
+        row['Time'] = timestamp
+        row['RaJNow'] = data['RaJNow']
+        row['DecJNow'] = data['DecJNow']
+        row['Az'] = data['Az']
+        row['Alt'] = data['Alt']
+        row['Status'] = data['Status']
+        row['Slewing'] = data['Slewing']
+        row['Pierside'] = 1 if data['Pierside'] == 'W' else -1
+        self.count += 1
+        segment = None
+        if self.directory and self.count - self.written >= self.SEGMENT_SIZE:
+            segment = self.samples(self.written, self.count)
+            self.written = self.count
+        self.mutexBuffer.unlock()
+        if segment is not None:
+            self.writeSegment(segment)
+
+    def samples(self, first, last):
+        # samples with running numbers first to last, which are still in memory. mutex has to be locked
+        first = max(first, self.count - self.size, 0)
+        if first >= last:
+            return numpy.zeros(0, dtype=self.dtype)
+        start = first % self.size
+        end = start + last - first
+        if end <= self.size:
+            return self.buffer[start:end].copy()
+        return numpy.concatenate((self.buffer[start:], self.buffer[:end - self.size]))
+
+    def query(self, timeStart=None, timeEnd=None):
+        # returns all samples in memory with timeStart <= time < timeEnd in order of time
+        self.mutexBuffer.lock()
+        data = self.samples(0, self.count)
+        self.mutexBuffer.unlock()
+        first = 0
+        last = len(data)
+        if timeStart is not None:
+            first = numpy.searchsorted(data['Time'], timeStart, side='left')
+        if timeEnd is not None:
+            last = numpy.searchsorted(data['Time'], timeEnd, side='left')
+        return data[first:last]
+
+    def flush(self):
+        # writes the samples not yet in a segment file, called when stopping
+        self.mutexBuffer.lock()
+        segment = None
+        if self.directory and self.count > self.written:
+            segment = self.samples(self.written, self.count)
+            self.written = self.count
+        self.mutexBuffer.unlock()
+        if segment is not None:
+            self.writeSegment(segment)
+
+    def writeSegment(self, segment):
+        # every segment is stored column wise, the name starts with the time of the first sample
+        if len(segment) == 0:
+            return
+        name = time.strftime('%Y-%m-%d-%H-%M-%S', time.gmtime(segment['Time'][0]))
+        filename = self.directory + '/telemetry_{0}_{1:06d}.npz'.format(name, int((segment['Time'][0] % 1) * 1e6))
+        try:
+            numpy.savez(filename, **{column: segment[column] for column in self.dtype.names})
+        except Exception as e:
+            self.logger.error('Telemetry segment {0} could not be written, error: {1}'.format(filename, e))
+
+    @classmethod
+    def loadSegments(cls, directory, timeStart=None, timeEnd=None):
+        # reads the segment files back with the same time range selection like query
+        dtype = numpy.dtype(cls.COLUMNS)
+        parts = list()
+        for filename in sorted(glob.glob(os.path.join(directory, 'telemetry_*.npz'))):
+            with numpy.load(filename) as columns:
+                times = columns['Time']
+                if len(times) == 0:
+                    continue
+                if timeEnd is not None and times[0] >= timeEnd:
+                    continue
+                if timeStart is not None and times[-1] < timeStart:
+                    continue
+                part = numpy.zeros(len(times), dtype=dtype)
+                for column in dtype.names:
+                    part[column] = columns[column]
+                parts.append(part)
+        if not parts:
+            return numpy.zeros(0, dtype=dtype)
+        data = numpy.concatenate(parts)
+        data = data[numpy.argsort(data['Time'], kind='stable')]
+        first = 0
+        last = len(data)
+        if timeStart is not None:
+            first = numpy.searchsorted(data['Time'], timeStart, side='left')
+        if timeEnd is not None:
+            last = numpy.searchsorted(data['Time'], timeEnd, side='left')
+        return data[first:last]
@@ -46,6 +46,7 @@ from widgets import message_window
 from gui import main_window_ui
 from modeling import model_dispatcher
 from mount import mount_dispatcher
+from mount import mount_command
 from relays import relays
 from remote import remote
 from dome import dome
@@ -90,7 +91,7 @@ class MountWizzardApp(widget.MwWidget):
         self.setObjectName("Main")
 
         # setting up the queues for communication between the threads
-        self.mountCommandQueue = Queue()
+        self.mountCommandQueue = mount_command.MountCommandQueue()
         self.domeCommandQueue = Queue()
         self.modelCommandQueue = Queue()
         self.audioCommandQueue = Queue()
@@ -120,6 +121,9 @@ class MountWizzardApp(widget.MwWidget):
         # get ascom state
         self.checkASCOM()
 
+        # one coordinate transformation service for all threads, which is subscribed once to site and time
+        self.transform = transform.Transform(self)
+
         # access methods for saving model
         self.analyse = analysedata.Analyse(self)
 
@@ -338,31 +342,29 @@ class MountWizzardApp(widget.MwWidget):
         widget.axes.set_yticklabels(yLabel, color='#2090C0', fontweight='bold')
         widget.axes.set_rlabel_position(45)
         # make it visible in any case
-        if 'ModelIndex' in self.workerMountDispatcher.data:
-            if len(self.workerMountDispatcher.data['ModelIndex']) == 0:
-                self.workerMountDispatcher.data['ModelIndex'] = [0]
-                self.workerMountDispatcher.data['ModelAzimuth'] = [0]
-                self.workerMountDispatcher.data['ModelAltitude'] = [90]
-                self.workerMountDispatcher.data['ModelError'] = [1]
+        data = self.workerMountDispatcher.getSnapshot()
+        if len(data.get('ModelIndex', [])) > 0:
+            modelAzimuth = data['ModelAzimuth']
+            modelAltitude = data['ModelAltitude']
+            modelError = data['ModelError']
         else:
-            self.workerMountDispatcher.data['ModelIndex'] = [0]
-            self.workerMountDispatcher.data['ModelAzimuth'] = [0]
-            self.workerMountDispatcher.data['ModelAltitude'] = [90]
-            self.workerMountDispatcher.data['ModelError'] = [1]
+            modelAzimuth = [0]
+            modelAltitude = [90]
+            modelError = [1]
 
-        azimuth = numpy.asarray(self.workerMountDispatcher.data['ModelAzimuth'])
-        altitude = numpy.asarray(self.workerMountDispatcher.data['ModelAltitude'])
+        azimuth = numpy.asarray(modelAzimuth)
+        altitude = numpy.asarray(modelAltitude)
         cm = matplotlib.pyplot.cm.get_cmap('RdYlGn_r')
-        colors = numpy.asarray(self.workerMountDispatcher.data['ModelError'])
+        colors = numpy.asarray(modelError)
         scaleErrorMax = max(colors)
         scaleErrorMin = min(colors)
-        area = [200 if x >= max(colors) else 60 for x in self.workerMountDispatcher.data['ModelError']]
+        area = [200 if x >= max(colors) else 60 for x in modelError]
         theta = azimuth / 180.0 * math.pi
         r = 90 - altitude
         scatter = widget.axes.scatter(theta, r, c=colors, vmin=scaleErrorMin, vmax=scaleErrorMax, s=area, cmap=cm, zorder=0)
         if self.ui.checkShowErrorValues.isChecked():
             for i in range(0, len(theta)):
-                widget.axes.annotate('{0:3.1f}'.format(self.workerMountDispatcher.data['ModelError'][i]), xy=(theta[i], r[i]), color='#2090C0', fontsize=9, fontweight='bold', zorder=1)
+                widget.axes.annotate('{0:3.1f}'.format(modelError[i]), xy=(theta[i], r[i]), color='#2090C0', fontsize=9, fontweight='bold', zorder=1)
         colorbar = widget.fig.colorbar(scatter, pad=0.1, fraction=0.12, aspect=25, shrink=0.9, format=matplotlib.ticker.FormatStrFormatter('%1.0f'))
         colorbar.set_label('Error [arcsec]', color='white')
         matplotlib.pyplot.setp(matplotlib.pyplot.getp(colorbar.ax.axes, 'yticklabels'), color='#2090C0', fontweight='bold')
@@ -851,7 +853,7 @@ class MountWizzardApp(widget.MwWidget):
             elif _value > 90:
                 _value = 90
             self.mountCommandQueue.put(':Sh+{0:02d}#'.format(_value))
-            self.workerMountDispatcher.data['CurrentHorizonLimitHigh'] = _value
+            self.workerMountDispatcher.setData('CurrentHorizonLimitHigh', _value)
 
     def setHorizonLimitLow(self):
         _text = self.ui.le_horizonLimitLow.text()
@@ -862,7 +864,7 @@ class MountWizzardApp(widget.MwWidget):
             elif _value > 90:
                 _value = 90
             self.mountCommandQueue.put(':So+{0:02d}#'.format(_value))
-            self.workerMountDispatcher.data['CurrentHorizonLimitLow'] = _value
+            self.workerMountDispatcher.setData('CurrentHorizonLimitLow', _value)
 
     def setSlewRate(self):
         _text = self.ui.le_slewRate.text()
@@ -873,7 +875,7 @@ class MountWizzardApp(widget.MwWidget):
             elif _value > 15:
                 _value = 15
             self.mountCommandQueue.put(':Sw{0:02d}#'.format(_value))
-            self.workerMountDispatcher.data['SlewRate'] = _value
+            self.workerMountDispatcher.setData('SlewRate', _value)
 
     def setDualTracking(self):
         _value = self.ui.le_telescopeDualTrack.text()
@@ -884,7 +886,7 @@ class MountWizzardApp(widget.MwWidget):
             _value = 1
             self.ui.le_telescopeDualTrack.setText('ON')
         self.mountCommandQueue.put(':Sdat{0:1d}#'.format(_value))
-        self.workerMountDispatcher.data['DualAxisTracking'] = _value
+        self.workerMountDispatcher.setData('DualAxisTracking', _value)
 
     def setUnattendedFlip(self):
         _value = self.ui.le_telescopeUnattendedFlip.text()
@@ -895,7 +897,7 @@ class MountWizzardApp(widget.MwWidget):
             _value = 1
             self.ui.le_telescopeUnattendedFlip.setText('ON')
         self.mountCommandQueue.put(':Suaf{0:1d}#'.format(_value))
-        self.workerMountDispatcher.data['UnattendedFlip'] = _value
+        self.workerMountDispatcher.setData('UnattendedFlip', _value)
 
     def setRefractionCorrection(self):
         _value = self.ui.le_refractionStatus.text()
@@ -906,7 +908,7 @@ class MountWizzardApp(widget.MwWidget):
             _value = 1
             self.ui.le_refractionStatus.setText('ON')
         self.mountCommandQueue.put(':SREF{0:1d}#'.format(_value))
-        self.workerMountDispatcher.data['RefractionStatus'] = _value
+        self.workerMountDispatcher.setData('RefractionStatus', _value)
 
     def mountPosition1(self):
         self.mountCommandQueue.put(':PO#')
@@ -1057,111 +1059,112 @@ class MountWizzardApp(widget.MwWidget):
             self.ui.btn_driverMountConnected.setStyleSheet('QPushButton {background-color: green; color: black;}')
 
     def fillMountData(self):
-        for valueName in self.workerMountDispatcher.data:
+        data = self.workerMountDispatcher.getSnapshot()
+        for valueName in data:
             if valueName == 'Reply':
                 pass
             if valueName == 'DualAxisTracking':
-                if self.workerMountDispatcher.data[valueName] == '1':
+                if data[valueName] == '1':
                     self.ui.le_telescopeDualTrack.setText('ON')
                 else:
                     self.ui.le_telescopeDualTrack.setText('OFF')
             if valueName == 'NumberAlignmentStars':
-                self.ui.le_alignNumberStars.setText(str(self.workerMountDispatcher.data[valueName]))
-                self.ui.le_alignNumberStars2.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_alignNumberStars.setText(str(data[valueName]))
+                self.ui.le_alignNumberStars2.setText(str(data[valueName]))
             if valueName == 'ModelRMSError':
-                self.ui.le_alignErrorRMS.setText(str(self.workerMountDispatcher.data[valueName]))
-                self.ui.le_alignErrorRMS2.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_alignErrorRMS.setText(str(data[valueName]))
+                self.ui.le_alignErrorRMS2.setText(str(data[valueName]))
             if valueName == 'ModelErrorPosAngle':
-                self.ui.le_alignErrorPosAngle.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_alignErrorPosAngle.setText(str(data[valueName]))
             if valueName == 'ModelPolarError':
-                self.ui.le_alignErrorPolar.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_alignErrorPolar.setText(str(data[valueName]))
             if valueName == 'ModelOrthoError':
-                self.ui.le_alignErrorOrtho.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_alignErrorOrtho.setText(str(data[valueName]))
             if valueName == 'ModelTerms':
-                self.ui.le_alignNumberTerms.setText(str(self.workerMountDispatcher.data[valueName]))
-                self.ui.le_alignNumberTerms2.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_alignNumberTerms.setText(str(data[valueName]))
+                self.ui.le_alignNumberTerms2.setText(str(data[valueName]))
             if valueName == 'ModelKnobTurnAz':
-                self.ui.le_alignKnobTurnAz.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_alignKnobTurnAz.setText(str(data[valueName]))
             if valueName == 'ModelKnobTurnAlt':
-                self.ui.le_alignKnobTurnAlt.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_alignKnobTurnAlt.setText(str(data[valueName]))
             if valueName == 'ModelErrorAz':
-                self.ui.le_alignErrorAz.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_alignErrorAz.setText(str(data[valueName]))
             if valueName == 'ModelErrorAlt':
-                self.ui.le_alignErrorAlt.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_alignErrorAlt.setText(str(data[valueName]))
             if valueName == 'CurrentHorizonLimitLow':
                 if not self.ui.le_horizonLimitLow.hasFocus():
-                    self.ui.le_horizonLimitLow.setText(str(self.workerMountDispatcher.data[valueName]))
+                    self.ui.le_horizonLimitLow.setText(str(data[valueName]))
             if valueName == 'CurrentHorizonLimitHigh':
                 if not self.ui.le_horizonLimitLow.hasFocus():
-                    self.ui.le_horizonLimitHigh.setText(str(self.workerMountDispatcher.data[valueName]))
+                    self.ui.le_horizonLimitHigh.setText(str(data[valueName]))
             if valueName == 'SiteLongitude':
-                self.ui.le_siteLongitude.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_siteLongitude.setText(str(data[valueName]))
             if valueName == 'SiteLatitude':
-                self.ui.le_siteLatitude.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_siteLatitude.setText(str(data[valueName]))
             if valueName == 'SiteHeight':
-                self.ui.le_siteElevation.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_siteElevation.setText(str(data[valueName]))
             if valueName == 'JulianDate':
-                self.ui.le_JulianDate.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_JulianDate.setText(str(data[valueName]))
             if valueName == 'LocalSiderealTime':
-                self.ui.le_localSiderealTime.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_localSiderealTime.setText(str(data[valueName]))
             if valueName == 'TelescopeTempDEC':
-                self.ui.le_telescopeTempDECMotor.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_telescopeTempDECMotor.setText(str(data[valueName]))
             if valueName == 'RefractionTemperature':
-                self.ui.le_refractionTemperature.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_refractionTemperature.setText(str(data[valueName]))
             if valueName == 'RefractionPressure':
-                self.ui.le_refractionPressure.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_refractionPressure.setText(str(data[valueName]))
             if valueName == 'RefractionStatus':
-                if self.workerMountDispatcher.data[valueName] == '1':
+                if data[valueName] == '1':
                     self.ui.le_refractionStatus.setText('ON')
                 else:
                     self.ui.le_refractionStatus.setText('OFF')
             if valueName == 'MountStatus':
-                self.ui.le_mountStatus.setText(str(self.workerMountDispatcher.statusReference[self.workerMountDispatcher.data[valueName]]))
+                self.ui.le_mountStatus.setText(str(self.workerMountDispatcher.statusReference[data[valueName]]))
             if valueName == 'TelescopeDEC':
-                self.ui.le_telescopeDEC.setText(self.workerMountDispatcher.data[valueName])
+                self.ui.le_telescopeDEC.setText(data[valueName])
             if valueName == 'TelescopeRA':
-                self.ui.le_telescopeRA.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_telescopeRA.setText(str(data[valueName]))
             if valueName == 'TelescopeAltitude':
-                self.ui.le_telescopeAltitude.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_telescopeAltitude.setText(str(data[valueName]))
             if valueName == 'TelescopeAzimuth':
-                self.ui.le_telescopeAzimut.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_telescopeAzimut.setText(str(data[valueName]))
             if valueName == 'SlewRate':
                 if not self.ui.le_horizonLimitLow.hasFocus():
-                    self.ui.le_slewRate.setText(str(self.workerMountDispatcher.data[valueName]))
+                    self.ui.le_slewRate.setText(str(data[valueName]))
             if valueName == 'MeridianLimitGuide':
-                self.ui.le_meridianLimitGuide.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_meridianLimitGuide.setText(str(data[valueName]))
             if valueName == 'MeridianLimitSlew':
-                self.ui.le_meridianLimitSlew.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_meridianLimitSlew.setText(str(data[valueName]))
             if valueName == 'UnattendedFlip':
-                if self.workerMountDispatcher.data[valueName] == '1':
+                if data[valueName] == '1':
                     self.ui.le_telescopeUnattendedFlip.setText('ON')
                 else:
                     self.ui.le_telescopeUnattendedFlip.setText('OFF')
             if valueName == 'TimeToFlip':
-                self.ui.le_timeToFlip.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_timeToFlip.setText(str(data[valueName]))
             if valueName == 'TimeToMeridian':
-                self.ui.le_timeToMeridian.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_timeToMeridian.setText(str(data[valueName]))
             if valueName == 'FirmwareProductName':
-                self.ui.le_firmwareProductName.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_firmwareProductName.setText(str(data[valueName]))
             if valueName == 'FirmwareNumber':
-                self.ui.le_firmwareNumber.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_firmwareNumber.setText(str(data[valueName]))
             if valueName == 'FirmwareDate':
-                self.ui.le_firmwareDate.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_firmwareDate.setText(str(data[valueName]))
             if valueName == 'FirmwareTime':
-                self.ui.le_firmwareTime.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_firmwareTime.setText(str(data[valueName]))
             if valueName == 'HardwareVersion':
-                self.ui.le_hardwareVersion.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_hardwareVersion.setText(str(data[valueName]))
             if valueName == 'TelescopePierSide':
-                self.ui.le_telescopePierSide.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_telescopePierSide.setText(str(data[valueName]))
             if valueName == 'UTCDataValid':
-                if self.workerMountDispatcher.data[valueName] == 'V':
+                if data[valueName] == 'V':
                     self.ui.le_UTCDataValid.setText('VALID')
-                elif self.workerMountDispatcher.data[valueName] == 'E':
+                elif data[valueName] == 'E':
                     self.ui.le_UTCDataValid.setText('EXPIRED')
                 else:
                     self.ui.le_UTCDataValid.setText('INVALID')
             if valueName == 'UTCDataExpirationDate':
-                self.ui.le_UTCDataExpirationDate.setText(str(self.workerMountDispatcher.data[valueName]))
+                self.ui.le_UTCDataExpirationDate.setText(str(data[valueName]))
 
     def setDomeStatus(self, status):
         if status == 0:
@@ -1456,6 +1459,8 @@ if __name__ == "__main__":
         os.makedirs(os.getcwd() + '/images')
     if not os.path.isdir(os.getcwd() + '/config'):
         os.makedirs(os.getcwd() + '/config')
+    if not os.path.isdir(os.getcwd() + '/telemetry'):
+        os.makedirs(os.getcwd() + '/telemetry')
 
     splash.showMessage('Starting logging')
     splash.setValue(40)
@@ -20,12 +20,10 @@
 import logging
 import PyQt5
 from baseclasses import widget
-from astrometry import transform
 import astropy
 import copy
 import numpy
 import matplotlib
-import bisect
 from gui import hemisphere_window_ui
 
 
@@ -35,7 +33,7 @@ class HemisphereWindow(widget.MwWidget):
     def __init__(self, app):
         super(HemisphereWindow, self).__init__()
         self.app = app
-        self.transform = transform.Transform(self.app)
+        self.transform = self.app.transform
         self.mutexDrawCanvas = PyQt5.QtCore.QMutex()
         self.mutexDrawCanvasMoving = PyQt5.QtCore.QMutex()
 
@@ -45,17 +43,21 @@ class HemisphereWindow(widget.MwWidget):
         self.pointerDome1 = None
         self.pointerDome2 = None
         self.pointerTrack = None
+        # cached pixels of the moving plane without the pointers for blitting
+        self.backgroundMoving = None
         self.pointsPlotBig = None
         self.pointsPlotSmall = None
         self.pointsPlotCross = None
         self.starsAlignment = None
-        self.starsAnnotate = list()
+        self.starsLabel = None
         self.maskPlotFill = None
         self.maskPlotMarker = None
         self.deltaGuide = None
         self.deltaSlew = None
         self.celestial = None
-        self.annotate = list()
+        self.pointsLabel = None
+        # glyph outlines of the labels, model points are renumbered with every edit
+        self.labelPaths = dict()
         self.offx = 1
         self.offy = 1
         self.ui = hemisphere_window_ui.Ui_HemisphereDialog()
@@ -84,6 +86,8 @@ class HemisphereWindow(widget.MwWidget):
         background = self.hemisphereMatplotlibMoving.fig.canvas.parentWidget()
         background.setStyleSheet('background-color: transparent;')
         self.hemisphereMatplotlibMoving.axes = self.hemisphereMatplotlibMoving.fig.add_subplot(111)
+        # every full draw of the moving plane (window resize as well) renews the background for blitting
+        self.hemisphereMatplotlibMoving.fig.canvas.mpl_connect('draw_event', self.storeBackgroundMoving)
 
         # for the stars in background
         self.hemisphereMatplotlibStar = widget.IntegrateMatplotlib(self.ui.hemisphereStar)
@@ -93,6 +97,8 @@ class HemisphereWindow(widget.MwWidget):
         background = self.hemisphereMatplotlibStar.fig.canvas.parentWidget()
         background.setStyleSheet('background-color: transparent;')
         self.hemisphereMatplotlibStar.axes = self.hemisphereMatplotlibStar.fig.add_subplot(111)
+        # all artists are created once and updated afterwards
+        self.setupHemisphere()
 
         # signal connections
         self.app.workerModelingDispatcher.signalModelPointsRedraw.connect(self.updateModelPoints)
@@ -127,6 +133,7 @@ class HemisphereWindow(widget.MwWidget):
         # and using it fo the other plot widgets to be identically same size and position
         self.hemisphereMatplotlibStar.axes.set_position(axesPos)
         self.hemisphereMatplotlibMoving.axes.set_position(axesPos)
+        self.backgroundMoving = None
         # size the header window as well
         self.ui.hemisphereBackground.setGeometry(0, 0, self.width(), 126)
 
@@ -211,8 +218,6 @@ class HemisphereWindow(widget.MwWidget):
             self.logger.warning('Performance issue in drawing')
             return
         self.hemisphereMatplotlib.fig.canvas.draw()
-        if self.ui.checkShowAlignmentStars.isChecked():
-            self.hemisphereMatplotlibStar.fig.canvas.draw()
         self.mutexDrawCanvas.unlock()
         PyQt5.QtWidgets.QApplication.processEvents()
 
@@ -220,9 +225,27 @@ class HemisphereWindow(widget.MwWidget):
         if not self.mutexDrawCanvasMoving.tryLock():
             self.logger.warning('Performance issue in drawing')
             return
-        self.hemisphereMatplotlibMoving.fig.canvas.draw()
+        canvas = self.hemisphereMatplotlibMoving.fig.canvas
+        if self.backgroundMoving is None:
+            # full draw, the background is stored in the draw event
+            canvas.draw()
+        else:
+            # only the pointers are drawn on the stored background
+            canvas.restore_region(self.backgroundMoving)
+            self.drawPointers()
+            canvas.blit(self.hemisphereMatplotlibMoving.fig.bbox)
         self.mutexDrawCanvasMoving.unlock()
-        PyQt5.QtWidgets.QApplication.processEvents()
+
+    def storeBackgroundMoving(self, event):
+        # pointers are animated artists, so they are not part of a full draw and the background is clean
+        canvas = self.hemisphereMatplotlibMoving.fig.canvas
+        self.backgroundMoving = canvas.copy_from_bbox(self.hemisphereMatplotlibMoving.fig.bbox)
+        self.drawPointers()
+
+    def drawPointers(self):
+        for pointer in [self.pointerDome1, self.pointerDome2, self.pointerAzAlt1, self.pointerAzAlt2, self.pointerAzAlt3]:
+            if pointer is not None:
+                self.hemisphereMatplotlibMoving.axes.draw_artist(pointer)
 
     def updateModelPoints(self):
         if self.showStatus:
@@ -232,14 +255,13 @@ class HemisphereWindow(widget.MwWidget):
 
     def updateMeridianLimits(self):
         if self.showStatus:
-            self.app.sharedMountDataLock.lockForRead()
-            if 'MeridianLimitSlew' in self.app.workerMountDispatcher.data:
-                slew = copy.copy(self.app.workerMountDispatcher.data['MeridianLimitSlew'])
-                guide = copy.copy(self.app.workerMountDispatcher.data['MeridianLimitGuide'])
+            mountData = self.app.workerMountDispatcher.getSnapshot()
+            if 'MeridianLimitSlew' in mountData:
+                slew = copy.copy(mountData['MeridianLimitSlew'])
+                guide = copy.copy(mountData['MeridianLimitGuide'])
             else:
                 slew = 0
                 guide = 0
-            self.app.sharedMountDataLock.unlock()
             self.deltaGuide.set_visible(self.ui.checkShowMeridian.isChecked())
             self.deltaSlew.set_visible(self.ui.checkShowMeridian.isChecked())
             self.deltaGuide.set_xy((180 - guide, 0))
@@ -259,13 +281,45 @@ class HemisphereWindow(widget.MwWidget):
     def updateAlignmentStars(self):
         if self.showStatus:
             self.ui.hemisphereStar.setVisible(self.ui.checkShowAlignmentStars.isChecked())
-            starsTopo = copy.copy(self.app.workerMountDispatcher.data['starsTopo'])
-            starsNames = copy.copy(self.app.workerMountDispatcher.data['starsNames'])
-            if len(starsNames) > 0:
-                self.starsAlignment.set_data([i[0] for i in starsTopo], [i[1] for i in starsTopo])
-                for i in range(0, len(starsNames)):
-                    self.starsAnnotate[i].set_position((starsTopo[i][0] + self.offx, starsTopo[i][1] + self.offy))
-                self.hemisphereMatplotlibStar.fig.canvas.draw()
+            self.setAlignmentStars()
+            self.hemisphereMatplotlibStar.fig.canvas.draw()
+
+    def setAlignmentStars(self):
+        mountData = self.app.workerMountDispatcher.getSnapshot()
+        starsTopo = mountData['starsTopo']
+        starsNames = mountData['starsNames']
+        self.starsAlignment.set_data([i[0] for i in starsTopo], [i[1] for i in starsTopo])
+        self.setLabels(self.starsLabel, starsNames, starsTopo)
+
+    def setModelPoints(self, points):
+        self.pointsPlotBig.set_data([i[0] for i in points], [i[1] for i in points])
+        self.pointsPlotSmall.set_data([i[0] for i in points], [i[1] for i in points])
+        self.setLabels(self.pointsLabel, ['{0:2d}'.format(i + 1) for i in range(0, len(points))], points)
+
+    def setHorizon(self, horizon):
+        self.maskPlotMarker.set_data([i[0] for i in horizon], [i[1] for i in horizon])
+        x = [i[0] for i in horizon]
+        x.insert(0, 0)
+        x.append(360)
+        y = [i[1] for i in horizon]
+        y.insert(0, 0)
+        y.append(0)
+        self.maskPlotFill.set_xy(numpy.column_stack((x, y)))
+
+    def addLabels(self, axes, fontsize, color):
+        # all labels of a plane are one collection of glyph outlines instead of one text artist per label.
+        # the marker size scales the outlines of size 1 to the font size in points
+        labels = axes.scatter([], [], s=fontsize ** 2, color=color, linewidths=0)
+        labels.set_offsets(numpy.zeros((0, 2)))
+        return labels
+
+    def setLabels(self, labels, texts, positions):
+        texts = texts[:len(positions)]
+        for text in texts:
+            if text not in self.labelPaths:
+                self.labelPaths[text] = matplotlib.textpath.TextPath((0, 0), text, size=1)
+        labels.set_paths([self.labelPaths[text] for text in texts])
+        labels.set_offsets(numpy.array([(i[0] + self.offx, i[1] + self.offy) for i in positions[:len(texts)]]).reshape(-1, 2))
 
     def setAzAltPointer(self, az, alt):
         if self.showStatus:
@@ -309,8 +363,7 @@ class HemisphereWindow(widget.MwWidget):
         self.pointsPlotBig.set_color('#00A000')
         self.starsAlignment.set_color('#C0C000')
         self.starsAlignment.set_markersize(6)
-        for i in range(0, len(self.starsAnnotate)):
-            self.starsAnnotate[i].set_color('#808080')
+        self.starsLabel.set_facecolor('#808080')
         self.ui.hemisphere.stackUnder(self.ui.hemisphereMoving)
         if self.ui.checkEditNone.isChecked():
             pass
@@ -324,23 +377,21 @@ class HemisphereWindow(widget.MwWidget):
         elif self.ui.checkPolarAlignment.isChecked():
             self.starsAlignment.set_color('#FFFF00')
             self.starsAlignment.set_markersize(12)
-            for i in range(0, len(self.starsAnnotate)):
-                self.starsAnnotate[i].set_color('#F0F0F0')
+            self.starsLabel.set_facecolor('#F0F0F0')
             self.ui.hemisphere.stackUnder(self.ui.hemisphereMoving)
         else:
             pass
         self.drawCanvas()
+        if self.ui.checkShowAlignmentStars.isChecked():
+            self.hemisphereMatplotlibStar.fig.canvas.draw()
 
     def onMouse(self, event):
         if event.inaxes is None:
             return
         ind = None
-        indlow = None
-        self.app.sharedMountDataLock.lockForRead()
-        stars = self.app.workerMountDispatcher.data['starsTopo']
-        self.app.sharedMountDataLock.unlock()
-        points = self.app.workerModelingDispatcher.modelingRunner.modelPoints.modelPoints
-        horizon = self.app.workerModelingDispatcher.modelingRunner.modelPoints.horizonPoints
+        mountData = self.app.workerMountDispatcher.getSnapshot()
+        stars = mountData['starsTopo']
+        modelPoints = self.app.workerModelingDispatcher.modelingRunner.modelPoints
         if self.ui.checkEditNone.isChecked():
             # double click makes slew to target
             if event.button == 1 and event.dblclick:
@@ -350,9 +401,7 @@ class HemisphereWindow(widget.MwWidget):
                 value = self.dialogMessage(self, 'Hemisphere direct slew', question)
                 if value == PyQt5.QtWidgets.QMessageBox.Ok:
                     # get tracking status of mount:
-                    self.app.sharedMountDataLock.lockForRead()
-                    isTracking = (self.app.workerMountDispatcher.data['Status'] == '0')
-                    self.app.sharedMountDataLock.unlock()
+                    isTracking = (mountData['Status'] == '0')
                     # sending the commands for slewing
                     self.app.mountCommandQueue.put(':PO#')
                     self.app.mountCommandQueue.put(':Sz{0:03d}*00#'.format(azimuth))
@@ -367,20 +416,18 @@ class HemisphereWindow(widget.MwWidget):
                 print('got event')
                 ind = self.get_ind_under_point(event, 2, stars)
                 if ind:
-                    self.app.sharedMountDataLock.lockForRead()
-                    name = self.app.workerMountDispatcher.data['starsNames'][ind]
+                    name = mountData['starsNames'][ind]
                     # RA in degrees ICRS
-                    RaJ2000 = self.transform.degStringToDecimal(self.app.workerMountDispatcher.data['starsICRS'][ind][0], ' ')
-                    DecJ2000 = self.transform.degStringToDecimal(self.app.workerMountDispatcher.data['starsICRS'][ind][1], ' ')
+                    RaJ2000 = self.transform.degStringToDecimal(mountData['starsICRS'][ind][0], ' ')
+                    DecJ2000 = self.transform.degStringToDecimal(mountData['starsICRS'][ind][1], ' ')
                     # correct for proper motion
                     jd_2000 = 2451544.5
-                    jd_delta = float(self.app.workerMountDispatcher.data['JulianDate']) - jd_2000
+                    jd_delta = float(mountData['JulianDate']) - jd_2000
                     jd_year_delta = jd_delta / 365.25
-                    RaJ2000 += jd_year_delta * self.app.workerMountDispatcher.data['starsICRS'][ind][2] / 3600000
-                    DecJ2000 += jd_year_delta * self.app.workerMountDispatcher.data['starsICRS'][ind][3] / 3600000
+                    RaJ2000 += jd_year_delta * mountData['starsICRS'][ind][2] / 3600000
+                    DecJ2000 += jd_year_delta * mountData['starsICRS'][ind][3] / 3600000
                     question = 'Do you want to slew to\npolar align star:\n\n{0}'.format(name)
                     value = self.dialogMessage(self, 'Polar Align Routine', question)
-                    self.app.sharedMountDataLock.unlock()
                     if value == PyQt5.QtWidgets.QMessageBox.Ok:
                         # transform to JNOW, RAJ2000 comes in degrees, need to be hours
                         RaJNow, DecJNow = self.transform.transformERFA(RaJ2000, DecJ2000, 3)
@@ -392,59 +439,37 @@ class HemisphereWindow(widget.MwWidget):
                         self.app.mountCommandQueue.put(':MSap#')
                     # todo: open automatically the image window and start continuously taking pictures
 
-        # first do the model points
+        # first do the model points, hit test and edits are done with the spatial index of the points
+        point = None
         if self.ui.checkEditModelPoints.isChecked():
-            ind = self.get_ind_under_point(event, 2, points)
+            point = modelPoints.nearestModelPoint(event.xdata, event.ydata, 2)
         if self.ui.checkEditHorizonMask.isChecked():
-            ind = self.get_ind_under_point(event, 2, horizon)
-            indlow = self.get_two_ind_under_point_in_x(event, horizon)
-        if event.button == 3 and ind is not None and self.ui.checkEditModelPoints.isChecked():
-            if len(points) > 0:
-                del(points[ind])
-                self.annotate[ind].remove()
-                del(self.annotate[ind])
-            self.pointsPlotBig.set_data([i[0] for i in points], [i[1] for i in points])
-            self.pointsPlotSmall.set_data([i[0] for i in points], [i[1] for i in points])
-        if event.button == 1 and ind is None and self.ui.checkEditModelPoints.isChecked():
-            points.append((event.xdata, event.ydata))
-            if self.app.ui.checkSortPoints.isChecked():
-                self.app.workerModelingDispatcher.modelingRunner.modelPoints.sortPoints()
-            self.annotate.append(self.hemisphereMatplotlib.axes.annotate('', xy=(event.xdata + self.offx, event.ydata + self.offy), color='#E0E0E0'))
-            self.pointsPlotBig.set_data([i[0] for i in points], [i[1] for i in points])
-            self.pointsPlotSmall.set_data([i[0] for i in points], [i[1] for i in points])
-        if self.ui.checkEditModelPoints.isChecked():
-            for i in range(0, len(points)):
-                self.annotate[i].set_text('{0:2d}'.format(i + 1))
-            self.app.messageQueue.put('ToModel>{0:02d}'.format(len(points)))
+            point = modelPoints.nearestHorizonPoint(event.xdata, event.ydata, 2)
+        # only the changed plane is drawn again
+        changed = False
+        if event.button == 3 and point is not None and self.ui.checkEditModelPoints.isChecked():
+            changed = modelPoints.deleteModelPoint(point)
+        if event.button == 1 and point is None and self.ui.checkEditModelPoints.isChecked():
+            modelPoints.addModelPoint((event.xdata, event.ydata))
+            modelPoints.orderPoints(self.app.ui.checkSortPoints.isChecked())
+            changed = True
+        if changed:
+            self.setModelPoints(modelPoints.modelPoints)
+            self.app.messageQueue.put('ToModel>{0:02d}'.format(len(modelPoints.modelPoints)))
 
         # now do the horizon mask
-        if event.button == 3 and ind is not None and self.ui.checkEditHorizonMask.isChecked():
-            # delete a point
-            if len(horizon) > 2:
-                del(horizon[ind])
-            # now redraw plot
-            self.maskPlotMarker.set_data([i[0] for i in horizon], [i[1] for i in horizon])
-            x = [i[0] for i in horizon]
-            x.insert(0, 0)
-            x.append(360)
-            y = [i[1] for i in horizon]
-            y.insert(0, 0)
-            y.append(0)
-            self.maskPlotFill.set_xy(numpy.column_stack((x, y)))
-        if event.button == 1 and ind is None and self.ui.checkEditHorizonMask.isChecked():
-            if indlow is not None:
-                horizon.insert(indlow + 1, (event.xdata, event.ydata))
-            self.maskPlotMarker.set_data([i[0] for i in horizon], [i[1] for i in horizon])
-            x = [i[0] for i in horizon]
-            x.insert(0, 0)
-            x.append(360)
-            y = [i[1] for i in horizon]
-            y.insert(0, 0)
-            y.append(0)
-            self.maskPlotFill.set_xy(numpy.column_stack((x, y)))
+        if event.button == 3 and point is not None and self.ui.checkEditHorizonMask.isChecked():
+            if modelPoints.deleteHorizonPoint(point):
+                self.setHorizon(modelPoints.horizonPoints)
+                changed = True
+        if event.button == 1 and point is None and self.ui.checkEditHorizonMask.isChecked():
+            if modelPoints.addHorizonPoint([event.xdata, event.ydata]):
+                self.setHorizon(modelPoints.horizonPoints)
+                changed = True
 
         # finally redraw
-        self.drawCanvas()
+        if changed:
+            self.drawCanvas()
 
     @staticmethod
     def get_ind_under_point(event, epsilon, xy):
@@ -458,37 +483,17 @@ class HemisphereWindow(widget.MwWidget):
             ind = None
         return ind
 
-    @staticmethod
-    def get_two_ind_under_point_in_x(event, xy):
-        if len(xy) < 2:
-            return None
-        xt = [i[0] for i in xy]
-        return bisect.bisect_left(xt, event.xdata) - 1
-
-    def drawHemisphere(self):
-        for i in range(0, len(self.annotate)):
-            self.annotate[i].remove()
-        self.annotate = list()
-        self.starsAnnotate = list()
+    def setupHemisphere(self):
         # star plane
-        self.hemisphereMatplotlibStar.axes.cla()
         self.hemisphereMatplotlibStar.fig.canvas.mpl_connect('button_press_event', self.onMouse)
         self.hemisphereMatplotlibStar.axes.set_facecolor((0, 0, 0, 0))
         self.hemisphereMatplotlibStar.axes.set_xlim(0, 360)
         self.hemisphereMatplotlibStar.axes.set_ylim(0, 90)
         self.hemisphereMatplotlibStar.axes.set_axis_off()
-        starsTopo = self.app.workerMountDispatcher.data['starsTopo']
-        starsNames = self.app.workerMountDispatcher.data['starsNames']
-        self.starsAlignment,  = self.hemisphereMatplotlibStar.axes.plot([i[0] for i in starsTopo], [i[1] for i in starsTopo], '*', markersize=6, color='#C0C000')
-        for i in range(0, len(starsTopo)):
-            self.starsAnnotate.append(self.hemisphereMatplotlibStar.axes.annotate(starsNames[i],
-                                                                                  xy=(starsTopo[i][0] + self.offx,
-                                                                                      starsTopo[i][1] + self.offy),
-                                                                                  xycoords=('data', 'data'),
-                                                                                  color='#808080', fontsize=12, clip_on=True))
+        self.starsAlignment,  = self.hemisphereMatplotlibStar.axes.plot([], [], '*', markersize=6, color='#C0C000')
+        self.starsLabel = self.addLabels(self.hemisphereMatplotlibStar.axes, 12, '#808080')
 
         # moving widget plane
-        self.hemisphereMatplotlibMoving.axes.cla()
         self.hemisphereMatplotlibMoving.fig.canvas.mpl_connect('button_press_event', self.onMouse)
         self.hemisphereMatplotlibMoving.axes.set_facecolor((0, 0, 0, 0))
         self.hemisphereMatplotlibMoving.axes.set_xlim(0, 360)
@@ -496,7 +501,6 @@ class HemisphereWindow(widget.MwWidget):
         self.hemisphereMatplotlibMoving.axes.set_axis_off()
 
         # fixed points and horizon plane
-        self.hemisphereMatplotlib.axes.cla()
         self.hemisphereMatplotlib.fig.canvas.mpl_connect('button_press_event', self.onMouse)
         self.hemisphereMatplotlib.axes.spines['bottom'].set_color('#2090C0')
         self.hemisphereMatplotlib.axes.spines['top'].set_color('#2090C0')
@@ -512,54 +516,49 @@ class HemisphereWindow(widget.MwWidget):
         self.hemisphereMatplotlib.axes.set_xlabel('Azimuth in degrees', color='#2090C0', fontweight='bold', fontsize=12)
         self.hemisphereMatplotlib.axes.set_ylabel('Altitude in degrees', color='#2090C0', fontweight='bold', fontsize=12)
         # horizon
-        horizon = self.app.workerModelingDispatcher.modelingRunner.modelPoints.horizonPoints
-        if len(horizon) < 2:
-            del(horizon[:])
-            horizon.append((0, 0))
-            horizon.append((360, 0))
-        x = [i[0] for i in horizon]
-        x.insert(0, 0)
-        x.append(360)
-        y = [i[1] for i in horizon]
-        y.insert(0, 0)
-        y.append(0)
-        self.maskPlotFill,  = self.hemisphereMatplotlib.axes.fill(x, y, color='#002000', zorder=-20)
-        self.maskPlotMarker,  = self.hemisphereMatplotlib.axes.plot([i[0] for i in horizon], [i[1] for i in horizon], color='#006000', zorder=-20, lw=3)
-        if self.ui.checkEditHorizonMask.isChecked():
-            self.maskPlotMarker.set_marker('o')
-            self.maskPlotMarker.set_color('#FF00FF')
-        # model points
-        points = self.app.workerModelingDispatcher.modelingRunner.modelPoints.modelPoints
-        # draw points in two colors
-        self.pointsPlotBig,  = self.hemisphereMatplotlib.axes.plot([i[0] for i in points], [i[1] for i in points], 'o', markersize=9, fillstyle='none', color='#00A000')
-        self.pointsPlotSmall,  = self.hemisphereMatplotlib.axes.plot([i[0] for i in points], [i[1] for i in points], 'o', markersize=3, color='#E0E000', picker='None')
-        if self.ui.checkEditModelPoints.isChecked():
-            self.pointsPlotBig.set_color('#FF00FF')
-        # add text to points
-        for i in range(0, len(points)):
-            self.annotate.append(self.hemisphereMatplotlib.axes.annotate('{0:2d}'.format(i+1), xy=(points[i][0] + self.offx, points[i][1] + self.offy), color='#E0E0E0'))
-        # add crosses, if modeling was done to recap when opening the window
+        self.maskPlotFill,  = self.hemisphereMatplotlib.axes.fill([0, 360], [0, 0], color='#002000', zorder=-20)
+        self.maskPlotMarker,  = self.hemisphereMatplotlib.axes.plot([], [], color='#006000', zorder=-20, lw=3)
+        # model points drawn in two colors and their numbers
+        self.pointsPlotBig,  = self.hemisphereMatplotlib.axes.plot([], [], 'o', markersize=9, fillstyle='none', color='#00A000')
+        self.pointsPlotSmall,  = self.hemisphereMatplotlib.axes.plot([], [], 'o', markersize=3, color='#E0E000', picker='None')
+        self.pointsLabel = self.addLabels(self.hemisphereMatplotlib.axes, 10, '#E0E0E0')
+        # crosses for the imaged points while modeling
         self.pointsPlotCross, = self.hemisphereMatplotlib.axes.plot([], [], 'x', color='#FF0000', zorder=5, markersize=9, lw=2)
-        # draw celestial equator
-        celestial = self.app.workerModelingDispatcher.modelingRunner.modelPoints.celestialEquator
-        self.celestial,  = self.hemisphereMatplotlib.axes.plot([i[0] for i in celestial], [i[1] for i in celestial], '.', markersize=1, fillstyle='none', color='#808080', visible=False)
-        # draw meridian limits
+        # celestial equator
+        self.celestial,  = self.hemisphereMatplotlib.axes.plot([], [], '.', markersize=1, fillstyle='none', color='#808080', visible=False)
+        # meridian limits
         self.deltaGuide = matplotlib.patches.Rectangle((180, 0), 1, 90, zorder=-10, color='#FFFF0040', lw=1, fill=True, visible=False)
         self.deltaSlew = matplotlib.patches.Rectangle((180, 0), 1, 90, zorder=-10, color='#FF000040', lw=1, fill=True, visible=False)
         self.hemisphereMatplotlib.axes.add_patch(self.deltaGuide)
         self.hemisphereMatplotlib.axes.add_patch(self.deltaSlew)
 
         # now to the third widget on top of the other ones
-        # adding the pointer of mount to hemisphereMoving plot
-        self.pointerAzAlt1,  = self.hemisphereMatplotlibMoving.axes.plot(180, 45, zorder=10, color='#FF00FF', marker='o', markersize=25, markeredgewidth=3, fillstyle='none', visible=False)
-        self.pointerAzAlt2,  = self.hemisphereMatplotlibMoving.axes.plot(180, 45, zorder=10, color='#FF00FF', marker='o', markersize=10, markeredgewidth=1, fillstyle='none', visible=False)
-        self.pointerAzAlt3,  = self.hemisphereMatplotlibMoving.axes.plot(180, 45, zorder=10, color='#FF00FF', marker='.', markersize=2, markeredgewidth=1, fillstyle='none', visible=False)
+        # adding the pointer of mount to hemisphereMoving plot, pointers are animated for blitting
+        self.pointerAzAlt1,  = self.hemisphereMatplotlibMoving.axes.plot(180, 45, zorder=10, color='#FF00FF', marker='o', markersize=25, markeredgewidth=3, fillstyle='none', visible=False, animated=True)
+        self.pointerAzAlt2,  = self.hemisphereMatplotlibMoving.axes.plot(180, 45, zorder=10, color='#FF00FF', marker='o', markersize=10, markeredgewidth=1, fillstyle='none', visible=False, animated=True)
+        self.pointerAzAlt3,  = self.hemisphereMatplotlibMoving.axes.plot(180, 45, zorder=10, color='#FF00FF', marker='.', markersize=2, markeredgewidth=1, fillstyle='none', visible=False, animated=True)
         # adding pointer of dome if dome is present
-        self.pointerDome1 = matplotlib.patches.Rectangle((165, 1), 30, 88, zorder=-30, color='#40404080', lw=3, fill=True, visible=False)
-        self.pointerDome2 = matplotlib.patches.Rectangle((165, 1), 30, 88, zorder=-30, color='#80808080', lw=3, fill=False, visible=False)
+        self.pointerDome1 = matplotlib.patches.Rectangle((165, 1), 30, 88, zorder=-30, color='#40404080', lw=3, fill=True, visible=False, animated=True)
+        self.pointerDome2 = matplotlib.patches.Rectangle((165, 1), 30, 88, zorder=-30, color='#80808080', lw=3, fill=False, visible=False, animated=True)
         self.hemisphereMatplotlibMoving.axes.add_patch(self.pointerDome1)
         self.hemisphereMatplotlibMoving.axes.add_patch(self.pointerDome2)
 
+    def drawHemisphere(self):
+        # the artists are kept, only their data is renewed
+        self.setAlignmentStars()
+        horizon = self.app.workerModelingDispatcher.modelingRunner.modelPoints.horizonPoints
+        if len(horizon) < 2:
+            del(horizon[:])
+            horizon.append([0, 0])
+            horizon.append([360, 0])
+            self.app.workerModelingDispatcher.modelingRunner.modelPoints.compileHorizonMask()
+        self.setHorizon(horizon)
+        self.setModelPoints(self.app.workerModelingDispatcher.modelingRunner.modelPoints.modelPoints)
+        # crosses are shown again, if modeling is done with the window open
+        self.pointsPlotCross.set_data([], [])
+        celestial = self.app.workerModelingDispatcher.modelingRunner.modelPoints.celestialEquator
+        self.celestial.set_data([i[0] for i in celestial], [i[1] for i in celestial])
+
         # drawing the whole stuff
         self.setOperationModus()
         self.resizeEvent(0)
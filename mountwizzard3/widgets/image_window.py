@@ -27,44 +27,20 @@ import astropy.io.fits as pyfits
 from astropy.visualization import MinMaxInterval, ImageNormalize, AsymmetricPercentileInterval, PowerStretch
 from matplotlib import use
 from baseclasses import widget
-from astrometry import transform
+from baseclasses.worker import Worker
+from imaging import image_statistics
 from gui import image_window_ui
 use('Qt5Agg')
 
 
-class WorkerSignals(PyQt5.QtCore.QObject):
-
-    finished = PyQt5.QtCore.pyqtSignal()
-    error = PyQt5.QtCore.pyqtSignal(object)
-    result = PyQt5.QtCore.pyqtSignal(object)
-
-
-class Worker(PyQt5.QtCore.QRunnable):
-
-    def __init__(self, fn, *args, **kwargs):
-        super(Worker, self).__init__()
-        # Store constructor arguments (re-used for processing)
-        self.fn = fn
-        self.args = args
-        self.kwargs = kwargs
-        self.signals = WorkerSignals()
-
-    @PyQt5.QtCore.pyqtSlot()
-    def run(self):
-        try:
-            result = self.fn(*self.args, **self.kwargs)
-        except Exception as e:
-            self.signals.error.emit(e)
-            print(e)
-        else:
-            self.signals.result.emit(result)
-        finally:
-            self.signals.finished.emit()
-
-
 class ImagesWindow(widget.MwWidget):
     logger = logging.getLogger(__name__)
     BASENAME = 'exposure-'
+    # lower and upper percentile of the strech modes
+    STRECH_PERCENTILES = {'Low': (98, 99.998),
+                          'Mid': (25, 99.95),
+                          'High': (12, 99.9),
+                          'Super': (1, 99.8)}
     signalShowFitsImage = PyQt5.QtCore.pyqtSignal(str)
     signalSolveFitsImage = PyQt5.QtCore.pyqtSignal(str)
     signalSetRaSolved = PyQt5.QtCore.pyqtSignal(str)
@@ -72,6 +48,7 @@ class ImagesWindow(widget.MwWidget):
     signalSetAngleSolved = PyQt5.QtCore.pyqtSignal(str)
     signalSetManualEnable = PyQt5.QtCore.pyqtSignal(bool)
     signalDisplayImage = PyQt5.QtCore.pyqtSignal(object)
+    signalImageStatistics = PyQt5.QtCore.pyqtSignal(object)
 
     def __init__(self, app):
         super(ImagesWindow, self).__init__()
@@ -81,7 +58,7 @@ class ImagesWindow(widget.MwWidget):
         self.imagePath = ''
         self.imageReady = False
         self.solveReady = False
-        self.transform = transform.Transform(self.app)
+        self.transform = self.app.transform
         self.ui = image_window_ui.Ui_ImageDialog()
         self.ui.setupUi(self)
         self.initUI()
@@ -90,6 +67,8 @@ class ImagesWindow(widget.MwWidget):
         # set the minimum size
         self.setMinimumSize(791, 400)
         self.image = numpy.zeros([20, 20])
+        # histograms of the actual image, calculated in background after loading
+        self.imageStatistics = None
         self.ui.btn_strechLow.setChecked(True)
         self.ui.btn_size100.setChecked(True)
         self.ui.btn_colorGrey.setChecked(True)
@@ -144,6 +123,7 @@ class ImagesWindow(widget.MwWidget):
         self.app.workerAstrometry.imageDataDownloaded.connect(self.setSolveReady)
         self.signalSetManualEnable.connect(self.setManualEnable)
         self.signalDisplayImage.connect(self.displayImage)
+        self.signalImageStatistics.connect(self.setImageStatistics)
 
     def resizeEvent(self, QResizeEvent):
         # allow message window to be resized in height
@@ -317,9 +297,28 @@ class ImagesWindow(widget.MwWidget):
                 return
         self.image = copy.copy(fitsFileHandle[0].data)
         fitsFileHandle.close()
+        # the image is shown as soon as the statistics are there
+        self.imageStatistics = None
+        worker = Worker(image_statistics.ImageStatistics, self.image)
+        worker.signals.result.connect(self.signalImageStatistics)
+        self.threadpool.start(worker)
+
+    @PyQt5.QtCore.pyqtSlot(object)
+    def setImageStatistics(self, statistics):
+        # statistics of an image, which is not shown any more, are dropped
+        if statistics.image is not self.image:
+            return
+        self.imageStatistics = statistics
+        self.updateImage()
+
+    def updateImage(self):
         strechMode = self.getStrechMode()
         colorMode = self.getColorMode()
         zoomMode = self.getZoomMode()
+        if self.imageStatistics is not None and self.imageStatistics.image is self.image:
+            # with the histograms the limits are fast enough for the gui thread
+            self.displayImage(self.calculateImage(self.image, strechMode, colorMode, zoomMode, self.imageStatistics))
+            return
         worker = Worker(self.calculateImage, self.image, strechMode, colorMode, zoomMode)
         worker.signals.result.connect(self.signalDisplayImage)
         self.threadpool.start(worker)
@@ -334,8 +333,8 @@ class ImagesWindow(widget.MwWidget):
         self.drawMarkers()
         self.resizeEvent(0)
 
-    @staticmethod
-    def calculateImage(imageOrig, strechMode, colorMode, zoomMode):
+    @classmethod
+    def calculateImage(cls, imageOrig, strechMode, colorMode, zoomMode, statistics=None):
         sizeX, sizeY = imageOrig.shape
         # calculate the cropping parameters
         if zoomMode == 12:
@@ -361,43 +360,24 @@ class ImagesWindow(widget.MwWidget):
         # crop image
         image = imageOrig[minx:maxx, miny:maxy]
         # calculation the strech
-        if strechMode == 'Low':
-            interval = AsymmetricPercentileInterval(98, 99.998)
-        elif strechMode == 'Mid':
-            interval = AsymmetricPercentileInterval(25, 99.95)
-        elif strechMode == 'High':
-            interval = AsymmetricPercentileInterval(12, 99.9)
+        lowerPercentile, upperPercentile = cls.STRECH_PERCENTILES[strechMode]
+        if statistics is not None:
+            vmin, vmax = statistics.limits(lowerPercentile, upperPercentile, (minx, maxx, miny, maxy))
         else:
-            interval = AsymmetricPercentileInterval(1, 99.8)
-        vmin, vmax = interval.get_limits(image)
+            vmin, vmax = AsymmetricPercentileInterval(lowerPercentile, upperPercentile).get_limits(image)
         # Create an ImageNormalize object using a LogStrech object
         norm = ImageNormalize(vmin=vmin, vmax=vmax, stretch=PowerStretch(1))
         result = (image, colorMode, norm)
         return result
 
     def setStrech(self):
-        strechMode = self.getStrechMode()
-        colorMode = self.getColorMode()
-        zoomMode = self.getZoomMode()
-        worker = Worker(self.calculateImage, self.image, strechMode, colorMode, zoomMode)
-        worker.signals.result.connect(self.signalDisplayImage)
-        self.threadpool.start(worker)
+        self.updateImage()
 
     def setColor(self):
-        strechMode = self.getStrechMode()
-        colorMode = self.getColorMode()
-        zoomMode = self.getZoomMode()
-        worker = Worker(self.calculateImage, self.image, strechMode, colorMode, zoomMode)
-        worker.signals.result.connect(self.signalDisplayImage)
-        self.threadpool.start(worker)
+        self.updateImage()
 
     def setZoom(self):
-        strechMode = self.getStrechMode()
-        colorMode = self.getColorMode()
-        zoomMode = self.getZoomMode()
-        worker = Worker(self.calculateImage, self.image, strechMode, colorMode, zoomMode)
-        worker.signals.result.connect(self.signalDisplayImage)
-        self.threadpool.start(worker)
+        self.updateImage()
 
     def getColorMode(self):
         if self.ui.btn_colorCool.isChecked():